@@ -1,10 +1,14 @@
 import os
-from flask import Flask, jsonify, request
+import time
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from flasgger import Swagger
 
 from .config import settings
 from .auth import AuthError
+from .retry import start_request_budget
+from .tracing import finish_trace, start_trace
+from . import metrics
 from .routes_auth import auth_bp
 from .routes_users import users_bp
 from .routes_categorias import categorias_bp
@@ -14,6 +18,7 @@ from .routes_contratacoes import contratacoes_bp
 from .routes_avaliacoes import avaliacoes_bp
 from .routes_chat import chat_bp
 from .routes_profissionais import profissionais_bp
+from .routes_geo import geo_bp
 from .swagger_definitions import SWAGGER_DEFINITIONS
 
 
@@ -81,6 +86,7 @@ def create_app() -> Flask:
             {"name": "Avaliações", "description": "Avaliações de serviços e profissionais"},
             {"name": "Chat", "description": "Sistema de mensagens entre usuários"},
             {"name": "Profissionais", "description": "Listagem e busca de profissionais"},
+            {"name": "Geo", "description": "CEP e busca por raio de profissionais e anúncios"},
         ],
         "definitions": SWAGGER_DEFINITIONS,
     }
@@ -97,12 +103,65 @@ def create_app() -> Flask:
     app.register_blueprint(avaliacoes_bp)
     app.register_blueprint(chat_bp)
     app.register_blueprint(profissionais_bp)
+    app.register_blueprint(geo_bp)
 
     # Healthcheck
     @app.get("/api/health")
     def health():
         return jsonify({"status": "ok"})
 
+    # Estado dos circuit breakers por serviço do Supabase (monitoramento)
+    @app.get("/api/health/breakers")
+    def health_breakers():
+        from .breaker import breakers
+        from .stale import stale_store
+        return jsonify({"breakers": breakers.snapshot(), "stale": stale_store.stats()})
+
+    # Orçamento de retries ao Supabase da requisição (ver retry.py)
+    @app.before_request
+    def open_retry_budget():
+        start_request_budget()
+
+    # Trace das chamadas ao Supabase: header Server-Timing (ver tracing.py)
+    @app.before_request
+    def open_trace():
+        start_trace()
+
+    @app.after_request
+    def emit_trace(response):
+        return finish_trace(response)
+
+    # Métricas Prometheus por blueprint/endpoint (ver metrics.py)
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_labels = metrics.endpoint_labels(request.endpoint)
+        g.metrics_start = time.perf_counter()
+        metrics.request_started(*g.metrics_labels)
+
+    @app.after_request
+    def observe_request_metrics(response):
+        labels = g.get("metrics_labels")
+        if labels is not None:
+            size = None if response.is_streamed else response.calculate_content_length()
+            metrics.request_finished(*labels, request.method, response.status_code,
+                                     time.perf_counter() - g.metrics_start, size)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        labels = g.pop("metrics_labels", None)
+        if labels is not None:
+            metrics.request_done(*labels)
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        if not metrics.enabled():
+            return jsonify({"error": "Métricas indisponíveis (METRICS_ENABLED=false ou prometheus_client não instalado)"}), 503
+        if settings.metrics_token and request.headers.get("Authorization") != f"Bearer {settings.metrics_token}":
+            return jsonify({"error": "Unauthorized"}), 401
+        body, content_type = metrics.exposition()
+        return Response(body, content_type=content_type)
+
     # Handler para ignorar requisições HTTPS malformadas (handshakes TLS)
     @app.before_request
     def handle_preflight():
@@ -0,0 +1,130 @@
+import sys
+import os
+import io
+
+# Obtém o diretório do backend
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+# Obtém o diretório pai (lance-facil)
+parent_dir = os.path.dirname(backend_dir)
+
+# Adiciona o diretório pai ao path para que 'backend' seja reconhecido como pacote
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from asgiref.wsgi import WsgiToAsgi
+
+from backend.app import app as flask_app
+from backend.auth import AuthError
+from backend.conditional import conditional_response
+from backend.routes_async import ASYNC_ROUTES, CONDITIONAL, STALE_IF_ERROR
+from backend.stale import remember_or_fallback
+from backend.supabase_client import close_async_clients
+
+
+# Modo ASGI (opcional): `uvicorn backend.asgi:application`.
+# As rotas de ASYNC_ROUTES rodam como corrotinas com o AsyncClient do Supabase;
+# todas as outras continuam no app Flask (via WsgiToAsgi, em threads).
+# Requisição e resposta passam pelos mesmos objetos do Flask (Request,
+# app.json, before/after_request), então headers e corpo são os mesmos do WSGI.
+
+
+def _environ(scope) -> dict:
+    """Environ WSGI mínimo a partir do scope ASGI (suficiente para requisições GET)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "REMOTE_ADDR": client[0],
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class LanceFacilASGI:
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self.wsgi = WsgiToAsgi(app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        handler = self.routes.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+
+        environ = _environ(scope)
+        # O contexto de requisição do Flask vale durante todo o handler: os hooks
+        # before_request (orçamento de retry, trace, métricas), after_request
+        # (CORS, Server-Timing) e teardown rodam como no modo WSGI.
+        ctx = self.app.request_context(environ)
+        with ctx:
+            response = self.app.preprocess_request()
+            if response is None:
+                try:
+                    data, status = await handler(ctx.request)
+                except AuthError as e:
+                    data, status = {"error": str(e)}, e.status_code
+                except Exception as e:
+                    data, status = {"error": str(e)}, 500
+                # Resposta montada pelo Flask: mesmo JSON do modo WSGI
+                response = self.app.json.response(data)
+                response.status_code = status
+                if handler in STALE_IF_ERROR:
+                    response = remember_or_fallback(response=response, **STALE_IF_ERROR[handler])
+                if handler in CONDITIONAL:
+                    response = conditional_response(response, **CONDITIONAL[handler])
+            else:
+                response = self.app.make_response(response)
+            response = self.app.process_response(response)
+            body = response.get_data()
+            headers = [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in response.headers.items()]
+
+        await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await close_async_clients()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+application = LanceFacilASGI(flask_app, ASYNC_ROUTES)
+
+
+if __name__ == "__main__":
+    # Para rodar localmente
+    import uvicorn
+
+    print("🚀 Iniciando servidor ASGI (uvicorn)...")
+    print("📚 Documentação Swagger: http://localhost:5000/api/docs/")
+    print("🔍 Health Check: http://localhost:5000/api/health")
+    print("=" * 60)
+    uvicorn.run(application, host="0.0.0.0", port=5000, log_level="warning")
@@ -1,12 +1,15 @@
 import functools
+import hashlib
+import time
 from typing import Callable, Dict, Optional
 
 import jwt
 from flask import request, jsonify, make_response
 
+from .cache import Cache, TTLCache, invalidate_tags
 from .config import settings
 from .supabase_client import get_admin_client
-from .utils import build_worker_profile
+from .utils import build_worker_profile, usuario_tag
 
 
 class AuthError(Exception):
@@ -16,16 +19,35 @@ class AuthError(Exception):
 
 
 def get_bearer_token() -> Optional[str]:
-    auth_header = request.headers.get("Authorization", "")
+    return bearer_token_from(request.headers, request.cookies)
+
+
+def bearer_token_from(headers, cookies) -> Optional[str]:
+    """Token do header Authorization ou do cookie (também usado fora do Flask, no modo ASGI)."""
+    auth_header = headers.get("Authorization", "")
     parts = auth_header.split()
     if len(parts) == 2 and parts[0].lower() == "bearer":
         return parts[1]
     # fallback: cookie-based
-    cookie_token = request.cookies.get("sb_access_token")
+    cookie_token = cookies.get("sb_access_token")
     return cookie_token
 
 
+# Tokens já verificados: o mesmo access token se repete em toda requisição até
+# expirar. Chave = SHA-256 do token; valor = claims (somente leitura) até o `exp`.
+_verified_tokens = TTLCache("jwt", settings.jwt_cache_size, settings.jwt_cache_max_ttl, copy_values=False)
+# Tokens maiores que isso não entram no cache (limita a memória por entrada)
+_JWT_CACHE_MAX_TOKEN_BYTES = 4096
+
+
 def decode_supabase_jwt(token: str) -> Dict:
+    """Verifica a assinatura HS256 e devolve as claims (não altere o dict devolvido)."""
+    cacheable = len(token) <= _JWT_CACHE_MAX_TOKEN_BYTES
+    if cacheable:
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        hit, payload = _verified_tokens.get(key)
+        if hit:
+            return payload
     try:
         # Supabase access tokens incluem claim 'aud' ('authenticated').
         # Desativamos a verificação de audiência aqui para simplificar.
@@ -35,9 +57,13 @@ def decode_supabase_jwt(token: str) -> Dict:
             algorithms=["HS256"],
             options={"verify_aud": False},
         )
-        return payload
     except jwt.PyJWTError:
         raise AuthError("Token inválido ou expirado", 401)
+    if cacheable:
+        exp = payload.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        _verified_tokens.set(key, payload, ttl=ttl)
+    return payload
 
 
 def _csrf_required() -> bool:
@@ -64,23 +90,50 @@ def require_auth(f: Callable):
             _validate_csrf_if_cookie(token_from_cookie)
         except AuthError:
             raise  # Re-raise AuthError para ser capturado pelo handler
-        try:
-            claims = decode_supabase_jwt(token)
-        except AuthError:
-            raise  # Re-raise AuthError para ser capturado pelo handler
-        user_id = claims.get("sub")
-        if not user_id:
-            raise AuthError("Token inválido: sem sub", 401)
+        user_id = user_id_from_token(token)
         # injeta user_id nos kwargs
         return f(*args, user_id=user_id, **kwargs)
 
     return wrapper
 
 
-def get_current_user_profile(user_id: str) -> Optional[Dict]:
-    client = get_admin_client()
+def user_id_from_token(token: str) -> str:
+    try:
+        claims = decode_supabase_jwt(token)
+    except AuthError:
+        raise  # Re-raise AuthError para ser capturado pelo handler
+    user_id = claims.get("sub")
+    if not user_id:
+        raise AuthError("Token inválido: sem sub", 401)
+    return user_id
+
+
+# Linha de `usuarios` por user_id (o perfil_worker vem do cache de utils).
+# Invalidada por update_me, complete_onboarding e upsert_worker_profile.
+_user_profiles = Cache("user_profile", settings.user_profile_cache_ttl, settings.user_profile_cache_size)
+
+
+def invalidate_user_profile(user_id: str) -> None:
+    """Derruba tudo o que foi cacheado a partir do usuário (perfil e perfil_worker)."""
+    invalidate_tags(usuario_tag(user_id))
+
+
+def _usuario(client, user_id: str) -> Optional[Dict]:
+    hit, data = _user_profiles.get(user_id)
+    if hit:
+        return data
+    tags = [usuario_tag(user_id)]
+    geracao = _user_profiles.versions(tags)
     resp = client.table("usuarios").select("*").eq("id", user_id).single().execute()
     data = resp.data if resp.data else None
+    if data:
+        _user_profiles.set(user_id, data, tags=tags, versions=geracao)
+    return data
+
+
+def get_current_user_profile(user_id: str) -> Optional[Dict]:
+    client = get_admin_client()
+    data = _usuario(client, user_id)
     if not data:
         return None
     try:
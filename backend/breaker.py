@@ -0,0 +1,268 @@
+"""Circuit breaker por dependência do Supabase (PostgREST, Storage e Auth).
+
+Cada serviço tem um breaker com janela deslizante de resultados. Ele abre
+quando, com pelo menos `BREAKER_MIN_CALLS` chamadas na janela, a taxa de
+erros passa de `BREAKER_ERROR_RATE` ou a de chamadas lentas (acima de
+`BREAKER_SLOW_CALL_MS`) passa de `BREAKER_SLOW_RATE`. Aberto, falha na hora
+com `CircuitOpenError` (sem rede e sem retry) por `BREAKER_OPEN_SECONDS`;
+depois deixa passar uma chamada de teste (meio-aberto) que fecha ou reabre.
+
+O breaker fica no transporte httpx compartilhado (`BreakerTransport`), então
+vale para toda chamada ao Supabase, com ou sem `execute_with_retry`.
+"""
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+import threading
+import time
+
+import httpx
+
+from .config import settings
+from .retry import is_transient
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Prefixo do caminho da URL -> dependência
+_SERVICE_PREFIXES = (
+    ("/rest/v1", "postgrest"),
+    ("/storage/v1", "storage"),
+    ("/auth/v1", "auth"),
+)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, service: str, retry_in: float):
+        super().__init__(f"Circuito aberto para {service}: tentando novamente em {retry_in:.0f}s")
+        self.service = service
+        self.retry_in = retry_in
+
+
+# Chamada liberada por `before_call`: (geração do breaker, é a chamada de teste?)
+Call = Tuple[int, bool]
+
+
+class CircuitBreaker:
+    """Breaker de um serviço.
+
+    Cada mudança de estado incrementa a geração; `before_call` devolve a
+    geração em que a chamada começou e `record` ignora resultados de gerações
+    antigas (ex.: chamada lenta que começou antes de o circuito abrir e
+    terminou durante o teste do meio-aberto).
+    """
+
+    def __init__(self, service: str):
+        self.service = service
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._generation = 0
+        self._probe_in_flight = False
+        # (instante, sucesso, lenta)
+        self._window: Deque[Tuple[float, bool, bool]] = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        limit = now - settings.breaker_window
+        while self._window and self._window[0][0] < limit:
+            self._window.popleft()
+
+    def _rates(self) -> Tuple[int, float, float]:
+        total = len(self._window)
+        if not total:
+            return 0, 0.0, 0.0
+        errors = sum(1 for _, ok, _ in self._window if not ok)
+        slow = sum(1 for _, _, is_slow in self._window if is_slow)
+        return total, errors / total, slow / total
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        self._generation += 1
+        self._probe_in_flight = False
+
+    def before_call(self) -> Optional[Call]:
+        """Levanta CircuitOpenError se a chamada não deve sair; senão devolve a chamada a registrar."""
+        if not settings.breaker_enabled:
+            return None
+        with self._lock:
+            if self.state == CLOSED:
+                return self._generation, False
+            now = time.monotonic()
+            retry_in = (self.opened_at or now) + settings.breaker_open_seconds - now
+            if self.state == OPEN and retry_in <= 0:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return self._generation, True
+            self.rejected += 1
+        raise CircuitOpenError(self.service, max(retry_in, 0))
+
+    def record(self, call: Optional[Call], success: bool, duration: float) -> None:
+        if call is None or not settings.breaker_enabled:
+            return
+        generation, probe = call
+        now = time.monotonic()
+        slow = duration * 1000 >= settings.breaker_slow_call_ms
+        with self._lock:
+            if generation != self._generation:
+                return
+            if probe:
+                if success and not slow:
+                    self._set_state(CLOSED)
+                    self.opened_at = None
+                    self._window.clear()
+                else:
+                    self._open(now)
+                return
+            self._window.append((now, success, slow))
+            self._trim(now)
+            total, error_rate, slow_rate = self._rates()
+            if self.state == CLOSED and total >= settings.breaker_min_calls and (
+                error_rate >= settings.breaker_error_rate or slow_rate >= settings.breaker_slow_rate
+            ):
+                self._open(now)
+
+    def abandon(self, call: Optional[Call]) -> None:
+        """Chamada interrompida sem resultado (cancelada, cliente desconectou).
+
+        Não conta como erro da dependência, mas libera a vaga da chamada de
+        teste: a próxima requisição testa de novo.
+        """
+        if call is None:
+            return
+        generation, probe = call
+        with self._lock:
+            if probe and generation == self._generation:
+                self._probe_in_flight = False
+
+    def _open(self, now: float) -> None:
+        self._set_state(OPEN)
+        self.opened_at = now
+        self.times_opened += 1
+        print(f"[AVISO] Circuit breaker aberto para {self.service}")
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Envolve uma chamada: falha rápido se aberto e registra o resultado.
+
+        Exceções da aplicação (4xx, constraint...) contam como sucesso da
+        dependência; só falhas de infraestrutura contam como erro.
+        """
+        call = self.before_call()
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(call, not is_transient(e), time.perf_counter() - start)
+            raise
+        except BaseException:
+            self.abandon(call)
+            raise
+        self.record(call, True, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._trim(time.monotonic())
+            total, error_rate, slow_rate = self._rates()
+            retry_in = None
+            if self.state == OPEN and self.opened_at is not None:
+                retry_in = round(max(self.opened_at + settings.breaker_open_seconds - time.monotonic(), 0), 1)
+            return {
+                "state": self.state,
+                "calls_in_window": total,
+                "error_rate": round(error_rate, 3),
+                "slow_rate": round(slow_rate, 3),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_in": retry_in,
+            }
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str) -> CircuitBreaker:
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(service, CircuitBreaker(service))
+        return breaker
+
+    def for_url(self, url: httpx.URL) -> Optional[CircuitBreaker]:
+        path = url.path
+        for prefix, service in _SERVICE_PREFIXES:
+            if path.startswith(prefix):
+                return self.get(service)
+        return None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self.get(name).snapshot() for _, name in _SERVICE_PREFIXES}
+
+
+breakers = BreakerRegistry()
+
+
+def _response_ok(response: httpx.Response) -> bool:
+    # 5xx e 429 indicam dependência degradada; demais status são resposta válida
+    return response.status_code < 500 and response.status_code != 429
+
+
+class BreakerTransport(httpx.BaseTransport):
+    """Transporte httpx que passa cada requisição pelo breaker do serviço."""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = breakers.for_url(request.url)
+        if breaker is None:
+            return self._inner.handle_request(request)
+        call = breaker.before_call()
+        start = time.perf_counter()
+        try:
+            response = self._inner.handle_request(request)
+        except Exception:
+            breaker.record(call, False, time.perf_counter() - start)
+            raise
+        except BaseException:
+            # CancelledError/KeyboardInterrupt: sem veredito, mas a vaga de teste é liberada
+            breaker.abandon(call)
+            raise
+        breaker.record(call, _response_ok(response), time.perf_counter() - start)
+        return response
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class AsyncBreakerTransport(httpx.AsyncBaseTransport):
+    """Versão assíncrona de `BreakerTransport` (modo ASGI)."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = breakers.for_url(request.url)
+        if breaker is None:
+            return await self._inner.handle_async_request(request)
+        call = breaker.before_call()
+        start = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception:
+            breaker.record(call, False, time.perf_counter() - start)
+            raise
+        except BaseException:
+            # CancelledError/KeyboardInterrupt: sem veredito, mas a vaga de teste é liberada
+            breaker.abandon(call)
+            raise
+        breaker.record(call, _response_ok(response), time.perf_counter() - start)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
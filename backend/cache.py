@@ -0,0 +1,380 @@
+"""Cache em memória (por processo) com LRU e TTL.
+
+Usado para dados montados a partir de várias queries (ex.: perfis de
+worker). `get` devolve `(achou, valor)` para que `None` também possa ser
+guardado (ex.: "usuário não é worker"). Valores são copiados na entrada e na
+saída: quem chama pode alterar o dict sem afetar o cache.
+
+Versionamento: leia `generation()` antes de buscar no banco e passe-a ao
+`set`. Se alguma entrada foi invalidada nesse meio tempo, o valor (talvez
+lido antes da escrita) é descartado em vez de voltar ao cache.
+
+`Cache` é o cache nomeado sobre um backend plugável (`CACHE_BACKEND`: memória
+do processo, arquivo SQLite compartilhado ou Redis; ver cache_backends.py),
+com TTL e tags: `invalidate_tags("usuario:<id>")` derruba de uma vez todas as
+entradas marcadas com a tag, em todos os caches.
+
+`SWRCache` é para respostas inteiras de leituras públicas: serve o valor
+antigo enquanto revalida em segundo plano (stale-while-revalidate) e, num
+miss, só uma requisição por chave vai ao banco; as outras esperam por ela.
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+import asyncio
+import copy
+import threading
+import time
+
+from .cache_backends import CacheBackend, create_backend
+from .metrics import record_cache
+from .singleflight import SingleFlight
+
+
+class TTLCache:
+    """LRU com expiração por entrada (thread-safe).
+
+    Args:
+        name: Nome do cache nas métricas (`lancefacil_cache_requests_total`)
+        max_entries: Entradas mantidas; a menos usada sai primeiro
+        ttl: Segundos até a entrada expirar (0 desliga o cache)
+        copy_values: False para valores que quem chama só lê (evita o deepcopy)
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, copy_values: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.copy_values = copy_values
+        self._items: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._items[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+        record_cache(self.name, entry is not None)
+        if entry is None:
+            return False, None
+        return True, copy.deepcopy(entry[0]) if self.copy_values else entry[0]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        """Guarda `value`; `ttl` encurta a validade desta entrada (nunca passa de `self.ttl`)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        entry = (copy.deepcopy(value) if self.copy_values else value, time.monotonic() + ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+# Backends em uso pelos caches nomeados (invalidate_tags vale para todos)
+_backends: List[CacheBackend] = []
+_backends_lock = threading.Lock()
+_AVISO_INTERVALO = 60.0  # segundos entre avisos de falha do mesmo cache
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Invalida, em todos os caches, as entradas gravadas com alguma das `tags`."""
+    for backend in list(_backends):
+        try:
+            backend.bump_tags(list(tags))
+        except Exception as e:
+            print(f"[AVISO] Falha ao invalidar tags {list(tags)} no cache {backend.name}: {e}")
+
+
+class Cache:
+    """Cache nomeado com TTL e tags sobre o backend configurado.
+
+    Cada entrada guarda a versão das suas tags no momento da gravação;
+    `invalidate_tags` só incrementa a versão, e entradas com versão antiga
+    viram miss. Para não gravar um valor lido antes de uma escrita, leia
+    `versions(tags)` antes de buscar no banco e passe-as ao `set`/`set_many`.
+
+    Falhas do backend (ex.: Redis fora do ar) viram miss/no-op com um aviso.
+
+    Args:
+        name: Prefixo das chaves e nome nas métricas (`lancefacil_cache_requests_total`)
+        ttl: Segundos até a entrada expirar (0 desliga o cache)
+        max_entries: Tamanho do LRU quando o backend é a memória do processo
+        backend: Backend explícito (padrão: `CACHE_BACKEND`)
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int, backend: Optional[CacheBackend] = None):
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend or create_backend(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._avisado_em = 0.0
+        with _backends_lock:
+            if not any(b is self.backend for b in _backends):
+                _backends.append(self.backend)
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _aviso(self, op: str, e: Exception) -> None:
+        agora = time.monotonic()
+        if agora - self._avisado_em >= _AVISO_INTERVALO:
+            self._avisado_em = agora
+            print(f"[AVISO] Cache {self.name} ({self.backend.name}) falhou em {op}: {e}")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(achou, valor); `None` guardado também é um acerto."""
+        found = self.get_many([key])
+        if key in found:
+            return True, found[key]
+        return False, None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """{chave: valor} das chaves em cache e válidas (as demais ficam de fora)."""
+        keys = list(dict.fromkeys(keys))
+        if not keys or self.ttl <= 0:
+            return {}
+        try:
+            raw = self.backend.get_many([self._key(k) for k in keys])
+            tags = {tag for envelope in raw.values() for tag in envelope.get("t", {})}
+            current = self.backend.tag_versions(list(tags)) if tags else {}
+        except Exception as e:
+            self._aviso("get", e)
+            raw, current = {}, {}
+        found = {}
+        for key in keys:
+            envelope = raw.get(self._key(key))
+            if envelope is not None and all(current.get(t, 0) == v for t, v in envelope.get("t", {}).items()):
+                found[key] = envelope["v"]
+        for key in keys:
+            record_cache(self.name, key in found)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        """Versão atual das tags, a ler antes de buscar o valor no banco."""
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return {}
+        try:
+            return self.backend.tag_versions(tags)
+        except Exception as e:
+            self._aviso("versions", e)
+            return {}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = (),
+            versions: Optional[Mapping[str, int]] = None) -> None:
+        self.set_many({key: value}, ttl, {key: tags}, versions)
+
+    def set_many(self, items: Mapping[str, Any], ttl: Optional[float] = None,
+                 tags: Optional[Mapping[str, Iterable[str]]] = None,
+                 versions: Optional[Mapping[str, int]] = None) -> None:
+        """Grava vários valores; `tags` dá as tags de cada chave e `versions` o retrato lido antes da busca."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if not items or ttl <= 0:
+            return
+        tags_por_chave = {key: list(dict.fromkeys((tags or {}).get(key, ()))) for key in items}
+        try:
+            if versions is None:
+                versions = self.versions(t for ts in tags_por_chave.values() for t in ts)
+            elif any(t not in versions for ts in tags_por_chave.values() for t in ts):
+                # Sem retrato de alguma tag: não dá para garantir que o valor é atual
+                return
+            self.backend.set_many({
+                self._key(key): {"v": value, "t": {t: versions.get(t, 0) for t in tags_por_chave[key]}}
+                for key, value in items.items()
+            }, ttl)
+        except Exception as e:
+            self._aviso("set", e)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        try:
+            self.backend.delete_many([self._key(k) for k in keys])
+        except Exception as e:
+            self._aviso("delete", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend.name, "hits": self.hits, "misses": self.misses}
+
+
+class SWRCache:
+    """Cache stale-while-revalidate com coalescência de misses (thread-safe).
+
+    Até `ttl` a entrada é servida direto; até `ttl + stale_ttl` ela ainda é
+    servida, mas a primeira requisição dispara uma recarga em segundo plano.
+    Os valores não são copiados: quem chama não deve alterá-los.
+
+    Args:
+        name: Nome do cache nas métricas (`lancefacil_cache_requests_total`)
+        max_entries: Entradas mantidas; a menos usada sai primeiro
+        ttl: Segundos em que a entrada é servida sem revalidar (0 desliga o cache)
+        stale_ttl: Segundos a mais em que a entrada antiga é servida enquanto revalida
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, stale_ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # chave -> (valor, fresco até, servível até)
+        self._items: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Valores compartilhados sem cópia, como os do próprio cache
+        self._flight = SingleFlight(name, copy_result=False)
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set["asyncio.Task"] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _lookup(self, key: Hashable) -> Tuple[str, Any]:
+        """('fresh' | 'stale' | 'miss', valor)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[2] <= now:
+                del self._items[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                state, value = "miss", None
+            else:
+                self._items.move_to_end(key)
+                value = entry[0]
+                if entry[1] > now:
+                    self.hits += 1
+                    state = "fresh"
+                else:
+                    self.stale_hits += 1
+                    state = "stale"
+        record_cache(self.name, state != "miss")
+        return state, value
+
+    def _store(self, key: Hashable, value: Any, generation: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._items[key] = (value, now + self.ttl, now + self.ttl + self.stale_ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def _claim_refresh(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    # -------------------- síncrono (Flask) --------------------
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Valor em cache para `key`, chamando `load()` no miss (uma vez por chave)."""
+        if not self.enabled:
+            return load()
+        state, value = self._lookup(key)
+        if state == "stale" and self._claim_refresh(key):
+            threading.Thread(target=self._refresh, args=(key, load), daemon=True,
+                             name=f"swr-{self.name}").start()
+        if state != "miss":
+            return value
+        return self._load_once(key, load)
+
+    def _load_once(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        def carregar():
+            generation = self._generation
+            value = load()
+            self._store(key, value, generation)
+            return value
+
+        return self._flight.do(key, carregar)
+
+    def _refresh(self, key: Hashable, load: Callable[[], Any]) -> None:
+        generation = self._generation
+        try:
+            self._store(key, load(), generation)
+        except Exception as e:
+            print(f"[AVISO] Falha ao revalidar cache {self.name}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # -------------------- assíncrono (ASGI) --------------------
+    async def aget_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """`get_or_load` para handlers assíncronos (`load` devolve uma corrotina)."""
+        if not self.enabled:
+            return await load()
+        state, value = self._lookup(key)
+        if state == "stale" and self._claim_refresh(key):
+            task = asyncio.get_running_loop().create_task(self._arefresh(key, load))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if state != "miss":
+            return value
+
+        async def carregar():
+            generation = self._generation
+            value = await load()
+            self._store(key, value, generation)
+            return value
+
+        return await self._flight.ado(key, carregar)
+
+    async def _arefresh(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> None:
+        generation = self._generation
+        try:
+            self._store(key, await load(), generation)
+        except Exception as e:
+            print(f"[AVISO] Falha ao revalidar cache {self.name}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        """Descarta tudo (ex.: após uma escrita); cargas em andamento não voltam ao cache."""
+        with self._lock:
+            self._items.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits,
+                    "stale_hits": self.stale_hits, "misses": self.misses}
@@ -0,0 +1,292 @@
+"""Backends de armazenamento dos caches nomeados (`cache.Cache`).
+
+- `memory`: LRU no próprio processo (padrão). Cada worker do gunicorn tem a
+  sua cópia, fria a cada deploy.
+- `file`: SQLite num arquivo local (`CACHE_FILE_PATH`; por padrão num
+  diretório privado do usuário em `/dev/shm`, memória compartilhada), visto
+  por todos os processos do mesmo usuário na máquina. O arquivo é criado com
+  permissão 0600.
+- `redis`: qualquer servidor que fale o protocolo do Redis (Redis, Valkey,
+  KeyDB...), compartilhado entre máquinas. Requer o pacote opcional `redis`.
+
+Os backends só guardam valores JSON (dicts, listas, textos, números) e
+contadores de versão por tag; expiração, tags e métricas ficam em `cache.Cache`.
+Falhas do backend nunca derrubam a requisição: viram miss (ver `Cache`).
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from .config import settings
+
+
+class CacheBackend(ABC):
+    """Interface dos backends: operações em lote sobre chaves já prefixadas."""
+
+    name = "base"
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Valores das chaves presentes e não expiradas (as demais ficam de fora)."""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        """Grava os valores com expiração em `ttl` segundos."""
+
+    @abstractmethod
+    def delete_many(self, keys: List[str]) -> None:
+        """Remove as chaves (as ausentes são ignoradas)."""
+
+    @abstractmethod
+    def tag_versions(self, tags: List[str]) -> Dict[str, int]:
+        """Versão atual de cada tag (0 se nunca invalidada)."""
+
+    @abstractmethod
+    def bump_tags(self, tags: List[str]) -> None:
+        """Incrementa a versão das tags: entradas gravadas com a versão antiga deixam de valer."""
+
+
+class MemoryBackend(CacheBackend):
+    """LRU por processo; os valores são copiados na entrada e na saída."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._tags: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._items.get(key)
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    del self._items[key]
+                    continue
+                self._items.move_to_end(key)
+                found[key] = entry[0]
+        return {key: copy.deepcopy(value) for key, value in found.items()}
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + ttl
+        entries = {key: (copy.deepcopy(value), expires) for key, value in items.items()}
+        with self._lock:
+            for key, entry in entries.items():
+                self._items[key] = entry
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def delete_many(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+    def tag_versions(self, tags: List[str]) -> Dict[str, int]:
+        with self._lock:
+            return {tag: self._tags.get(tag, 0) for tag in tags}
+
+    def bump_tags(self, tags: List[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._tags[tag] = self._tags.get(tag, 0) + 1
+
+
+class FileBackend(CacheBackend):
+    """SQLite em arquivo local compartilhado pelos processos (WAL; uma conexão por thread).
+
+    Acima de `max_entries` saem primeiro as entradas que expiram antes (as
+    leituras não reordenam, para não escrever no arquivo a cada acerto).
+    """
+
+    name = "file"
+    _PURGE_EVERY = 256  # gravações entre limpezas de expirados/excedentes
+    _CHUNK = 500  # chaves por consulta IN (...)
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        # O cache guarda dados de usuários: só o dono do processo lê o arquivo.
+        # O SQLite cria o -wal e o -shm com a mesma permissão do banco.
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(path, 0o600)
+        db = self._db()
+        db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries(expires)")
+        db.execute("CREATE TABLE IF NOT EXISTS tags (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _db(self) -> sqlite3.Connection:
+        # Conexões não atravessam fork (gunicorn --preload): uma por processo e thread
+        pid, db = getattr(self._local, "conn", (None, None))
+        if db is None or pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=OFF")
+            self._local.conn = (os.getpid(), db)
+        return db
+
+    def _chunks(self, keys: List[str]) -> Iterable[List[str]]:
+        for i in range(0, len(keys), self._CHUNK):
+            yield keys[i:i + self._CHUNK]
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        db = self._db()
+        now = time.time()
+        found = {}
+        for chunk in self._chunks(keys):
+            marks = ",".join("?" * len(chunk))
+            rows = db.execute(f"SELECT key, value FROM entries WHERE key IN ({marks}) AND expires > ?", (*chunk, now))
+            for key, value in rows:
+                found[key] = json.loads(value)
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        if not items or self.max_entries <= 0:
+            return
+        expires = time.time() + ttl
+        rows = [(key, json.dumps(value, ensure_ascii=False, default=str), expires) for key, value in items.items()]
+        db = self._db()
+        db.executemany("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)", rows)
+        self._writes += len(rows)
+        if self._writes >= self._PURGE_EVERY:
+            self._writes = 0
+            self._purge(db)
+
+    def _purge(self, db: sqlite3.Connection) -> None:
+        db.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+        excess = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            db.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY expires LIMIT ?)", (excess,))
+
+    def delete_many(self, keys: List[str]) -> None:
+        db = self._db()
+        for chunk in self._chunks(keys):
+            db.execute(f"DELETE FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+
+    def tag_versions(self, tags: List[str]) -> Dict[str, int]:
+        db = self._db()
+        versions = {tag: 0 for tag in tags}
+        for chunk in self._chunks(list(versions)):
+            marks = ",".join("?" * len(chunk))
+            versions.update(db.execute(f"SELECT tag, version FROM tags WHERE tag IN ({marks})", chunk))
+        return versions
+
+    def bump_tags(self, tags: List[str]) -> None:
+        self._db().executemany(
+            "INSERT INTO tags (tag, version) VALUES (?, 1) ON CONFLICT(tag) DO UPDATE SET version = version + 1",
+            [(tag,) for tag in tags],
+        )
+
+
+class RedisBackend(CacheBackend):
+    """Servidor com protocolo Redis (valores em JSON, expiração pelo próprio servidor)."""
+
+    name = "redis"
+    # Versões de tag expiram bem depois de qualquer entrada que as use
+    _TAG_TTL = 7 * 24 * 60 * 60
+
+    def __init__(self, url: str, prefix: str):
+        import redis
+
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(
+            url,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+        )
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        values = self._redis.mget([self.prefix + key for key in keys])
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        if not items:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self.prefix + key, json.dumps(value, ensure_ascii=False, default=str), px=max(int(ttl * 1000), 1))
+        pipe.execute()
+
+    def delete_many(self, keys: List[str]) -> None:
+        if keys:
+            self._redis.delete(*[self.prefix + key for key in keys])
+
+    def tag_versions(self, tags: List[str]) -> Dict[str, int]:
+        if not tags:
+            return {}
+        values = self._redis.mget([self._tag_key(tag) for tag in tags])
+        return {tag: int(value) if value is not None else 0 for tag, value in zip(tags, values)}
+
+    def bump_tags(self, tags: List[str]) -> None:
+        if not tags:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(self._tag_key(tag))
+            pipe.expire(self._tag_key(tag), self._TAG_TTL)
+        pipe.execute()
+
+
+# Backend compartilhado (file/redis): um por processo, criado sob demanda
+_shared: Optional[CacheBackend] = None
+_shared_failed = False
+_shared_lock = threading.Lock()
+
+
+def _default_file_path() -> str:
+    """Arquivo num diretório só do usuário atual (0700), em /dev/shm se houver."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    private = os.path.join(base, f"lancefacil-cache-{os.getuid()}")
+    os.makedirs(private, mode=0o700, exist_ok=True)
+    info = os.lstat(private)
+    # Diretório com o mesmo nome criado antes por outro usuário: não usar
+    if not os.path.isdir(private) or os.path.islink(private) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{private} não é um diretório privado do usuário atual")
+    return os.path.join(private, "cache.sqlite3")
+
+
+def _shared_backend() -> Optional[CacheBackend]:
+    global _shared, _shared_failed
+    if _shared is None and not _shared_failed:
+        with _shared_lock:
+            if _shared is None and not _shared_failed:
+                kind = settings.cache_backend
+                try:
+                    if kind == "file":
+                        _shared = FileBackend(settings.cache_file_path or _default_file_path(), settings.cache_file_max_entries)
+                    elif kind == "redis":
+                        _shared = RedisBackend(settings.redis_url, settings.cache_key_prefix)
+                except Exception as e:
+                    _shared_failed = True
+                    print(f"[AVISO] Backend de cache '{kind}' indisponível, usando memória do processo: {e}")
+    return _shared
+
+
+def create_backend(max_entries: int) -> CacheBackend:
+    """Backend de um cache nomeado: o compartilhado de `CACHE_BACKEND` ou um LRU próprio."""
+    if settings.cache_backend in ("file", "redis"):
+        shared = _shared_backend()
+        if shared is not None:
+            return shared
+    return MemoryBackend(max_entries)
@@ -0,0 +1,230 @@
+"""Catálogo de categorias em cache no processo.
+
+`GET /api/categorias` é chamado por quase toda página e a tabela muda pouco:
+o catálogo fica em memória por `CATEGORIAS_TTL` segundos, com um ETag
+calculado do conteúdo (respostas 304 para `If-None-Match`). `create_categoria`
+recarrega o catálogo na hora; os demais processos convergem dentro do TTL.
+
+O mesmo catálogo alimenta o resolvedor id <-> slug/nome (`resolve_ids`,
+`category_names`) usado nos perfis de worker e na busca de profissionais, de
+modo que resolver categorias não custa uma ida ao banco.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+
+from .config import settings
+from .metrics import record_cache
+from .supabase_client import get_admin_client
+from .utils import execute_with_retry
+
+
+def fold(text: str) -> str:
+    """Chave de comparação: minúsculas, sem acentos e espaços normalizados."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    sem_acento = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(sem_acento.lower().split())
+
+
+@dataclass(frozen=True)
+class CategoryIndex:
+    """Índice bidirecional: id -> nome e slug/nome (minúsculo e sem acento) -> ids."""
+
+    names: Dict[int, str] = field(default_factory=dict)
+    keys: Dict[str, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, items: List[Dict[str, Any]]) -> "CategoryIndex":
+        names: Dict[int, str] = {}
+        keys: Dict[str, List[int]] = {}
+        for c in items:
+            cid = c.get("id")
+            if cid is None:
+                continue
+            if c.get("nome"):
+                names[cid] = c["nome"]
+            for value in (c.get("slug"), c.get("nome")):
+                if value:
+                    for key in {str(value).strip(), str(value).strip().lower(), fold(value)}:
+                        ids = keys.setdefault(key, [])
+                        if cid not in ids:
+                            ids.append(cid)
+        return cls(names, keys)
+
+    def lookup(self, value: str) -> List[int]:
+        """Ids cujo slug ou nome corresponde a `value` (exato, minúsculo ou sem acento)."""
+        value = str(value).strip()
+        for key in (value, value.lower(), fold(value)):
+            if key in self.keys:
+                return list(self.keys[key])
+        return []
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    items: List[Dict[str, Any]]
+    etag: str
+    loaded_at: float
+    index: CategoryIndex
+
+
+def _etag(items: List[Dict[str, Any]]) -> str:
+    body = json.dumps(items, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+class CategoryCatalog:
+    """Cache TTL da tabela `categorias` (thread-safe; uma recarga por vez)."""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def _fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.loaded_at < settings.categorias_ttl
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            record_cache("categorias", True)
+            return snapshot
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                record_cache("categorias", True)
+                return snapshot
+            record_cache("categorias", False)
+            return self._load()
+
+    def refresh(self) -> CatalogSnapshot:
+        """Recarrega já (após uma escrita na tabela)."""
+        with self._lock:
+            return self._load()
+
+    async def aget(self) -> CatalogSnapshot:
+        """`get` para handlers assíncronos: a recarga roda numa thread."""
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            record_cache("categorias", True)
+            return snapshot
+        return await asyncio.to_thread(self.get)
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    def refresh_if_older(self, seconds: float) -> Optional[CatalogSnapshot]:
+        """Recarrega se o catálogo tiver mais de `seconds` (ex.: categoria desconhecida).
+
+        Chamadas simultâneas fazem uma só recarga: quem esperou o lock usa o
+        catálogo que a primeira acabou de carregar.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < seconds:
+            return None
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot.loaded_at < seconds:
+                return snapshot
+            return self._load()
+
+    def _load(self) -> CatalogSnapshot:
+        admin = get_admin_client()
+        items = execute_with_retry(
+            lambda: admin.table("categorias").select("*").order("id").execute().data or [],
+            max_attempts=3,
+            delay=0.3,
+        )
+        self._snapshot = CatalogSnapshot(items, _etag(items), time.monotonic(), CategoryIndex.build(items))
+        return self._snapshot
+
+
+catalog = CategoryCatalog()
+
+# Uma referência desconhecida (categoria criada em outro processo) recarrega o
+# catálogo, no máximo uma vez a cada intervalo
+_REFRESH_ON_MISS_AFTER = 5.0
+
+
+def resolve_ids(values: Iterable[Any]) -> List[int]:
+    """Converte ids, ids em texto, slugs ou nomes em ids de categoria (sem repetir).
+
+    Números são aceitos como ids mesmo fora do catálogo (a FK valida no insert);
+    slugs/nomes desconhecidos são ignorados.
+    """
+    refs: List[Any] = []  # int (id) ou str (slug/nome), na ordem recebida
+    for value in values:
+        if isinstance(value, bool) or value is None:
+            continue
+        if isinstance(value, int):
+            refs.append(value)
+            continue
+        text = str(value).strip()
+        if not text:
+            continue
+        try:
+            refs.append(int(text))
+        except ValueError:
+            refs.append(text)
+    pendentes = [r for r in refs if isinstance(r, str)]
+    index = None
+    if pendentes:
+        index = catalog.get().index
+        if any(not index.lookup(v) for v in pendentes):
+            index = (catalog.refresh_if_older(_REFRESH_ON_MISS_AFTER) or catalog.get()).index
+    ids: List[int] = []
+    for ref in refs:
+        if isinstance(ref, int):
+            ids.append(ref)
+        else:
+            found = index.lookup(ref)
+            if found:
+                ids.append(found[0])
+    return list(dict.fromkeys(ids))
+
+
+def _names(index: CategoryIndex, ids: Iterable[Any]) -> Dict[int, str]:
+    return {cid: index.names[cid] for cid in ids if cid in index.names}
+
+
+def category_names(ids: Iterable[Any]) -> Dict[int, str]:
+    """id -> nome das categorias conhecidas entre `ids`."""
+    ids = [cid for cid in ids if cid is not None]
+    if not ids:
+        return {}
+    index = catalog.get().index
+    if any(cid not in index.names for cid in ids):
+        index = (catalog.refresh_if_older(_REFRESH_ON_MISS_AFTER) or catalog.get()).index
+    return _names(index, ids)
+
+
+async def acategory_names(ids: Iterable[Any]) -> Dict[int, str]:
+    """`category_names` para handlers assíncronos."""
+    ids = [cid for cid in ids if cid is not None]
+    if not ids:
+        return {}
+    index = (await catalog.aget()).index
+    if any(cid not in index.names for cid in ids):
+        return await asyncio.to_thread(category_names, ids)
+    return _names(index, ids)
+
+
+def matching_ids(categoria: str) -> List[int]:
+    """Ids das categorias cujo slug ou nome é `categoria` (filtro de profissionais)."""
+    found = catalog.get().index.lookup(categoria)
+    if not found:
+        found = (catalog.refresh_if_older(_REFRESH_ON_MISS_AFTER) or catalog.get()).index.lookup(categoria)
+    return found
+
+
+async def amatching_ids(categoria: str) -> List[int]:
+    """`matching_ids` para handlers assíncronos."""
+    found = (await catalog.aget()).index.lookup(categoria)
+    if not found:
+        return await asyncio.to_thread(matching_ids, categoria)
+    return found
@@ -0,0 +1,196 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import contextvars
+import threading
+import time
+
+from .config import settings
+from .utils import execute_with_retry, aexecute_with_retry
+
+T = TypeVar('T')
+
+_MISSING = object()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_in_worker = threading.local()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.fanout_max_workers,
+                    thread_name_prefix="fanout",
+                )
+    return _executor
+
+
+def _run_task(ctx: contextvars.Context, func: Callable[[], T], max_attempts: int, delay: float) -> T:
+    def call():
+        _in_worker.active = True
+        try:
+            return execute_with_retry(func, max_attempts=max_attempts, delay=delay)
+        finally:
+            _in_worker.active = False
+
+    # Roda no contexto da requisição (flask.g, trace, orçamento de retry)
+    return ctx.run(call)
+
+
+def run_parallel(
+    tasks: Dict[str, Callable[[], Any]],
+    timeout: Optional[float] = None,
+    max_attempts: int = 2,
+    delay: float = 0.2,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Executa queries independentes em paralelo e devolve {nome: resultado}.
+
+    Cada tarefa roda com `execute_with_retry` em um pool limitado
+    (`FANOUT_MAX_WORKERS`), de modo que o tempo total fica próximo ao da
+    query mais lenta em vez da soma de todas. A primeira tarefa roda na
+    própria thread chamadora, sem ocupar o pool; por isso ela pode fazer o seu
+    próprio fan-out (o timeout não a interrompe: vale o timeout do transporte).
+
+    Args:
+        tasks: Mapa nome -> função sem argumentos que executa a query
+        timeout: Tempo máximo (segundos) para todas as tarefas terminarem
+        max_attempts: Tentativas por tarefa
+        delay: Delay base entre tentativas
+        defaults: Valor usado quando a tarefa com esse nome falha ou estoura o
+            timeout; tarefas sem default propagam a exceção
+
+    Returns:
+        Dicionário com o resultado de cada tarefa
+    """
+    defaults = defaults or {}
+    if not tasks:
+        return {}
+
+    def run_inline(name: str) -> Any:
+        try:
+            return execute_with_retry(tasks[name], max_attempts=max_attempts, delay=delay)
+        except Exception as e:
+            if name not in defaults:
+                raise
+            print(f"[AVISO] Falha na tarefa paralela '{name}': {e}")
+            return defaults[name]
+
+    # Dentro de uma tarefa do pool (fan-out aninhado) ou com uma única tarefa,
+    # executa em sequência para não esgotar o pool esperando por ele mesmo.
+    if len(tasks) == 1 or getattr(_in_worker, "active", False) or settings.fanout_max_workers <= 1:
+        return {name: run_inline(name) for name in tasks}
+
+    executor = _get_executor()
+    names = list(tasks.keys())
+    deadline = (time.monotonic() + timeout) if timeout is not None else None
+    futures = {
+        name: executor.submit(_run_task, contextvars.copy_context(), tasks[name], max_attempts, delay)
+        for name in names[1:]
+    }
+
+    out: Dict[str, Any] = {}
+    try:
+        out[names[0]] = run_inline(names[0])
+    except Exception:
+        for future in futures.values():
+            future.cancel()
+        raise
+
+    # Primeira tarefa sem default que falhou, na ordem em que terminaram
+    failure: Optional[BaseException] = None
+    pending = set(futures.values())
+    while pending and failure is None:
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_EXCEPTION)
+        if not done:
+            break  # prazo esgotado
+        failure = next(
+            (f.exception() for name, f in futures.items()
+             if f in done and name not in defaults and f.exception() is not None),
+            None,
+        )
+
+    if failure is not None:
+        for future in pending:
+            future.cancel()
+        raise failure
+
+    for name, future in futures.items():
+        value = _MISSING
+        error: Optional[BaseException] = None
+        if future.done():
+            error = future.exception()
+            if error is None:
+                value = future.result()
+        else:
+            future.cancel()
+            error = TimeoutError(f"Tarefa '{name}' excedeu {timeout}s")
+        if value is _MISSING:
+            if name not in defaults:
+                raise error
+            print(f"[AVISO] Falha na tarefa paralela '{name}': {error}")
+            value = defaults[name]
+        out[name] = value
+    return out
+
+
+async def gather_parallel(
+    tasks: Dict[str, Callable[[], Awaitable[Any]]],
+    timeout: Optional[float] = None,
+    max_attempts: int = 2,
+    delay: float = 0.2,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Equivalente assíncrono de `run_parallel` para os handlers ASGI.
+
+    As tarefas são corrotinas concorrentes no mesmo event loop (sem threads);
+    `timeout`, `max_attempts`, `delay` e `defaults` têm o mesmo significado.
+    """
+    defaults = defaults or {}
+    if not tasks:
+        return {}
+
+    futures = {
+        name: asyncio.ensure_future(aexecute_with_retry(func, max_attempts=max_attempts, delay=delay))
+        for name, func in tasks.items()
+    }
+    loop = asyncio.get_running_loop()
+    deadline = (loop.time() + timeout) if timeout is not None else None
+    failure: Optional[BaseException] = None
+    pending = set(futures.values())
+    try:
+        while pending and failure is None:
+            remaining = None if deadline is None else max(deadline - loop.time(), 0)
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_EXCEPTION)
+            if not done:
+                break  # prazo esgotado
+            failure = next(
+                (f.exception() for name, f in futures.items()
+                 if f in done and name not in defaults and f.exception() is not None),
+                None,
+            )
+    finally:
+        for future in futures.values():
+            if not future.done():
+                future.cancel()
+    if failure is not None:
+        raise failure
+
+    out: Dict[str, Any] = {}
+    for name, future in futures.items():
+        if future in pending:
+            error: Optional[BaseException] = TimeoutError(f"Tarefa '{name}' excedeu {timeout}s")
+        else:
+            error = future.exception()
+        if error is None:
+            out[name] = future.result()
+            continue
+        if name not in defaults:
+            raise error
+        print(f"[AVISO] Falha na tarefa paralela '{name}': {error}")
+        out[name] = defaults[name]
+    return out
@@ -0,0 +1,47 @@
+"""Respostas condicionais (ETag / 304) para leituras.
+
+`@conditional()` calcula um ETag forte a partir do corpo serializado da
+resposta 200. Se o cliente já tem essa versão (`If-None-Match`), a resposta
+vira um 304 sem corpo: a query ainda roda, mas clientes em redes lentas não
+baixam de novo listas que não mudaram.
+
+Não há `Last-Modified`: `publicado_em` é a data de criação do anúncio e
+`usuarios.atualizado_em` não é mantido nas escritas, então um
+`If-Modified-Since` baseado neles devolveria 304 para dados alterados.
+"""
+from typing import Callable
+import functools
+import hashlib
+
+from flask import Response, make_response, request
+
+from .stale import has_credentials
+
+
+def conditional_response(response: Response, max_age: int = 0) -> Response:
+    """Adiciona ETag/Cache-Control a uma resposta 200 e responde 304 se o cliente já a tem."""
+    if request.method not in ("GET", "HEAD") or response.status_code != 200 or response.is_streamed:
+        return response
+    if not response.get_etag()[0]:
+        response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    # Com credenciais a resposta pode depender do usuário: só o cache do próprio cliente
+    scope = "private" if has_credentials() else "public"
+    response.headers["Cache-Control"] = f"{scope}, max-age={max_age}" if max_age else f"{scope}, no-cache"
+    response.vary.update(("Authorization", "Cookie"))
+    return response.make_conditional(request)
+
+
+def conditional(max_age: int = 0) -> Callable:
+    """Decorator de view: ETag do corpo e 304 para `If-None-Match`.
+
+    Args:
+        max_age: Segundos que o cliente pode reusar a resposta sem revalidar (0 = sempre revalida)
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            return conditional_response(make_response(view(*args, **kwargs)), max_age)
+
+        return wrapper
+
+    return decorator
@@ -18,6 +18,72 @@ class Settings:
     cookie_secure: bool = True
     cookie_samesite: str = "Lax"  # 'Lax' | 'Strict' | 'None'
     cookie_max_age: int = 60 * 60 * 24 * 7  # 7 days
+    # Backend de dados: 'supabase' (projeto real) | 'memory' (memory_client, offline)
+    supabase_backend: str = "supabase"
+    memory_latency_ms: float = 0.0  # latência simulada por chamada no backend 'memory'
+    memory_seed_file: str = None  # JSON {tabela: [linhas]} carregado no backend 'memory'
+    # Transporte HTTP dos clientes Supabase (PostgREST, Storage, Auth)
+    supabase_http_mode: str = "pooled"  # 'pooled' (um pool por processo) | 'per_thread'
+    supabase_http2: bool = True
+    supabase_pool_max_connections: int = 20
+    supabase_pool_max_keepalive: int = 10
+    supabase_keepalive_expiry: float = 30.0  # segundos
+    supabase_connect_timeout: float = 5.0  # segundos
+    supabase_read_timeout: float = 20.0  # segundos
+    # Pool de threads para queries independentes em paralelo (concurrency.run_parallel)
+    fanout_max_workers: int = 8
+    # Retry das chamadas ao Supabase (retry.RetryPolicy)
+    retry_max_delay: float = 2.0  # teto da espera entre tentativas (segundos)
+    retry_budget_per_request: int = 4  # retries somados de todas as queries de uma requisição
+    # Circuit breaker por serviço do Supabase (breaker.py)
+    breaker_enabled: bool = True
+    breaker_window: float = 30.0  # janela deslizante (segundos)
+    breaker_min_calls: int = 10  # chamadas mínimas na janela para avaliar as taxas
+    breaker_error_rate: float = 0.5  # taxa de erros que abre o circuito
+    breaker_slow_call_ms: float = 3000.0  # chamada acima disso conta como lenta
+    breaker_slow_rate: float = 0.8  # taxa de chamadas lentas que abre o circuito
+    breaker_open_seconds: float = 15.0  # tempo aberto antes da chamada de teste
+    # Respostas "stale-if-error" (stale.py)
+    stale_max_entries: int = 512
+    stale_max_age: float = 24 * 60 * 60.0  # segundos
+    # Instrumentação das chamadas ao Supabase por requisição (tracing.py)
+    server_timing: bool = True
+    server_timing_max_entries: int = 10  # grupos (serviço.alvo.operação) no header
+    trace_log: bool = False  # uma linha JSON por requisição
+    trace_log_min_ms: float = 0.0  # só loga requisições acima disso
+    # Cache do catálogo de categorias (categories.py)
+    categorias_ttl: float = 300.0  # segundos
+    # Cache de perfis de worker montados (utils.build_worker_profile)
+    worker_profile_cache_ttl: float = 60.0  # segundos
+    worker_profile_cache_size: int = 2048
+    # Cache da linha de `usuarios` do usuário logado (auth.get_current_user_profile)
+    user_profile_cache_ttl: float = 60.0  # segundos
+    user_profile_cache_size: int = 4096
+    # Cache de JWTs já verificados (auth.decode_supabase_jwt)
+    jwt_cache_size: int = 10000  # tokens; cada entrada guarda só as claims
+    jwt_cache_max_ttl: float = 3600.0  # teto da validade, mesmo com `exp` maior (segundos)
+    # Cache do feed público de anúncios (GET /api/anuncios sem login)
+    anuncios_feed_cache_ttl: float = 10.0  # segundos servindo direto do cache
+    anuncios_feed_cache_swr: float = 60.0  # segundos a mais servindo o valor antigo enquanto revalida
+    anuncios_feed_cache_size: int = 512
+    # Cache das contagens por faceta do feed (GET /api/anuncios/facetas)
+    anuncios_facetas_cache_ttl: float = 30.0
+    anuncios_facetas_cache_swr: float = 300.0
+    anuncios_facetas_cache_size: int = 1024
+    # Busca por raio (geo.py / routes_geo.py)
+    cep_cache_ttl: float = 86400.0  # CEP → coordenadas; a base de CEPs quase não muda
+    cep_cache_size: int = 20000
+    geo_raio_max_km: float = 200.0
+    # Backend dos caches nomeados (cache.Cache / cache_backends.py)
+    cache_backend: str = "memory"  # 'memory' (por processo) | 'file' (SQLite local) | 'redis'
+    cache_file_path: str = ""  # vazio = /dev/shm/lancefacil-cache-<uid>/cache.sqlite3 (ou no diretório temporário)
+    cache_file_max_entries: int = 100000
+    redis_url: str = "redis://localhost:6379/0"
+    redis_socket_timeout: float = 0.5  # segundos; um Redis lento vira miss, não atraso
+    cache_key_prefix: str = "lancefacil:"
+    # Métricas Prometheus em /metrics (metrics.py)
+    metrics_enabled: bool = True
+    metrics_token: str = ""  # se definido, /metrics exige "Authorization: Bearer <token>"
 
     def __post_init__(self) -> None:
         # Carrega valores do ambiente após dotenv ter sido aplicado
@@ -34,8 +100,79 @@ class Settings:
             self.cookie_max_age = int(os.getenv("COOKIE_MAX_AGE", str(self.cookie_max_age)))
         except Exception:
             pass
+        # backend de dados
+        self.supabase_backend = (os.getenv("SUPABASE_BACKEND", "supabase").strip().lower() or "supabase")
+        try:
+            self.memory_latency_ms = float(os.getenv("MEMORY_LATENCY_MS", str(self.memory_latency_ms)))
+        except Exception:
+            pass
+        self.memory_seed_file = os.getenv("MEMORY_SEED_FILE") or None
+        # transporte HTTP
+        self.supabase_http_mode = os.getenv("SUPABASE_HTTP_MODE", "pooled").strip().lower() or "pooled"
+        self.supabase_http2 = (os.getenv("SUPABASE_HTTP2", "true").lower() == "true")
+        self.breaker_enabled = (os.getenv("BREAKER_ENABLED", "true").lower() == "true")
+        self.server_timing = (os.getenv("SERVER_TIMING", "true").lower() == "true")
+        self.trace_log = (os.getenv("TRACE_LOG", "false").lower() == "true")
+        self.metrics_enabled = (os.getenv("METRICS_ENABLED", "true").lower() == "true")
+        self.metrics_token = os.getenv("METRICS_TOKEN", "").strip()
+        self.cache_backend = os.getenv("CACHE_BACKEND", "memory").strip().lower() or "memory"
+        self.cache_file_path = os.getenv("CACHE_FILE_PATH", "").strip()
+        self.redis_url = os.getenv("REDIS_URL", self.redis_url).strip()
+        self.cache_key_prefix = os.getenv("CACHE_KEY_PREFIX", self.cache_key_prefix)
+        for attr, env, cast in (
+            ("supabase_pool_max_connections", "SUPABASE_POOL_MAX_CONNECTIONS", int),
+            ("supabase_pool_max_keepalive", "SUPABASE_POOL_MAX_KEEPALIVE", int),
+            ("supabase_keepalive_expiry", "SUPABASE_KEEPALIVE_EXPIRY", float),
+            ("supabase_connect_timeout", "SUPABASE_CONNECT_TIMEOUT", float),
+            ("supabase_read_timeout", "SUPABASE_READ_TIMEOUT", float),
+            ("fanout_max_workers", "FANOUT_MAX_WORKERS", int),
+            ("retry_max_delay", "RETRY_MAX_DELAY", float),
+            ("retry_budget_per_request", "RETRY_BUDGET_PER_REQUEST", int),
+            ("breaker_window", "BREAKER_WINDOW", float),
+            ("breaker_min_calls", "BREAKER_MIN_CALLS", int),
+            ("breaker_error_rate", "BREAKER_ERROR_RATE", float),
+            ("breaker_slow_call_ms", "BREAKER_SLOW_CALL_MS", float),
+            ("breaker_slow_rate", "BREAKER_SLOW_RATE", float),
+            ("breaker_open_seconds", "BREAKER_OPEN_SECONDS", float),
+            ("stale_max_entries", "STALE_MAX_ENTRIES", int),
+            ("stale_max_age", "STALE_MAX_AGE", float),
+            ("server_timing_max_entries", "SERVER_TIMING_MAX_ENTRIES", int),
+            ("trace_log_min_ms", "TRACE_LOG_MIN_MS", float),
+            ("categorias_ttl", "CATEGORIAS_TTL", float),
+            ("worker_profile_cache_ttl", "WORKER_PROFILE_CACHE_TTL", float),
+            ("worker_profile_cache_size", "WORKER_PROFILE_CACHE_SIZE", int),
+            ("user_profile_cache_ttl", "USER_PROFILE_CACHE_TTL", float),
+            ("user_profile_cache_size", "USER_PROFILE_CACHE_SIZE", int),
+            ("jwt_cache_size", "JWT_CACHE_SIZE", int),
+            ("jwt_cache_max_ttl", "JWT_CACHE_MAX_TTL", float),
+            ("anuncios_feed_cache_ttl", "ANUNCIOS_FEED_CACHE_TTL", float),
+            ("anuncios_feed_cache_swr", "ANUNCIOS_FEED_CACHE_SWR", float),
+            ("anuncios_feed_cache_size", "ANUNCIOS_FEED_CACHE_SIZE", int),
+            ("anuncios_facetas_cache_ttl", "ANUNCIOS_FACETAS_CACHE_TTL", float),
+            ("anuncios_facetas_cache_swr", "ANUNCIOS_FACETAS_CACHE_SWR", float),
+            ("anuncios_facetas_cache_size", "ANUNCIOS_FACETAS_CACHE_SIZE", int),
+            ("cache_file_max_entries", "CACHE_FILE_MAX_ENTRIES", int),
+            ("cep_cache_ttl", "CEP_CACHE_TTL", float),
+            ("cep_cache_size", "CEP_CACHE_SIZE", int),
+            ("geo_raio_max_km", "GEO_RAIO_MAX_KM", float),
+            ("redis_socket_timeout", "REDIS_SOCKET_TIMEOUT", float),
+        ):
+            try:
+                setattr(self, attr, cast(os.getenv(env, str(getattr(self, attr)))))
+            except Exception:
+                pass
+        if self.use_memory_backend and not self.supabase_jwt_secret:
+            from .memory_client import MEMORY_JWT_SECRET
+            self.supabase_jwt_secret = MEMORY_JWT_SECRET
+
+    @property
+    def use_memory_backend(self) -> bool:
+        return self.supabase_backend == "memory"
 
     def validate(self) -> None:
+        if self.use_memory_backend:
+            # memory_client não precisa de credenciais do Supabase
+            return
         missing = []
         if not self.supabase_url:
             missing.append("SUPABASE_URL")
@@ -0,0 +1,79 @@
+-- Migration: Busca textual em português nos anúncios (GET /api/anuncios?busca=)
+-- Substitui os dois ILIKE sem limite (título e descrição) mesclados em Python
+-- por um tsvector ponderado (título 'A', descrição 'B'), sem acentos, indexado
+-- com GIN. Ranking, filtros e paginação rodam no banco: a função devolve só
+-- os ids da página pedida, com o rank e o total de resultados.
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() é STABLE (depende do dicionário); o wrapper IMMUTABLE com o
+-- dicionário explícito permite usá-lo em índices. NULL vira '' (sem STRICT),
+-- para um anúncio sem descrição não ficar com o documento de busca NULL
+CREATE OR REPLACE FUNCTION f_unaccent(texto TEXT)
+RETURNS TEXT AS $$
+  SELECT public.unaccent('public.unaccent'::regdictionary, coalesce(texto, ''))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Documento de busca do anúncio. É uma expressão indexada, e não uma coluna,
+-- para não aparecer nos `select("*")` da API
+CREATE OR REPLACE FUNCTION anuncios_busca_tsv(titulo TEXT, descricao TEXT)
+RETURNS tsvector AS $$
+  SELECT setweight(to_tsvector('portuguese', f_unaccent(titulo)), 'A')
+      || setweight(to_tsvector('portuguese', f_unaccent(descricao)), 'B')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_anuncios_busca
+ON anuncios USING GIN (anuncios_busca_tsv(titulo, descricao));
+
+-- Página de resultados da busca (mesmos filtros de GET /api/anuncios).
+-- Anúncios direcionados a um profissional nunca entram na lista global.
+-- p_order: 'relevancia' (rank e depois mais recentes), 'recentes' ou 'antigos'.
+-- Sempre devolve ao menos uma linha: com página vazia, id é NULL e total
+-- ainda traz a contagem (ex.: página além do fim).
+CREATE OR REPLACE FUNCTION buscar_anuncios(
+  p_busca        TEXT,
+  p_tipo         TEXT    DEFAULT NULL,
+  p_categoria_id BIGINT  DEFAULT NULL,
+  p_urgencia     TEXT    DEFAULT NULL,
+  p_status       TEXT    DEFAULT NULL,
+  p_order        TEXT    DEFAULT 'relevancia',
+  p_limit        INTEGER DEFAULT 20,
+  p_offset       INTEGER DEFAULT 0
+)
+RETURNS TABLE (id BIGINT, rank REAL, total BIGINT) AS $$
+  WITH consulta AS (
+    SELECT websearch_to_tsquery('portuguese', f_unaccent(p_busca)) AS q
+  ),
+  encontrados AS (
+    SELECT a.id, a.publicado_em,
+           ts_rank_cd(anuncios_busca_tsv(a.titulo, a.descricao), c.q) AS rank
+    FROM anuncios a, consulta c
+    WHERE anuncios_busca_tsv(a.titulo, a.descricao) @@ c.q
+      AND a.profissional_direcionado_id IS NULL
+      AND (p_tipo IS NULL OR a.tipo::TEXT = p_tipo)
+      AND (p_categoria_id IS NULL OR a.categoria_id = p_categoria_id)
+      AND (p_urgencia IS NULL OR a.urgencia::TEXT = p_urgencia)
+      AND (p_status IS NULL OR a.status::TEXT = p_status)
+  )
+  SELECT pagina.id, pagina.rank, contagem.total
+  FROM (SELECT count(*) AS total FROM encontrados) contagem
+  LEFT JOIN LATERAL (
+    SELECT e.id, e.rank, row_number() OVER (
+             ORDER BY
+               CASE WHEN p_order = 'relevancia' THEN e.rank END DESC,
+               CASE WHEN p_order = 'antigos' THEN e.publicado_em END ASC,
+               e.publicado_em DESC,
+               e.id DESC
+           ) AS posicao
+    FROM encontrados e
+    ORDER BY posicao
+    LIMIT greatest(p_limit, 0) OFFSET greatest(p_offset, 0)
+  ) pagina ON TRUE
+  ORDER BY pagina.posicao
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION buscar_anuncios(TEXT, TEXT, BIGINT, TEXT, TEXT, TEXT, INTEGER, INTEGER) TO anon, authenticated, service_role;
+
+COMMIT;
@@ -0,0 +1,120 @@
+-- Migration: Busca aproximada de profissionais (GET /api/profissionais?busca=&localizacao=)
+-- Nome, cidade, descrição do perfil de worker e nomes de categoria passam a
+-- ser comparados sem acentos e sem diferenciar maiúsculas, com trigramas
+-- (pg_trgm): "sao paulo" acha "São Paulo" e "eletrecista" acha "Eletricista".
+-- Cada campo tem um índice GIN de trigramas; a função buscar_profissionais
+-- ordena por similaridade e devolve só os ids da página e o total.
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Mesmo wrapper IMMUTABLE de migration_busca_anuncios.sql (indexável)
+CREATE OR REPLACE FUNCTION f_unaccent(texto TEXT)
+RETURNS TEXT AS $$
+  SELECT public.unaccent('public.unaccent'::regdictionary, coalesce(texto, ''))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Forma de comparação: minúsculas e sem acentos
+CREATE OR REPLACE FUNCTION f_busca_norm(texto TEXT)
+RETURNS TEXT AS $$
+  SELECT lower(f_unaccent(texto))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_usuarios_nome_trgm
+ON usuarios USING GIN (f_busca_norm(nome) gin_trgm_ops) WHERE is_worker;
+
+CREATE INDEX IF NOT EXISTS idx_usuarios_cidade_trgm
+ON usuarios USING GIN (f_busca_norm(endereco_cidade) gin_trgm_ops) WHERE is_worker;
+
+CREATE INDEX IF NOT EXISTS idx_perfil_worker_descricao_trgm
+ON perfil_worker USING GIN (f_busca_norm(descricao) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_categorias_nome_trgm
+ON categorias USING GIN (f_busca_norm(nome) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_worker_categorias_categoria
+ON worker_categorias(categoria_id, user_id);
+
+-- O índice de tsvector do nome nunca foi usado pela API (a busca é por trigramas)
+DROP INDEX IF EXISTS idx_usuarios_nome;
+
+-- Escapa os curingas do LIKE para buscar o texto literalmente
+CREATE OR REPLACE FUNCTION f_like_literal(texto TEXT)
+RETURNS TEXT AS $$
+  SELECT replace(replace(replace(texto, '\', '\\'), '%', '\%'), '_', '\_')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Página de profissionais (usuarios.is_worker) por busca e/ou localização.
+-- p_busca casa com nome, descrição do perfil ou nome de categoria do worker
+-- (similaridade de palavra >= 0.5 ou trecho contido); p_localizacao, com a
+-- cidade. Ordem: maior similaridade, depois nome. Sempre devolve ao menos uma
+-- linha: com página vazia, id é NULL e total ainda traz a contagem.
+CREATE OR REPLACE FUNCTION buscar_profissionais(
+  p_busca         TEXT     DEFAULT NULL,
+  p_localizacao   TEXT     DEFAULT NULL,
+  p_categoria_ids BIGINT[] DEFAULT NULL,
+  p_limit         INTEGER  DEFAULT 20,
+  p_offset        INTEGER  DEFAULT 0
+)
+RETURNS TABLE (id UUID, similaridade REAL, total BIGINT) AS $$
+#variable_conflict use_column
+DECLARE
+  v_busca TEXT := coalesce(f_busca_norm(nullif(trim(p_busca), '')), '');
+  v_local TEXT := coalesce(f_busca_norm(nullif(trim(p_localizacao), '')), '');
+BEGIN
+  RETURN QUERY
+  WITH candidatos AS (
+    -- Candidatos por campo: cada ramo usa o seu índice de trigramas
+    SELECT u.id, word_similarity(v_busca, f_busca_norm(u.nome)) AS sim
+    FROM usuarios u
+    WHERE v_busca <> '' AND u.is_worker
+      AND (v_busca <% f_busca_norm(u.nome) OR f_busca_norm(u.nome) LIKE '%' || f_like_literal(v_busca) || '%')
+    UNION ALL
+    SELECT p.user_id, word_similarity(v_busca, f_busca_norm(p.descricao)) * 0.8
+    FROM perfil_worker p
+    WHERE v_busca <> ''
+      AND (v_busca <% f_busca_norm(p.descricao) OR f_busca_norm(p.descricao) LIKE '%' || f_like_literal(v_busca) || '%')
+    UNION ALL
+    SELECT wc.user_id, word_similarity(v_busca, f_busca_norm(c.nome)) * 0.9
+    FROM categorias c
+    JOIN worker_categorias wc ON wc.categoria_id = c.id
+    WHERE v_busca <> ''
+      AND (v_busca <% f_busca_norm(c.nome) OR f_busca_norm(c.nome) LIKE '%' || f_like_literal(v_busca) || '%')
+  ),
+  por_usuario AS (
+    SELECT c.id, max(c.sim) AS sim FROM candidatos c GROUP BY c.id
+  ),
+  encontrados AS (
+    SELECT u.id, u.nome, coalesce(b.sim, 0)::REAL AS sim
+    FROM usuarios u
+    LEFT JOIN por_usuario b ON b.id = u.id
+    WHERE u.is_worker
+      AND (v_busca = '' OR b.id IS NOT NULL)
+      AND (v_local = ''
+           OR v_local <% f_busca_norm(u.endereco_cidade)
+           OR f_busca_norm(u.endereco_cidade) LIKE '%' || f_like_literal(v_local) || '%')
+      AND (p_categoria_ids IS NULL OR EXISTS (
+             SELECT 1 FROM worker_categorias wc
+             WHERE wc.user_id = u.id AND wc.categoria_id = ANY (p_categoria_ids)))
+  )
+  SELECT pagina.id, pagina.sim, contagem.total
+  FROM (SELECT count(*) AS total FROM encontrados) contagem
+  LEFT JOIN LATERAL (
+    SELECT e.id, e.sim, row_number() OVER (ORDER BY e.sim DESC, e.nome, e.id) AS posicao
+    FROM encontrados e
+    ORDER BY posicao
+    LIMIT greatest(p_limit, 0) OFFSET greatest(p_offset, 0)
+  ) pagina ON TRUE
+  ORDER BY pagina.posicao;
+END
+$$ LANGUAGE plpgsql STABLE
+-- Plano com os termos já substituídos: os ramos de busca/localização vazios
+-- são podados e os filtros de trigramas usam os índices
+SET plan_cache_mode = force_custom_plan
+SET pg_trgm.word_similarity_threshold = 0.5;
+
+GRANT EXECUTE ON FUNCTION buscar_profissionais(TEXT, TEXT, BIGINT[], INTEGER, INTEGER) TO anon, authenticated, service_role;
+
+COMMIT;
@@ -0,0 +1,67 @@
+-- Migration: Contagens por faceta do feed de anúncios (GET /api/anuncios/facetas)
+-- Uma consulta devolve quantos anúncios há por categoria, tipo, urgência e
+-- status para os filtros atuais, no lugar de uma listagem por valor.
+-- Requer migration_busca_anuncios.sql (anuncios_busca_tsv, f_unaccent).
+
+BEGIN;
+
+-- Contagem de cada faceta com todos os filtros, menos o da própria faceta:
+-- com categoria 3 selecionada, a faceta categoria_id ainda mostra quantos
+-- anúncios as outras categorias teriam. A linha ('total', NULL, n) traz o
+-- total com todos os filtros. Como na lista global, anúncios direcionados
+-- a um profissional não entram.
+CREATE OR REPLACE FUNCTION facetas_anuncios(
+  p_busca        TEXT    DEFAULT NULL,
+  p_tipo         TEXT    DEFAULT NULL,
+  p_categoria_id BIGINT  DEFAULT NULL,
+  p_urgencia     TEXT    DEFAULT NULL,
+  p_status       TEXT    DEFAULT NULL
+)
+RETURNS TABLE (faceta TEXT, valor TEXT, total BIGINT) AS $$
+#variable_conflict use_column
+DECLARE
+  v_busca TEXT := nullif(trim(p_busca), '');
+BEGIN
+  RETURN QUERY
+  -- Uma única leitura de anuncios; cada faceta agrega sobre ela
+  WITH base AS MATERIALIZED (
+    SELECT a.tipo::TEXT AS tipo,
+           a.categoria_id::TEXT AS categoria_id,
+           a.urgencia::TEXT AS urgencia,
+           a.status::TEXT AS status,
+           (p_tipo IS NULL OR a.tipo::TEXT = p_tipo) AS ok_tipo,
+           (p_categoria_id IS NULL OR a.categoria_id = p_categoria_id) AS ok_categoria,
+           (p_urgencia IS NULL OR a.urgencia::TEXT = p_urgencia) AS ok_urgencia,
+           (p_status IS NULL OR a.status::TEXT = p_status) AS ok_status
+    FROM anuncios a
+    WHERE a.profissional_direcionado_id IS NULL
+      AND (v_busca IS NULL
+           OR anuncios_busca_tsv(a.titulo, a.descricao) @@ websearch_to_tsquery('portuguese', f_unaccent(v_busca)))
+  )
+  SELECT 'categoria_id'::TEXT, b.categoria_id, count(*)
+  FROM base b WHERE b.ok_tipo AND b.ok_urgencia AND b.ok_status
+  GROUP BY b.categoria_id
+  UNION ALL
+  SELECT 'tipo'::TEXT, b.tipo, count(*)
+  FROM base b WHERE b.ok_categoria AND b.ok_urgencia AND b.ok_status
+  GROUP BY b.tipo
+  UNION ALL
+  SELECT 'urgencia'::TEXT, b.urgencia, count(*)
+  FROM base b WHERE b.urgencia IS NOT NULL AND b.ok_tipo AND b.ok_categoria AND b.ok_status
+  GROUP BY b.urgencia
+  UNION ALL
+  SELECT 'status'::TEXT, b.status, count(*)
+  FROM base b WHERE b.ok_tipo AND b.ok_categoria AND b.ok_urgencia
+  GROUP BY b.status
+  UNION ALL
+  SELECT 'total'::TEXT, NULL::TEXT, count(*)
+  FROM base b WHERE b.ok_tipo AND b.ok_categoria AND b.ok_urgencia AND b.ok_status;
+END
+$$ LANGUAGE plpgsql STABLE
+-- Plano com os filtros já substituídos: sem busca, o teste do tsvector some;
+-- com busca, o índice GIN idx_anuncios_busca é usado
+SET plan_cache_mode = force_custom_plan;
+
+GRANT EXECUTE ON FUNCTION facetas_anuncios(TEXT, TEXT, BIGINT, TEXT, TEXT) TO anon, authenticated, service_role;
+
+COMMIT;
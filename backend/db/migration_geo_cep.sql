@@ -0,0 +1,133 @@
+-- Migration: Busca por raio a partir do CEP (GET /api/geo/*)
+-- cep_faixas guarda, por faixa de CEP, o município e uma coordenada, com a
+-- precisão dela (carregada de um CSV por scripts/carregar_ceps.py).
+-- usuarios e anuncios passam a ter latitude/longitude e geo_precisao,
+-- gravadas pela API junto com o CEP. A distância usa cube/earthdistance (extensões do Postgres,
+-- disponíveis no Supabase) com índices GiST: a caixa que envolve o círculo
+-- (earth_box) vai ao índice e só os candidatos dela têm a distância calculada.
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS cube;
+CREATE EXTENSION IF NOT EXISTS earthdistance;
+
+-- Faixas de CEP (8 dígitos, como inteiro) → município e coordenada.
+-- precisao: 'cep' (coordenada do próprio CEP/logradouro), 'bairro' ou
+-- 'municipio' (centro do município: a amostra db/cep_faixas.csv)
+CREATE TABLE IF NOT EXISTS cep_faixas (
+  cep_inicio  INTEGER PRIMARY KEY,
+  cep_fim     INTEGER NOT NULL,
+  municipio   TEXT NOT NULL,
+  uf          CHAR(2) NOT NULL,
+  ibge_codigo INTEGER,
+  latitude    DOUBLE PRECISION NOT NULL,
+  longitude   DOUBLE PRECISION NOT NULL,
+  precisao    TEXT NOT NULL DEFAULT 'municipio' CHECK (precisao IN ('cep', 'bairro', 'municipio')),
+  CHECK (cep_fim >= cep_inicio)
+);
+
+ALTER TABLE cep_faixas ENABLE ROW LEVEL SECURITY;
+
+-- cep_faixas: leitura pública (dado de referência)
+DROP POLICY IF EXISTS cep_faixas_public_select ON cep_faixas;
+CREATE POLICY cep_faixas_public_select ON cep_faixas
+  FOR SELECT USING (true);
+
+-- Coordenadas gravadas a partir do CEP e a precisão da faixa (NULL quando o
+-- CEP não está na base)
+ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS geo_precisao TEXT;
+
+ALTER TABLE anuncios ADD COLUMN IF NOT EXISTS cep VARCHAR(8);
+ALTER TABLE anuncios ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE anuncios ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+ALTER TABLE anuncios ADD COLUMN IF NOT EXISTS geo_precisao TEXT;
+
+-- Índices espaciais só com as linhas que a busca por raio considera
+CREATE INDEX IF NOT EXISTS idx_usuarios_geo
+ON usuarios USING GIST (ll_to_earth(latitude, longitude))
+WHERE is_worker AND latitude IS NOT NULL AND longitude IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_anuncios_geo
+ON anuncios USING GIST (ll_to_earth(latitude, longitude))
+WHERE profissional_direcionado_id IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL;
+
+-- Profissionais (usuarios.is_worker) a até p_raio_km do ponto, do mais
+-- próximo ao mais distante. p_categoria_ids restringe aos workers com alguma
+-- dessas categorias. Sempre devolve ao menos uma linha: com página vazia, id
+-- é NULL e total ainda traz a contagem.
+CREATE OR REPLACE FUNCTION profissionais_no_raio(
+  p_latitude      DOUBLE PRECISION,
+  p_longitude     DOUBLE PRECISION,
+  p_raio_km       DOUBLE PRECISION,
+  p_categoria_ids BIGINT[] DEFAULT NULL,
+  p_limit         INTEGER  DEFAULT 20,
+  p_offset        INTEGER  DEFAULT 0
+)
+RETURNS TABLE (id UUID, distancia_km DOUBLE PRECISION, total BIGINT) AS $$
+  WITH encontrados AS (
+    SELECT u.id,
+           earth_distance(ll_to_earth(p_latitude, p_longitude), ll_to_earth(u.latitude, u.longitude)) / 1000 AS distancia_km
+    FROM usuarios u
+    WHERE u.is_worker AND u.latitude IS NOT NULL AND u.longitude IS NOT NULL
+      AND earth_box(ll_to_earth(p_latitude, p_longitude), p_raio_km * 1000) @> ll_to_earth(u.latitude, u.longitude)
+      AND earth_distance(ll_to_earth(p_latitude, p_longitude), ll_to_earth(u.latitude, u.longitude)) <= p_raio_km * 1000
+      AND (p_categoria_ids IS NULL OR EXISTS (
+             SELECT 1 FROM worker_categorias wc
+             WHERE wc.user_id = u.id AND wc.categoria_id = ANY (p_categoria_ids)))
+  )
+  SELECT pagina.id, pagina.distancia_km, contagem.total
+  FROM (SELECT count(*) AS total FROM encontrados) contagem
+  LEFT JOIN LATERAL (
+    SELECT e.id, e.distancia_km, row_number() OVER (ORDER BY e.distancia_km, e.id) AS posicao
+    FROM encontrados e
+    ORDER BY posicao
+    LIMIT greatest(p_limit, 0) OFFSET greatest(p_offset, 0)
+  ) pagina ON TRUE
+  ORDER BY pagina.posicao
+$$ LANGUAGE sql STABLE;
+
+-- Anúncios (fora os direcionados) a até p_raio_km do ponto, do mais próximo
+-- ao mais distante; empate: mais recentes primeiro. Mesmos filtros de
+-- GET /api/anuncios e mesmo formato de retorno de profissionais_no_raio.
+CREATE OR REPLACE FUNCTION anuncios_no_raio(
+  p_latitude     DOUBLE PRECISION,
+  p_longitude    DOUBLE PRECISION,
+  p_raio_km      DOUBLE PRECISION,
+  p_tipo         TEXT    DEFAULT NULL,
+  p_categoria_id BIGINT  DEFAULT NULL,
+  p_urgencia     TEXT    DEFAULT NULL,
+  p_status       TEXT    DEFAULT NULL,
+  p_limit        INTEGER DEFAULT 20,
+  p_offset       INTEGER DEFAULT 0
+)
+RETURNS TABLE (id BIGINT, distancia_km DOUBLE PRECISION, total BIGINT) AS $$
+  WITH encontrados AS (
+    SELECT a.id, a.publicado_em,
+           earth_distance(ll_to_earth(p_latitude, p_longitude), ll_to_earth(a.latitude, a.longitude)) / 1000 AS distancia_km
+    FROM anuncios a
+    WHERE a.profissional_direcionado_id IS NULL AND a.latitude IS NOT NULL AND a.longitude IS NOT NULL
+      AND earth_box(ll_to_earth(p_latitude, p_longitude), p_raio_km * 1000) @> ll_to_earth(a.latitude, a.longitude)
+      AND earth_distance(ll_to_earth(p_latitude, p_longitude), ll_to_earth(a.latitude, a.longitude)) <= p_raio_km * 1000
+      AND (p_tipo IS NULL OR a.tipo::TEXT = p_tipo)
+      AND (p_categoria_id IS NULL OR a.categoria_id = p_categoria_id)
+      AND (p_urgencia IS NULL OR a.urgencia::TEXT = p_urgencia)
+      AND (p_status IS NULL OR a.status::TEXT = p_status)
+  )
+  SELECT pagina.id, pagina.distancia_km, contagem.total
+  FROM (SELECT count(*) AS total FROM encontrados) contagem
+  LEFT JOIN LATERAL (
+    SELECT e.id, e.distancia_km,
+           row_number() OVER (ORDER BY e.distancia_km, e.publicado_em DESC, e.id DESC) AS posicao
+    FROM encontrados e
+    ORDER BY posicao
+    LIMIT greatest(p_limit, 0) OFFSET greatest(p_offset, 0)
+  ) pagina ON TRUE
+  ORDER BY pagina.posicao
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION profissionais_no_raio(DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, BIGINT[], INTEGER, INTEGER) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION anuncios_no_raio(DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, TEXT, BIGINT, TEXT, TEXT, INTEGER, INTEGER) TO anon, authenticated, service_role;
+
+COMMIT;
@@ -0,0 +1,160 @@
+"""CEP → município e coordenadas, e distâncias para a busca por raio.
+
+A base é a tabela `cep_faixas` (db/migration_geo_cep.sql): faixas de CEP com o
+município e uma coordenada, carregadas de um CSV por `scripts/carregar_ceps.py`
+(o backend em memória carrega `db/cep_faixas.csv` ao iniciar). A faixa de um
+CEP é a de maior `cep_inicio` <= CEP, se o CEP não passar de `cep_fim`: uma
+leitura pela chave primária, guardada no cache `cep`.
+
+A coluna `precisao` diz de onde vem a coordenada: `cep` (o próprio CEP ou
+logradouro), `bairro` ou `municipio` (centro do município, como em toda a
+amostra de `db/cep_faixas.csv`). Ela é gravada junto com as coordenadas
+(`geo_precisao`) para que as distâncias aproximadas possam ser sinalizadas.
+"""
+from typing import Any, Dict, List, Optional
+import csv
+import math
+import os
+
+from .cache import Cache
+from .config import settings
+from .supabase_client import get_admin_client
+from .utils import execute_with_retry
+
+CEP_CSV = os.path.join(os.path.dirname(__file__), "db", "cep_faixas.csv")
+
+# Raio da Terra usado por earth() do earthdistance, para as distâncias baterem com o SQL
+RAIO_TERRA_KM = 6378.168
+
+# Precisão da coordenada de uma faixa, da mais fina à mais grossa
+PRECISOES = ("cep", "bairro", "municipio")
+
+# Faixa do CEP (ou None: CEP fora da base) por CEP de 8 dígitos
+_ceps = Cache("cep", settings.cep_cache_ttl, settings.cep_cache_size)
+
+_aviso_base_ausente = False
+
+
+def carregar_faixas(caminho: str = CEP_CSV) -> List[Dict[str, Any]]:
+    """Linhas de `cep_faixas` lidas do CSV (cabeçalho com os nomes das colunas).
+
+    A coluna `precisao` é opcional (padrão `municipio`).
+    """
+    faixas = []
+    with open(caminho, newline="", encoding="utf-8") as f:
+        for linha, row in enumerate(csv.DictReader(f), start=2):
+            precisao = (row.get("precisao") or "municipio").strip()
+            if precisao not in PRECISOES:
+                raise ValueError(f"{caminho}:{linha}: precisao '{precisao}' inválida (use {', '.join(PRECISOES)})")
+            faixas.append({
+                "cep_inicio": int(row["cep_inicio"]),
+                "cep_fim": int(row["cep_fim"]),
+                "municipio": row["municipio"],
+                "uf": row["uf"],
+                "ibge_codigo": int(row["ibge_codigo"]) if row.get("ibge_codigo") else None,
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+                "precisao": precisao,
+            })
+    return faixas
+
+
+def normalizar_cep(valor: Any) -> Optional[str]:
+    """Os 8 dígitos do CEP ("01310-100" → "01310100"), ou None se não for um CEP."""
+    digitos = "".join(ch for ch in str(valor or "") if ch.isdigit())
+    return digitos if len(digitos) == 8 else None
+
+
+def _faixa_do_banco(numero: int) -> Optional[Dict[str, Any]]:
+    admin = get_admin_client()
+    linhas = execute_with_retry(
+        lambda: admin.table("cep_faixas")
+            .select("cep_inicio, cep_fim, municipio, uf, latitude, longitude, precisao")
+            .lte("cep_inicio", numero)
+            .order("cep_inicio", desc=True)
+            .limit(1)
+            .execute()
+            .data or [],
+        max_attempts=2,
+        delay=0.2
+    )
+    if linhas and linhas[0].get("cep_fim", -1) >= numero:
+        faixa = linhas[0]
+        return {
+            "municipio": faixa.get("municipio"),
+            "uf": faixa.get("uf"),
+            "latitude": faixa.get("latitude"),
+            "longitude": faixa.get("longitude"),
+            "precisao": faixa.get("precisao") or "municipio",
+        }
+    return None
+
+
+def resolver_cep(cep: Any) -> Optional[Dict[str, Any]]:
+    """{cep, municipio, uf, latitude, longitude, precisao, aproximado} do CEP, ou None se estiver fora da base.
+
+    `aproximado` é verdadeiro quando a coordenada não é a do próprio CEP.
+    Propaga a exceção se a base não puder ser consultada (ex.: migration não
+    aplicada); o "não encontrado" também fica em cache.
+    """
+    cep = normalizar_cep(cep)
+    if not cep:
+        return None
+    achou, faixa = _ceps.get(cep)
+    if not achou:
+        faixa = _faixa_do_banco(int(cep))
+        _ceps.set(cep, faixa)
+    return dict(faixa, cep=cep, aproximado=faixa["precisao"] != "cep") if faixa else None
+
+
+def coordenadas_do_cep(cep: Any) -> Optional[Dict[str, Any]]:
+    """Campos `latitude`/`longitude`/`geo_precisao` a gravar junto com o CEP.
+
+    Campos None quando o CEP não está na base (limpa os antigos), com um aviso
+    no log. Devolve None, para não gravar nada, se a base de CEPs estiver
+    indisponível: sem a migration as colunas também não existem.
+    """
+    global _aviso_base_ausente
+    try:
+        faixa = resolver_cep(cep)
+    except Exception as e:
+        if not _aviso_base_ausente:
+            _aviso_base_ausente = True
+            print(f"[AVISO] Base de CEPs indisponível (aplique db/migration_geo_cep.sql); coordenadas não gravadas: {e}")
+        return None
+    if not faixa:
+        print(f"[AVISO] CEP {normalizar_cep(cep) or cep} fora da base de CEPs; gravado sem coordenadas")
+    return {
+        "latitude": faixa["latitude"] if faixa else None,
+        "longitude": faixa["longitude"] if faixa else None,
+        "geo_precisao": faixa["precisao"] if faixa else None,
+    }
+
+
+def campos_cep(valor: Any) -> Optional[Dict[str, Any]]:
+    """`cep`, `latitude`, `longitude` e `geo_precisao` a gravar para o CEP de um anúncio.
+
+    None se `valor` não for um CEP; vazio se a base de CEPs não estiver
+    disponível, pois sem db/migration_geo_cep.sql as colunas também não existem.
+    """
+    cep = normalizar_cep(valor)
+    if not cep:
+        return None
+    coordenadas = coordenadas_do_cep(cep)
+    return {"cep": cep, **coordenadas} if coordenadas is not None else {}
+
+
+def distancia_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância de círculo máximo (haversine) entre dois pontos, em km."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def caixa(lat: float, lon: float, raio_km: float) -> Dict[str, float]:
+    """Retângulo (lat/lon mínimos e máximos) que contém o círculo de `raio_km`."""
+    dlat = math.degrees(raio_km / RAIO_TERRA_KM)
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, dlat / cos_lat)
+    return {"lat_min": lat - dlat, "lat_max": lat + dlat, "lon_min": lon - dlon, "lon_max": lon + dlon}
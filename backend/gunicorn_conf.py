@@ -0,0 +1,18 @@
+"""Configuração do gunicorn: `gunicorn -c backend/gunicorn_conf.py backend.wsgi:application`.
+
+Com vários workers, as métricas do `/metrics` são agregadas por arquivos em
+`PROMETHEUS_MULTIPROC_DIR` (ver backend/metrics.py). O diretório precisa
+existir e ser esvaziado a cada deploy, antes de o gunicorn subir.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+
+def child_exit(server, worker):
+    # Descarta os gauges "live" (requisições em andamento) do worker encerrado
+    from backend.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -0,0 +1,374 @@
+"""Consultas, filtros, mesclagem e paginação das listagens (anúncios, profissionais, conversas).
+
+Compartilhados pelas rotas Flask e pelos handlers assíncronos de
+`routes_async`, para que os dois modos devolvam o mesmo JSON.
+"""
+from typing import Any, Dict, List
+
+from .cache import SWRCache
+from .config import settings
+from .supabase_client import get_admin_client
+from .utils import execute_with_retry, paginate_params
+
+
+# -------------------- GET /api/anuncios --------------------
+# Campos do dono embutidos em cada anúncio (mesmos do relacionamento usuarios!anuncios_usuario_id_fkey)
+DONO_CAMPOS = ("nome", "foto_url", "email_verificado")
+
+
+def select_anuncio_query(client=None):
+    # No Supabase, para relacionamentos via foreign key, a sintaxe padrão é: tabela_relacionada(campos)
+    # Como agora temos duas foreign keys para usuarios (usuario_id e profissional_direcionado_id),
+    # precisamos especificar explicitamente qual usar com a sintaxe: tabela!foreign_key_name(campos)
+    # Usamos anuncios_usuario_id_fkey para buscar o dono do anúncio
+    # IMPORTANTE: Incluir profissional_direcionado_id explicitamente para poder filtrar anúncios direcionados
+    return (
+        (client or get_admin_client())
+        .table("anuncios")
+        .select("*, categorias(nome, icone), usuarios!anuncios_usuario_id_fkey(nome, foto_url, email_verificado), profissional_direcionado_id")
+    )
+
+
+def filtros_listagem_anuncios(args) -> Dict[str, Any]:
+    busca = args.get("busca")
+    return {
+        "tipo": args.get("tipo"),
+        "categoria_id": args.get("categoria_id"),
+        "busca": busca,
+        "urgencia": args.get("urgencia"),
+        "status": args.get("status"),
+        # Com busca, o padrão é a relevância (ver routes_anuncios._buscar_anuncios)
+        "order": args.get("order") or ("relevancia" if busca else "recentes"),
+    }
+
+
+def params_filtros_anuncios(filtros: Dict[str, Any]) -> Dict[str, Any]:
+    """Filtros da listagem como parâmetros das RPCs (inválidos são ignorados, como em `aplicar_filtros_anuncios`)."""
+    categoria_id = filtros["categoria_id"]
+    return {
+        "p_tipo": filtros["tipo"] if filtros["tipo"] in ("oferta", "oportunidade") else None,
+        "p_categoria_id": int(categoria_id) if categoria_id and categoria_id.isdigit() else None,
+        "p_urgencia": filtros["urgencia"] if filtros["urgencia"] in ("normal", "alta") else None,
+        "p_status": filtros["status"] if filtros["status"] in ("disponivel", "fechado", "cancelado") else None,
+    }
+
+
+# Páginas do feed público (GET /api/anuncios sem login) por filtros normalizados.
+# Escritas neste processo limpam o cache; nos demais valem o TTL e a revalidação.
+feed_anuncios = SWRCache(
+    "anuncios_feed",
+    settings.anuncios_feed_cache_size,
+    settings.anuncios_feed_cache_ttl,
+    settings.anuncios_feed_cache_swr,
+)
+
+
+def chave_feed_anuncios(filtros: Dict[str, Any], args) -> tuple:
+    """Chave do feed público: só os valores que mudam a query (inválidos viram None)."""
+    page = paginate_params(args)
+    categoria_id = filtros["categoria_id"]
+    busca = filtros["busca"]
+    return (
+        filtros["tipo"] if filtros["tipo"] in ("oferta", "oportunidade") else None,
+        int(categoria_id) if categoria_id and categoria_id.isdigit() else None,
+        filtros["urgencia"] if filtros["urgencia"] in ("normal", "alta") else None,
+        filtros["status"] if filtros["status"] in ("disponivel", "fechado", "cancelado") else None,
+        filtros["order"] if filtros["order"] in ("recentes", "antigos", "relevancia") else None,
+        page["page"],
+        page["page_size"],
+        busca.lower() if busca else None,  # a busca ignora maiúsculas
+    )
+
+
+def aplicar_filtros_anuncios(q, filtros: Dict[str, Any]):
+    # Filtrar anúncios direcionados: NÃO mostrar anúncios direcionados na lista global
+    # Anúncios direcionados aparecem apenas na aba "Propostas Recebidas" do profissional direcionado
+    # Mostrar apenas anúncios gerais (profissional_direcionado_id é NULL)
+    # Tentar filtrar na query; se não funcionar, filtrar em Python depois
+    try:
+        q = q.is_("profissional_direcionado_id", "null")
+    except:
+        pass  # Se o método não existir, filtrar em Python depois
+
+    tipo = filtros.get("tipo")
+    categoria_id = filtros.get("categoria_id")
+    urgencia = filtros.get("urgencia")
+    status = filtros.get("status")
+    if tipo in ("oferta", "oportunidade"):
+        q = q.eq("tipo", tipo)
+    if categoria_id and categoria_id.isdigit():
+        q = q.eq("categoria_id", int(categoria_id))
+    if urgencia in ("normal", "alta"):
+        q = q.eq("urgencia", urgencia)
+    if status in ("disponivel", "fechado", "cancelado"):
+        q = q.eq("status", status)
+    return q
+
+
+def ordenar_query_anuncios(q, order: str):
+    if order == "recentes":
+        q = q.order("publicado_em", desc=True)
+    elif order == "antigos":
+        q = q.order("publicado_em", desc=False)
+    return q
+
+
+def sem_direcionados(items):
+    # Filtrar anúncios direcionados: NÃO mostrar anúncios direcionados na lista global
+    # (fallback caso o filtro na query não tenha funcionado)
+    return [a for a in items if not a.get("profissional_direcionado_id")]
+
+
+def mesclar_busca_anuncios(by_title, by_desc, order: str):
+    seen = set()
+    merged = []
+    for it in by_title + by_desc:
+        if it["id"] not in seen:
+            seen.add(it["id"])
+            merged.append(it)
+    merged = sem_direcionados(merged)
+
+    # ordenar (id desempata, para as páginas não mudarem entre requisições)
+    def recencia(x):
+        return (x.get("publicado_em") or "", x.get("id") or 0)
+
+    if order == "antigos":
+        merged.sort(key=recencia)
+    elif order == "relevancia":
+        # Sem o ranking do banco (migration não aplicada): quem casou no
+        # título vem antes, e em cada grupo os mais recentes primeiro
+        no_titulo = {it["id"] for it in by_title}
+        merged.sort(key=lambda x: (x["id"] in no_titulo, *recencia(x)), reverse=True)
+    else:
+        merged.sort(key=recencia, reverse=True)
+    return merged
+
+
+def pagina_busca_anuncios(merged, args) -> Dict[str, Any]:
+    # Paginação simples via query params
+    page = paginate_params(args)
+    start = page["offset"]
+    end = start + page["limit"]
+    return {"items": merged[start:end], "total": len(merged), **page}
+
+
+# Busca textual no banco: db/migration_busca_anuncios.sql (função buscar_anuncios)
+MIGRATION_BUSCA_ANUNCIOS = "migration_busca_anuncios.sql"
+
+
+def params_busca_anuncios(filtros: Dict[str, Any], page: Dict[str, int]) -> Dict[str, Any]:
+    """Parâmetros da RPC `buscar_anuncios`."""
+    return {
+        "p_busca": filtros["busca"],
+        **params_filtros_anuncios(filtros),
+        "p_order": filtros["order"] if filtros["order"] in ("recentes", "antigos") else "relevancia",
+        "p_limit": page["limit"],
+        "p_offset": page["offset"],
+    }
+
+
+# -------------------- GET /api/profissionais --------------------
+def filtros_profissionais(args) -> Dict[str, str]:
+    return {
+        "busca": (args.get("busca") or "").strip().lower(),
+        "categoria": (args.get("categoria") or "").strip(),
+        "localizacao": (args.get("localizacao") or "").strip().lower(),
+    }
+
+
+def _padrao_like(texto: str) -> str:
+    """`%texto%` para `ilike`, com os curingas do LIKE escapados (busca literal)."""
+    escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+
+def query_profissionais(admin, filtros: Dict[str, str], cat_ids: List[int], page_params: Dict[str, int]):
+    """Página de profissionais: filtros, ordenação e paginação no banco, com o total exato.
+
+    A categoria filtra por um join com `worker_categorias` (`!inner` sem colunas:
+    só restringe, não entra no JSON), sem trazer a lista de ids para o Python.
+    """
+    colunas = "*, worker_categorias!inner()" if cat_ids else "*"
+    q = admin.table("usuarios").select(colunas, count="exact").eq("is_worker", True)
+    if cat_ids:
+        q = q.in_("worker_categorias.categoria_id", cat_ids)
+    if filtros["busca"]:
+        q = q.ilike("nome", _padrao_like(filtros["busca"]))
+    if filtros["localizacao"]:
+        q = q.ilike("endereco_cidade", _padrao_like(filtros["localizacao"]))
+    start = page_params["offset"]
+    return q.order("nome").order("id").range(start, start + page_params["limit"] - 1)
+
+
+# Busca aproximada no banco: db/migration_busca_profissionais.sql (função buscar_profissionais)
+MIGRATION_BUSCA_PROFISSIONAIS = "migration_busca_profissionais.sql"
+
+
+def params_busca_profissionais(filtros: Dict[str, str], cat_ids: List[int], page_params: Dict[str, int]) -> Dict[str, Any]:
+    """Parâmetros da RPC `buscar_profissionais` (sem acentos e por similaridade, ver a migration)."""
+    return {
+        "p_busca": filtros["busca"] or None,
+        "p_localizacao": filtros["localizacao"] or None,
+        "p_categoria_ids": cat_ids or None,
+        "p_limit": page_params["limit"],
+        "p_offset": page_params["offset"],
+    }
+
+
+def agrupar_contratacoes(contratacoes: List[Dict[str, Any]]):
+    """Devolve (estatisticas_map, prof_por_contratacao) a partir das contratações."""
+    # Agrupar por profissional
+    contratacoes_por_prof: Dict[str, List[Dict[str, Any]]] = {}
+    prof_por_contratacao: Dict[Any, str] = {}
+    for c in contratacoes:
+        prof_id = c.get("usuario_id_contratado")
+        if prof_id:
+            contratacoes_por_prof.setdefault(prof_id, []).append(c)
+            if c.get("id"):
+                prof_por_contratacao[c["id"]] = prof_id
+
+    # Calcular estatísticas
+    estatisticas_map: Dict[str, Dict[str, Any]] = {}
+    for prof_id, conts in contratacoes_por_prof.items():
+        estatisticas_map[prof_id] = {
+            "total_contratacoes": len(conts),
+            "projetos_concluidos": len([c for c in conts if c.get("status") == "concluido"])
+        }
+    return estatisticas_map, prof_por_contratacao
+
+
+def medias_avaliacoes(avaliacoes: List[Dict[str, Any]], prof_por_contratacao: Dict[Any, str]) -> Dict[str, Dict[str, Any]]:
+    # Agrupar avaliações por profissional
+    notas_por_prof: Dict[str, List[int]] = {}
+    for av in avaliacoes:
+        prof_id = prof_por_contratacao.get(av.get("contratacao_id"))
+        nota = av.get("nota")
+        if prof_id and nota:
+            notas_por_prof.setdefault(prof_id, []).append(nota)
+
+    # Calcular médias
+    avaliacoes_map: Dict[str, Dict[str, Any]] = {}
+    for prof_id, notas in notas_por_prof.items():
+        if notas:
+            avaliacoes_map[prof_id] = {
+                "media": round(sum(notas) / len(notas), 2),
+                "total": len(notas)
+            }
+    return avaliacoes_map
+
+
+def avaliacoes_e_estatisticas(admin, user_ids: List[str]):
+    """Busca contratações e avaliações em lote e devolve (avaliacoes_map, estatisticas_map)."""
+    avaliacoes_map: Dict[str, Dict[str, Any]] = {}
+    estatisticas_map: Dict[str, Dict[str, Any]] = {}
+    try:
+        # Buscar todas as contratações de uma vez
+        contratacoes = execute_with_retry(
+            lambda: admin.table("contratacoes")
+                .select("id, usuario_id_contratado, status")
+                .in_("usuario_id_contratado", user_ids)
+                .execute()
+                .data or [],
+            max_attempts=2,
+            delay=0.2
+        )
+        estatisticas_map, prof_por_contratacao = agrupar_contratacoes(contratacoes)
+
+        # Buscar avaliações
+        if contratacoes:
+            cids = list(prof_por_contratacao.keys())
+            avaliacoes = execute_with_retry(
+                lambda: admin.table("avaliacoes")
+                    .select("contratacao_id, nota")
+                    .in_("contratacao_id", cids)
+                    .execute()
+                    .data or [],
+                max_attempts=2,
+                delay=0.2
+            )
+            avaliacoes_map = medias_avaliacoes(avaliacoes, prof_por_contratacao)
+    except Exception as e:
+        import traceback
+        print(f"[AVISO] Erro ao buscar avaliações/estatísticas em lote: {e}")
+        traceback.print_exc()
+    return avaliacoes_map, estatisticas_map
+
+
+def montar_listagem_profissionais(
+    rows: List[Dict[str, Any]],
+    total: int,
+    worker_profiles_map: Dict[str, Dict[str, Any]],
+    avaliacoes_map: Dict[str, Dict[str, Any]],
+    estatisticas_map: Dict[str, Dict[str, Any]],
+    page_params: Dict[str, int],
+) -> Dict[str, Any]:
+    # Montar resposta (a página já vem paginada do banco)
+    out: List[Dict[str, Any]] = []
+    for p in rows:
+        prof_id = p.get("id")
+        # Adicionar perfil worker
+        p["perfil_worker"] = worker_profiles_map.get(prof_id, {})
+        # Adicionar avaliações
+        if prof_id in avaliacoes_map:
+            p["avaliacoes"] = avaliacoes_map[prof_id]
+        else:
+            p["avaliacoes"] = {"media": 0, "total": 0}
+        # Adicionar estatísticas
+        if prof_id in estatisticas_map:
+            p["estatisticas"] = estatisticas_map[prof_id]
+        else:
+            p["estatisticas"] = {"total_contratacoes": 0, "projetos_concluidos": 0}
+        out.append(p)
+
+    return {
+        "items": out,
+        "total": total,
+        "page": page_params["page"],
+        "page_size": page_params["page_size"]
+    }
+
+
+# -------------------- GET /api/conversas --------------------
+_LOTE_MENSAGENS = 30
+
+
+def query_conversas(admin, coluna: str, user_id: str):
+    return admin.table("conversas").select("*").eq(coluna, user_id)
+
+
+def query_mensagens_lote(admin, batch_ids):
+    # Buscar todas as mensagens do lote ordenadas por data
+    return admin.table("mensagens") \
+        .select("conversa_id, enviada_em") \
+        .in_("conversa_id", batch_ids) \
+        .order("enviada_em", desc=True)
+
+
+def lotes_conversas(conversa_ids):
+    # Processar em lotes para evitar queries muito grandes
+    return {
+        str(i): conversa_ids[i:i + _LOTE_MENSAGENS]
+        for i in range(0, len(conversa_ids), _LOTE_MENSAGENS)
+    }
+
+
+def ordenar_conversas(conversas_list, mensagens_por_lote):
+    """Ordena pela última mensagem (ou data de criação), mais recentes primeiro."""
+    # Agrupar por conversa_id e pegar a primeira (mais recente) de cada uma
+    ultimas_mensagens = {}
+    for mensagens in mensagens_por_lote:
+        for msg in mensagens:
+            conv_id = msg.get("conversa_id")
+            if conv_id and conv_id not in ultimas_mensagens:
+                ultimas_mensagens[conv_id] = msg.get("enviada_em")
+
+    def get_sort_key(conv):
+        conv_id = conv.get("id")
+        # Priorizar última mensagem, senão usar data de criação
+        ultima_msg_time = ultimas_mensagens.get(conv_id)
+        if ultima_msg_time:
+            return ultima_msg_time
+        return conv.get("criado_em", "")
+
+    conversas_list.sort(key=get_sort_key, reverse=True)
+    return conversas_list
@@ -0,0 +1,138 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from flask import g, has_app_context
+
+from .supabase_client import get_admin_client
+
+
+# Colunas de `usuarios` que as rotas embutem como dados do dono/perfil.
+# O loader sempre busca a união delas; cada chamada projeta só o que precisa.
+USUARIO_CAMPOS = ("id", "nome", "email", "foto_url", "email_verificado")
+
+
+class UsuarioLoader:
+    """Carregador em lote (estilo DataLoader) de linhas de `usuarios`.
+
+    Acumula os ids pedidos durante a requisição e resolve todos os que ainda
+    não estão em memória com uma única query `.in_("id", ...)`, em vez de um
+    `.single()` por item. Com um `AsyncClient` use `aload_many`/`afill`.
+    """
+
+    def __init__(self, admin_client=None):
+        self._admin = admin_client
+        self._cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def _client(self):
+        if self._admin is None:
+            self._admin = get_admin_client()
+        return self._admin
+
+    def load_many(self, ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """Retorna {id: linha} para os ids informados (ids inexistentes ficam de fora)."""
+        ids = list(ids)
+        wanted = self._missing(ids)
+        if wanted:
+            from .utils import execute_with_retry
+            try:
+                rows = execute_with_retry(
+                    lambda: self._query(wanted).execute().data or [],
+                    max_attempts=3,
+                    delay=0.3
+                )
+            except Exception as e:
+                print(f"[AVISO] Erro ao buscar usuários em lote: {e}")
+                rows = None
+            self._store(wanted, rows)
+        return self._collect(ids)
+
+    async def aload_many(self, ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """`load_many` para o modo ASGI (o loader deve ter sido criado com um AsyncClient)."""
+        ids = list(ids)
+        wanted = self._missing(ids)
+        if wanted:
+            from .utils import aexecute_with_retry
+
+            async def run():
+                return (await self._query(wanted).execute()).data or []
+
+            try:
+                rows = await aexecute_with_retry(run, max_attempts=3, delay=0.3)
+            except Exception as e:
+                print(f"[AVISO] Erro ao buscar usuários em lote: {e}")
+                rows = None
+            self._store(wanted, rows)
+        return self._collect(ids)
+
+    def _missing(self, ids: List[Any]) -> List[str]:
+        # dict.fromkeys: sem repetidos e na ordem em que apareceram
+        return list(dict.fromkeys(uid for uid in ids if uid and uid not in self._cache))
+
+    def _query(self, wanted: List[str]):
+        return self._client().table("usuarios").select(", ".join(USUARIO_CAMPOS)).in_("id", wanted)
+
+    def _store(self, wanted: List[str], rows: Optional[List[Dict[str, Any]]]) -> None:
+        if rows is None:
+            return
+        for uid in wanted:
+            self._cache[uid] = None
+        for row in rows:
+            if row.get("id"):
+                self._cache[row["id"]] = row
+
+    def _collect(self, ids: List[Any]) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for uid in ids:
+            row = self._cache.get(uid)
+            if row:
+                out[uid] = row
+        return out
+
+    def load(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        return self.load_many([user_id]).get(user_id)
+
+    def fill(
+        self,
+        items: Sequence[Dict[str, Any]],
+        id_key: str,
+        target_key: str,
+        campos: Sequence[str],
+    ) -> None:
+        """Preenche `item[target_key]` com os `campos` do usuário `item[id_key]`
+        em todos os itens onde o relacionamento veio vazio do PostgREST."""
+        pending = self._pending(items, id_key, target_key)
+        if pending:
+            self._apply(pending, self.load_many([it[id_key] for it in pending]), id_key, target_key, campos)
+
+    async def afill(
+        self,
+        items: Sequence[Dict[str, Any]],
+        id_key: str,
+        target_key: str,
+        campos: Sequence[str],
+    ) -> None:
+        """`fill` para o modo ASGI."""
+        pending = self._pending(items, id_key, target_key)
+        if pending:
+            self._apply(pending, await self.aload_many([it[id_key] for it in pending]), id_key, target_key, campos)
+
+    @staticmethod
+    def _pending(items: Sequence[Dict[str, Any]], id_key: str, target_key: str) -> List[Dict[str, Any]]:
+        return [it for it in items if it and not it.get(target_key) and it.get(id_key)]
+
+    @staticmethod
+    def _apply(pending, rows, id_key: str, target_key: str, campos: Sequence[str]) -> None:
+        for it in pending:
+            row = rows.get(it[id_key])
+            if row:
+                it[target_key] = {c: row.get(c) for c in campos}
+
+
+def get_usuario_loader() -> UsuarioLoader:
+    """Loader compartilhado pela requisição atual (um novo fora de contexto Flask)."""
+    if not has_app_context():
+        return UsuarioLoader()
+    loader = g.get("usuario_loader")
+    if loader is None:
+        loader = UsuarioLoader()
+        g.usuario_loader = loader
+    return loader
@@ -0,0 +1,914 @@
+"""Cliente Supabase em memória (substituto do PostgREST/Storage/Auth).
+
+Implementa apenas o subconjunto da API do supabase-py que as rotas usam, para
+rodar o app inteiro (`app.create_app()`) sem um projeto Supabase: benchmarks
+locais, testes e desenvolvimento offline. Selecionado com
+`SUPABASE_BACKEND=memory` (ver `config.Settings`). `as_async()` expõe os
+mesmos dados com a API do `AsyncClient`, usada pelo modo ASGI (`asgi.py`).
+
+A latência de cada chamada é configurável (`MEMORY_LATENCY_MS` ou
+`set_latency()`), para reproduzir o custo de round trip de produção.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import contextlib
+import copy
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import jwt
+from postgrest.exceptions import APIError
+
+
+# Segredo HS256 padrão do backend em memória (>= 32 bytes, exigência do PyJWT)
+MEMORY_JWT_SECRET = "memory-backend-jwt-secret-somente-local"
+
+# Colunas com FK por tabela: {tabela: {coluna: tabela_referenciada}}.
+# Usadas para resolver relacionamentos embutidos no select (ex.: "categorias(nome)").
+FOREIGN_KEYS: Dict[str, Dict[str, str]] = {
+    "anuncios": {
+        "usuario_id": "usuarios",
+        "categoria_id": "categorias",
+        "profissional_direcionado_id": "usuarios",
+    },
+    "propostas": {"anuncio_id": "anuncios", "usuario_id_worker": "usuarios"},
+    "contratacoes": {
+        "anuncio_id": "anuncios",
+        "proposta_id": "propostas",
+        "usuario_id_contratado": "usuarios",
+    },
+    "avaliacoes": {"contratacao_id": "contratacoes", "avaliador_id": "usuarios"},
+    "conversas": {"usuario_a_id": "usuarios", "usuario_b_id": "usuarios"},
+    "mensagens": {"conversa_id": "conversas", "remetente_id": "usuarios"},
+    "perfil_worker": {"user_id": "usuarios"},
+    "worker_categorias": {"user_id": "usuarios", "categoria_id": "categorias"},
+    "worker_portfolio": {"user_id": "usuarios"},
+}
+
+# Restrições UNIQUE relevantes para o comportamento das rotas (erro 23505 / upsert)
+UNIQUE_KEYS: Dict[str, List[Tuple[str, ...]]] = {
+    "usuarios": [("id",), ("cpf",)],
+    "categorias": [("slug",)],
+    "propostas": [("anuncio_id", "usuario_id_worker")],
+    "perfil_worker": [("user_id",)],
+    "cep_faixas": [("cep_inicio",)],
+}
+
+# Tabelas cujo id é gerado pelo banco (BIGSERIAL)
+SERIAL_TABLES = {
+    "categorias", "anuncios", "propostas", "contratacoes", "avaliacoes",
+    "conversas", "mensagens", "worker_portfolio",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Valores default das colunas (equivalente aos DEFAULT do schema.sql)
+DEFAULTS: Dict[str, Dict[str, Callable[[], Any]]] = {
+    "usuarios": {
+        "is_worker": lambda: False,
+        "email_verificado": lambda: False,
+        "perfil_worker": dict,
+        "preferencias": dict,
+        "criado_em": _now,
+        "atualizado_em": _now,
+    },
+    "anuncios": {
+        "status": lambda: "disponivel",
+        "imagens": list,
+        "requisitos": list,
+        "publicado_em": _now,
+        "profissional_direcionado_id": lambda: None,
+    },
+    "propostas": {"status": lambda: "enviada", "criada_em": _now},
+    "contratacoes": {"status": lambda: "solicitado", "data_contratacao": _now},
+    "avaliacoes": {"criado_em": _now},
+    "conversas": {"criado_em": _now},
+    "mensagens": {"lida": lambda: False, "enviada_em": _now},
+    "worker_portfolio": {"criado_em": _now},
+}
+
+
+class MemoryResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _norm(value: Any) -> str:
+    """Normaliza um valor como o PostgREST o veria na querystring."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _compare(a: Any, b: Any) -> int:
+    na, nb = _as_number(a), _as_number(b)
+    if na is not None and nb is not None:
+        return (na > nb) - (na < nb)
+    sa, sb = _norm(a), _norm(b)
+    return (sa > sb) - (sa < sb)
+
+
+def _like_regex(pattern: str, flags: int = 0):
+    out = []
+    escaped = False
+    for ch in str(pattern):
+        if escaped:
+            out.append(re.escape(ch))
+            escaped = False
+        elif ch == "\\":
+            escaped = True  # ESCAPE padrão do LIKE no Postgres
+        elif ch in ("%", "*"):
+            out.append(".*")
+        elif ch == "_":
+            out.append(".")
+        else:
+            out.append(re.escape(ch))
+    return re.compile("^" + "".join(out) + "$", flags | re.DOTALL)
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Divide por vírgulas que não estão dentro de parênteses."""
+    parts, depth, buf = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(buf).strip())
+            buf = []
+        else:
+            buf.append(ch)
+    if "".join(buf).strip():
+        parts.append("".join(buf).strip())
+    return parts
+
+
+def _parse_select(columns: str) -> List[Tuple[str, Optional[str], Optional[List]]]:
+    """Converte "*, categorias(nome), usuarios!fk(nome)" em
+    [(coluna|tabela, hint, subcampos|None)]. `tabela!inner()` (subcampos
+    vazios) só filtra: não aparece no resultado."""
+    out = []
+    for part in _split_top_level(columns or "*"):
+        if "(" in part and part.endswith(")"):
+            head, inner = part.split("(", 1)
+            head = head.strip()
+            hint = None
+            if "!" in head:
+                head, hint = head.split("!", 1)
+            sub = _parse_select(inner[:-1]) if inner[:-1].strip() else []
+            out.append((head.strip(), hint.strip() if hint else None, sub))
+        else:
+            out.append((part.strip(), None, None))
+    return out
+
+
+def _row_filter(op: str, column: str, value: Any) -> Callable[[Dict[str, Any]], bool]:
+    if op == "eq":
+        return lambda r: _norm(r.get(column)) == _norm(value)
+    if op == "neq":
+        return lambda r: _norm(r.get(column)) != _norm(value)
+    if op in ("gt", "gte", "lt", "lte"):
+        def cmp(r):
+            v = r.get(column)
+            if v is None:
+                return False
+            c = _compare(v, value)
+            return {"gt": c > 0, "gte": c >= 0, "lt": c < 0, "lte": c <= 0}[op]
+        return cmp
+    if op in ("like", "ilike"):
+        rx = _like_regex(value, re.IGNORECASE if op == "ilike" else 0)
+        return lambda r: r.get(column) is not None and bool(rx.match(str(r.get(column))))
+    if op == "in":
+        values = {_norm(v) for v in value}
+        return lambda r: _norm(r.get(column)) in values
+    if op == "is":
+        target = _norm(value).lower()
+        if target == "null":
+            return lambda r: r.get(column) is None
+        return lambda r: _norm(r.get(column)) == target
+    raise APIError({"message": f"operador não suportado: {op}", "code": "PGRST100"})
+
+
+def _parse_or(expression: str) -> List[Callable[[Dict[str, Any]], bool]]:
+    """Interpreta a sintaxe do PostgREST usada em `.or_()` (ex.: "slug.eq.x,nome.ilike.*y*")."""
+    filters = []
+    for cond in _split_top_level(expression):
+        column, op, value = cond.split(".", 2)
+        negate = False
+        if op == "not":
+            negate = True
+            op, value = value.split(".", 1)
+        if op == "in":
+            value = [v.strip().strip('"') for v in value.strip("()").split(",") if v.strip()]
+        f = _row_filter(op, column, value)
+        filters.append((lambda f: (lambda r: not f(r)))(f) if negate else f)
+    return filters
+
+
+class MemoryDatabase:
+    """Tabelas em memória protegidas por um lock (compartilhadas entre threads)."""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.sequences: Dict[str, int] = {}
+        self.lock = threading.RLock()
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def _prepare(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = copy.deepcopy(row)
+        for col, factory in DEFAULTS.get(table, {}).items():
+            if col not in row:
+                row[col] = factory()
+        if table in SERIAL_TABLES and row.get("id") is None:
+            self.sequences[table] = self.sequences.get(table, 0) + 1
+            row["id"] = self.sequences[table]
+        elif table in SERIAL_TABLES:
+            self.sequences[table] = max(self.sequences.get(table, 0), int(row["id"]))
+        if table == "conversas":
+            a, b = row.get("usuario_a_id"), row.get("usuario_b_id")
+            row["usuarios_pair"] = "|".join(sorted([str(a), str(b)]))
+        return row
+
+    def _conflict(self, table: str, row: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        if any(row.get(k) is None for k in keys):
+            return None
+        for existing in self.rows(table):
+            if all(_norm(existing.get(k)) == _norm(row.get(k)) for k in keys):
+                return existing
+        return None
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self.lock:
+            prepared = [self._prepare(table, r) for r in rows]
+            uniques = list(UNIQUE_KEYS.get(table, []))
+            if table == "conversas":
+                uniques.append(("usuarios_pair",))
+            for row in prepared:
+                for keys in uniques:
+                    if self._conflict(table, row, keys):
+                        raise APIError({
+                            "message": f'duplicate key value violates unique constraint "{table}_{"_".join(keys)}_key"',
+                            "code": "23505",
+                            "details": f"Key ({', '.join(keys)}) already exists.",
+                            "hint": None,
+                        })
+            self.rows(table).extend(prepared)
+            return copy.deepcopy(prepared)
+
+    def upsert(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str]) -> List[Dict[str, Any]]:
+        keys = tuple(k.strip() for k in (on_conflict or "id").split(","))
+        out = []
+        with self.lock:
+            for row in rows:
+                existing = self._conflict(table, row, keys)
+                if existing is not None:
+                    existing.update(copy.deepcopy(row))
+                    out.append(copy.deepcopy(existing))
+                else:
+                    out.extend(self.insert(table, [row]))
+        return out
+
+    def seed(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        """Carga direta, sem checar UNIQUE (massas de dados para benchmark)."""
+        with self.lock:
+            self.rows(table).extend(self._prepare(table, r) for r in rows)
+
+
+class MemoryQueryBuilder:
+    """Builder encadeável no formato do postgrest-py (`select().eq().order()...`)."""
+
+    def __init__(self, client: "MemorySupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        # Filtros em recurso embutido ("tabela.coluna"), por tabela embutida
+        self._embedded_filters: Dict[str, List[Callable[[Dict[str, Any]], bool]]] = {}
+        self._orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single = False
+        self._maybe_single = False
+        self._source: Optional[Callable[[], List[Dict[str, Any]]]] = None
+
+    # ---- operações ----
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None):
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        return self
+
+    def insert(self, payload, count=None, returning=None, upsert=False, default_to_null=True):
+        self._op = "insert"
+        self._payload = payload
+        return self
+
+    def upsert(self, payload, count=None, returning=None, ignore_duplicates=False, on_conflict="", default_to_null=True):
+        self._op = "upsert"
+        self._payload = payload
+        self._on_conflict = on_conflict or None
+        return self
+
+    def update(self, payload, count=None, returning=None):
+        self._op = "update"
+        self._payload = payload
+        return self
+
+    def delete(self, count=None, returning=None):
+        self._op = "delete"
+        return self
+
+    # ---- filtros ----
+    def _add(self, op: str, column: str, value: Any):
+        if "." in column:
+            target, column = column.split(".", 1)
+            self._embedded_filters.setdefault(target, []).append(_row_filter(op, column, value))
+            return self
+        self._filters.append(_row_filter(op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._add("eq", column, value)
+
+    def neq(self, column, value):
+        return self._add("neq", column, value)
+
+    def gt(self, column, value):
+        return self._add("gt", column, value)
+
+    def gte(self, column, value):
+        return self._add("gte", column, value)
+
+    def lt(self, column, value):
+        return self._add("lt", column, value)
+
+    def lte(self, column, value):
+        return self._add("lte", column, value)
+
+    def like(self, column, pattern):
+        return self._add("like", column, pattern)
+
+    def ilike(self, column, pattern):
+        return self._add("ilike", column, pattern)
+
+    def in_(self, column, values):
+        return self._add("in", column, list(values))
+
+    def is_(self, column, value):
+        return self._add("is", column, value)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        conds = _parse_or(filters)
+        self._filters.append(lambda r: any(c(r) for c in conds))
+        return self
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None, foreign_table=None):
+        self._orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, *, foreign_table=None):
+        self._limit = size
+        return self
+
+    def offset(self, size: int):
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, foreign_table=None):
+        self._offset = start
+        self._limit = max(end - start + 1, 0)
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._maybe_single = True
+        return self
+
+    # ---- execução ----
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(f(row) for f in self._filters)
+
+    def _inner_filters(self) -> List[Callable[[Dict[str, Any]], bool]]:
+        """Embutidos com `!inner`: a linha só fica se algum relacionado passa nos filtros
+        dele. Sem `!inner` o PostgREST filtra só o embutido, o que não é simulado aqui."""
+        out = []
+        for target, hint, _ in _parse_select(self._columns):
+            filters = self._embedded_filters.get(target)
+            if filters is None or not hint or "inner" not in hint.split("!"):
+                continue
+            _, column, target_column = self._link(self._table, target, hint)
+            keys = {
+                _norm(r.get(target_column))
+                for r in self._client.db.rows(target)
+                if all(f(r) for f in filters)
+            }
+            out.append((lambda column, keys: lambda r: _norm(r.get(column)) in keys)(column, keys))
+        return out
+
+    def _sorted(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for column, desc, nullsfirst in reversed(self._orders):
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=_SortKey.of(column), reverse=desc)
+            # PostgREST: NULLS LAST em asc, NULLS FIRST em desc (salvo indicação)
+            first = nullsfirst if nullsfirst is not None else desc
+            rows = missing + present if first else present + missing
+        return rows
+
+    def _project(self, row: Dict[str, Any], table: str, spec) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for name, hint, sub in spec:
+            if sub is None:
+                if name == "*":
+                    out.update(copy.deepcopy(row))
+                else:
+                    out[name] = copy.deepcopy(row.get(name))
+                continue
+            if sub:
+                out[name] = self._embed(row, table, name, hint, sub)
+        return out
+
+    def _embed(self, row, table, target, hint, sub):
+        many, column, target_column = self._link(table, target, hint)
+        ref = row.get(column)
+        if ref is None:
+            return [] if many else None
+        related = [r for r in self._client.db.rows(target) if _norm(r.get(target_column)) == _norm(ref)]
+        if many:
+            return [self._project(r, target, sub) for r in related]
+        return self._project(related[0], target, sub) if related else None
+
+    def _link(self, table, target, hint) -> Tuple[bool, str, str]:
+        """(um-para-muitos?, coluna em `table`, coluna em `target`) da relação."""
+        hint = "!".join(h for h in (hint or "").split("!") if h and h != "inner") or None
+        fks = FOREIGN_KEYS.get(table, {})
+        candidates = [c for c, t in fks.items() if t == target]
+        column = None
+        if hint:
+            if hint in candidates:
+                column = hint
+            else:
+                m = re.match(rf"^{re.escape(table)}_(.+)_fkey$", hint)
+                if m and m.group(1) in candidates:
+                    column = m.group(1)
+        elif candidates:
+            column = candidates[0]
+        if column is not None:
+            return False, column, "id"
+        # relação reversa (um-para-muitos): target tem FK apontando para esta tabela
+        back = [c for c, t in FOREIGN_KEYS.get(target, {}).items() if t == table]
+        if back:
+            return True, "id", back[0]
+        raise APIError({
+            "message": f"Could not find a relationship between '{table}' and '{target}'",
+            "code": "PGRST200",
+        })
+
+    def _run(self) -> MemoryResponse:
+        db = self._client.db
+        with db.lock:
+            if self._op == "insert":
+                rows = self._payload if isinstance(self._payload, list) else [self._payload]
+                return MemoryResponse(db.insert(self._table, rows))
+            if self._op == "upsert":
+                rows = self._payload if isinstance(self._payload, list) else [self._payload]
+                return MemoryResponse(db.upsert(self._table, rows, self._on_conflict))
+            source = self._source() if self._source else db.rows(self._table)
+            if self._op == "update":
+                changed = []
+                for r in source:
+                    if self._matches(r):
+                        r.update(copy.deepcopy(self._payload))
+                        changed.append(copy.deepcopy(r))
+                return MemoryResponse(changed)
+            if self._op == "delete":
+                kept, removed = [], []
+                for r in source:
+                    (removed if self._matches(r) else kept).append(r)
+                db.tables[self._table] = kept
+                return MemoryResponse(copy.deepcopy(removed))
+
+            inner = self._inner_filters() if self._embedded_filters else []
+            matched = self._sorted([r for r in source if self._matches(r) and all(f(r) for f in inner)])
+            total = len(matched) if self._count else None
+            page = matched[self._offset:]
+            if self._limit is not None:
+                page = page[: self._limit]
+            spec = _parse_select(self._columns)
+            data = [self._project(r, self._table, spec) for r in page]
+
+        if self._single or self._maybe_single:
+            if len(data) != 1:
+                if self._maybe_single and not data:
+                    return None
+                raise APIError({
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116",
+                    "details": f"The result contains {len(data)} rows",
+                    "hint": None,
+                })
+            return MemoryResponse(data[0], total)
+        return MemoryResponse(data, total)
+
+    def execute(self) -> MemoryResponse:
+        return self._client._call("postgrest", self._table, self._op, self._run, _rows_of)
+
+
+class AsyncMemoryQueryBuilder(MemoryQueryBuilder):
+    """Mesmo builder, com `execute()` assíncrono (API do `AsyncClient`)."""
+
+    async def execute(self) -> MemoryResponse:
+        return await self._client._acall("postgrest", self._table, self._op, self._run, _rows_of)
+
+
+def _rows_of(resp: Optional[MemoryResponse]) -> int:
+    if resp is None:
+        return 0
+    return len(resp.data) if isinstance(resp.data, list) else 1
+
+
+class _SortKey:
+    """Chave de ordenação que compara números como números e o resto como texto."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return _compare(self.value, other.value) < 0
+
+    @staticmethod
+    def of(column: str):
+        return lambda r: _SortKey(r.get(column))
+
+
+class MemoryBucket:
+    def __init__(self, client: "MemorySupabaseClient", bucket: str):
+        self._client = client
+        self._bucket = bucket
+
+    def _objects(self) -> Dict[str, Tuple[bytes, str]]:
+        storage = self._client.storage
+        if self._bucket not in storage.buckets:
+            raise APIError({"message": "Bucket not found", "code": "404"})
+        return storage.buckets[self._bucket]["objects"]
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None):
+        def run():
+            objects = self._objects()
+            if path in objects:
+                raise APIError({"message": "The resource already exists", "code": "409"})
+            data = file if isinstance(file, (bytes, bytearray)) else bytes(str(file), "utf-8")
+            content_type = (file_options or {}).get("content-type", "application/octet-stream")
+            objects[path] = (bytes(data), content_type)
+            return {"Key": f"{self._bucket}/{path}", "path": path}
+
+        return self._client._call("storage", self._bucket, "upload", run)
+
+    def remove(self, paths: List[str]):
+        def run():
+            objects = self._objects()
+            return [{"name": p} for p in paths if objects.pop(p, None) is not None]
+
+        return self._client._call("storage", self._bucket, "remove", run)
+
+    def get_public_url(self, path: str, options: Optional[Dict[str, Any]] = None) -> str:
+        def run():
+            return f"{self._client.url}/storage/v1/object/public/{self._bucket}/{path}"
+
+        return self._client._call("storage", self._bucket, "get_public_url", run)
+
+    def download(self, path: str) -> bytes:
+        def run():
+            return self._objects()[path][0]
+
+        return self._client._call("storage", self._bucket, "download", run)
+
+
+class _BucketInfo:
+    def __init__(self, name: str, public: bool):
+        self.id = name
+        self.name = name
+        self.public = public
+
+
+class MemoryStorage:
+    def __init__(self, client: "MemorySupabaseClient"):
+        self._client = client
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+        self.url = f"{client.url}/storage/v1"
+
+    def from_(self, bucket: str) -> MemoryBucket:
+        return MemoryBucket(self._client, bucket)
+
+    def list_buckets(self):
+        return self._client._call(
+            "storage", "buckets", "list_buckets",
+            lambda: [_BucketInfo(n, b["public"]) for n, b in self.buckets.items()],
+        )
+
+    def get_bucket(self, bucket: str):
+        def run():
+            if bucket not in self.buckets:
+                raise APIError({"message": "Bucket not found", "code": "404"})
+            return _BucketInfo(bucket, self.buckets[bucket]["public"])
+
+        return self._client._call("storage", "buckets", "get_bucket", run)
+
+    def create_bucket(self, bucket: str, name: Optional[str] = None, options: Optional[Dict[str, Any]] = None, **kwargs):
+        def run():
+            if bucket in self.buckets:
+                raise APIError({"message": "The resource already exists", "code": "409"})
+            public = bool((options or {}).get("public", kwargs.get("public", False)))
+            self.buckets[bucket] = {"public": public, "objects": {}}
+            return {"name": bucket}
+
+        return self._client._call("storage", "buckets", "create_bucket", run)
+
+    def update_bucket(self, bucket: str, options: Optional[Dict[str, Any]] = None, **kwargs):
+        def run():
+            if bucket not in self.buckets:
+                raise APIError({"message": "Bucket not found", "code": "404"})
+            self.buckets[bucket]["public"] = bool((options or {}).get("public", kwargs.get("public", False)))
+            return {"message": "Successfully updated"}
+
+        return self._client._call("storage", "buckets", "update_bucket", run)
+
+
+class _Obj:
+    """Objeto simples com atributos (imita os modelos pydantic do supabase-auth)."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class MemoryAuthError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class MemoryAuthAdmin:
+    def __init__(self, auth: "MemoryAuth"):
+        self._auth = auth
+
+    def create_user(self, attributes: Dict[str, Any]):
+        def run():
+            email = (attributes.get("email") or "").strip().lower()
+            if not email:
+                raise MemoryAuthError("email obrigatório", 400)
+            if email in self._auth.users_by_email:
+                raise MemoryAuthError("A user with this email address has already been registered", 422)
+            user = _Obj(
+                id=str(uuid.uuid4()),
+                email=email,
+                email_confirmed_at=_now() if attributes.get("email_confirm") else None,
+                user_metadata=attributes.get("user_metadata") or {},
+            )
+            self._auth.users_by_email[email] = (user, attributes.get("password") or "")
+            return _Obj(user=user)
+
+        return self._auth._client._call("auth", "admin", "create_user", run)
+
+    def delete_user(self, user_id: str, should_soft_delete: bool = False):
+        def run():
+            for email, (user, _) in list(self._auth.users_by_email.items()):
+                if user.id == user_id:
+                    del self._auth.users_by_email[email]
+            return None
+
+        return self._auth._client._call("auth", "admin", "delete_user", run)
+
+
+class MemoryAuth:
+    def __init__(self, client: "MemorySupabaseClient"):
+        self._client = client
+        self.users_by_email: Dict[str, Tuple[_Obj, str]] = {}
+        self.refresh_tokens: Dict[str, _Obj] = {}
+        self.admin = MemoryAuthAdmin(self)
+
+    def _session(self, user: _Obj) -> _Obj:
+        now = int(time.time())
+        access = jwt.encode(
+            {"sub": user.id, "email": user.email, "aud": "authenticated", "role": "authenticated",
+             "iat": now, "exp": now + self._client.token_ttl},
+            self._client.jwt_secret,
+            algorithm="HS256",
+        )
+        refresh = uuid.uuid4().hex
+        self.refresh_tokens[refresh] = user
+        return _Obj(access_token=access, refresh_token=refresh, expires_in=self._client.token_ttl, user=user)
+
+    def sign_in_with_password(self, credentials: Dict[str, Any]):
+        def run():
+            email = (credentials.get("email") or "").strip().lower()
+            entry = self.users_by_email.get(email)
+            if not entry or entry[1] != credentials.get("password"):
+                raise MemoryAuthError("Invalid login credentials", 400)
+            user = entry[0]
+            return _Obj(user=user, session=self._session(user))
+
+        return self._client._call("auth", "token", "sign_in_with_password", run)
+
+    def refresh_session(self, refresh_token: Union[str, Dict[str, Any], None] = None):
+        def run():
+            token = refresh_token.get("refresh_token") if isinstance(refresh_token, dict) else refresh_token
+            user = self.refresh_tokens.pop(token or "", None)
+            if user is None:
+                raise MemoryAuthError("Invalid Refresh Token", 400)
+            return _Obj(user=user, session=self._session(user))
+
+        return self._client._call("auth", "token", "refresh_session", run)
+
+
+class MemorySupabaseClient:
+    """Substituto do `supabase.Client` com dados em memória.
+
+    Args:
+        url: URL base usada para montar URLs públicas do storage
+        jwt_secret: segredo HS256 dos tokens emitidos pelo auth em memória
+        latency: segundos por chamada, ou função (servico, alvo, operacao) -> segundos
+            (a função pode levantar uma exceção para simular falha do serviço)
+    """
+
+    def __init__(
+        self,
+        url: str = "http://memory.local",
+        jwt_secret: str = MEMORY_JWT_SECRET,
+        latency: Union[float, Callable[[str, str, str], float], None] = None,
+        token_ttl: int = 3600,
+    ):
+        self.url = (url or "http://memory.local").rstrip("/")
+        self.jwt_secret = jwt_secret
+        self.token_ttl = token_ttl
+        self.db = MemoryDatabase()
+        self.storage = MemoryStorage(self)
+        self.auth = MemoryAuth(self)
+        self._rpcs: Dict[str, Callable[["MemorySupabaseClient", Dict[str, Any]], List[Dict[str, Any]]]] = {}
+        self._listeners: List[Callable[..., None]] = []
+        self._latency = latency
+        self._async: Optional["AsyncMemorySupabaseClient"] = None
+        self._guard: Optional[Callable[[str], Any]] = None
+
+    # ---- API do supabase.Client ----
+    def table(self, table_name: str) -> MemoryQueryBuilder:
+        return MemoryQueryBuilder(self, table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, count: Optional[str] = None) -> MemoryQueryBuilder:
+        return self._rpc_builder(MemoryQueryBuilder, fn, params, count)
+
+    def _rpc_builder(self, builder_cls, fn: str, params: Optional[Dict[str, Any]], count: Optional[str]):
+        if fn not in self._rpcs:
+            raise APIError({
+                "message": f"Could not find the function public.{fn} in the schema cache",
+                "code": "PGRST202",
+            })
+        builder = builder_cls(self, fn)
+        builder._source = lambda: self._rpcs[fn](self, params or {})
+        builder._count = count
+        return builder
+
+    # ---- extensões para benchmark/testes ----
+    def register_rpc(self, name: str, fn: Callable[["MemorySupabaseClient", Dict[str, Any]], List[Dict[str, Any]]]) -> None:
+        """Registra a implementação Python de uma função SQL chamada via `rpc()`."""
+        self._rpcs[name] = fn
+
+    def as_async(self) -> "AsyncMemorySupabaseClient":
+        """Visão assíncrona sobre os mesmos dados, para os handlers ASGI."""
+        if self._async is None:
+            self._async = AsyncMemorySupabaseClient(self)
+        return self._async
+
+    def set_latency(self, latency: Union[float, Callable[[str, str, str], float], None]) -> None:
+        self._latency = latency
+
+    def set_guard(self, guard: Optional[Callable[[str], Any]]) -> None:
+        """`guard(servico)` devolve um context manager que envolve cada chamada
+        (ex.: circuit breaker: pode recusar a chamada ou registrar o resultado)."""
+        self._guard = guard
+
+    def add_listener(self, fn: Callable[..., None]) -> None:
+        """`fn(servico, alvo, operacao, duracao_s, linhas, erro)` é chamado após cada chamada."""
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[..., None]) -> None:
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def seed(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        self.db.seed(table, rows)
+
+    def seed_user(self, email: str, password: str, profile: Optional[Dict[str, Any]] = None) -> str:
+        """Cria usuário no auth em memória e, opcionalmente, a linha em `usuarios`."""
+        created = self.auth.admin.create_user({"email": email, "password": password, "email_confirm": True})
+        if profile is not None:
+            self.db.seed("usuarios", [{"id": created.user.id, "email": email, **profile}])
+        return created.user.id
+
+    def load_fixtures(self, path: str) -> None:
+        """Carrega um JSON no formato {tabela: [linhas]}."""
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        for table, rows in (data or {}).items():
+            self.seed(table, rows or [])
+
+    def _delay(self, service: str, target: str, op: str) -> float:
+        latency = self._latency
+        if callable(latency):
+            return max(float(latency(service, target, op) or 0), 0.0)
+        return max(float(latency or 0), 0.0)
+
+    def _call(self, service: str, target: str, op: str, fn: Callable[[], Any], rows_of=None):
+        start = time.perf_counter()
+        error = None
+        result = None
+        try:
+            with self._guarded(service):
+                delay = self._delay(service, target, op)
+                if delay:
+                    time.sleep(delay)
+                result = fn()
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._notify(service, target, op, start, result, error, rows_of)
+
+    async def _acall(self, service: str, target: str, op: str, fn: Callable[[], Any], rows_of=None):
+        # Igual a `_call`, mas a latência simulada não bloqueia o event loop
+        start = time.perf_counter()
+        error = None
+        result = None
+        try:
+            with self._guarded(service):
+                delay = self._delay(service, target, op)
+                if delay:
+                    await asyncio.sleep(delay)
+                result = fn()
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._notify(service, target, op, start, result, error, rows_of)
+
+    def _guarded(self, service: str):
+        return self._guard(service) if self._guard else contextlib.nullcontext()
+
+    def _notify(self, service: str, target: str, op: str, start: float, result: Any, error: Optional[Exception], rows_of) -> None:
+        if not self._listeners:
+            return
+        duration = time.perf_counter() - start
+        rows = rows_of(result) if (rows_of and error is None) else None
+        for listener in list(self._listeners):
+            try:
+                listener(service, target, op, duration, rows, error)
+            except Exception:
+                pass
+
+
+class AsyncMemorySupabaseClient:
+    """Substituto do `supabase.AsyncClient` (só PostgREST) sobre um `MemorySupabaseClient`."""
+
+    def __init__(self, client: MemorySupabaseClient):
+        self._client = client
+
+    def table(self, table_name: str) -> AsyncMemoryQueryBuilder:
+        return AsyncMemoryQueryBuilder(self._client, table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, count: Optional[str] = None) -> AsyncMemoryQueryBuilder:
+        return self._client._rpc_builder(AsyncMemoryQueryBuilder, fn, params, count)
@@ -0,0 +1,323 @@
+"""Funções SQL de `db/` reimplementadas em Python para o backend em memória.
+
+Cada função recebe `(client, params)` e devolve as linhas que o PostgREST
+devolveria para `client.rpc(nome, params)`; `get_memory_client()` registra
+todas de `MEMORY_RPCS`. São aproximações suficientes para desenvolvimento e
+benchmark: o contrato (parâmetros, colunas, ordem e paginação) é o mesmo da
+versão SQL, mas o stemming e o ranking do Postgres não são reproduzidos.
+"""
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+import functools
+import re
+import threading
+
+from .categories import fold
+
+# Stopwords mais comuns do dicionário 'portuguese' (ignoradas na consulta)
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "na", "no",
+    "nas", "nos", "um", "uma", "para", "por", "com", "sem", "que", "se", "ao", "aos",
+}
+
+# Pesos padrão do ts_rank para 'A' (título) e 'B' (descrição)
+_PESO_TITULO = 1.0
+_PESO_DESCRICAO = 0.4
+
+_WORD = re.compile(r"\w+")
+
+
+def _termo(palavra: str) -> str:
+    """Radical grosseiro: tira o plural, para "eletricistas" achar "eletricista"."""
+    return palavra[:-1] if len(palavra) > 3 and palavra.endswith("s") else palavra
+
+
+def _consulta(texto: str) -> List[Tuple[List[str], List[str]]]:
+    """`websearch_to_tsquery` simplificado: grupos separados por "or", cada um com
+    termos obrigatórios e termos excluídos (`-termo`)."""
+    grupos: List[Tuple[List[str], List[str]]] = [([], [])]
+    for token in fold(texto).split():
+        if token == "or":
+            grupos.append(([], []))
+            continue
+        excluir = token.startswith("-")
+        for palavra in _WORD.findall(token):
+            if palavra in _STOPWORDS:
+                continue
+            grupos[-1][1 if excluir else 0].append(_termo(palavra))
+    return [g for g in grupos if g[0]]
+
+
+class _Documentos:
+    """Palavras normalizadas de título/descrição por anúncio, refeitas só quando o texto muda."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[Any, Tuple[str, str, List[str], List[str]]] = {}
+
+    def get(self, row: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        titulo, descricao = row.get("titulo") or "", row.get("descricao") or ""
+        with self._lock:
+            doc = self._docs.get(row.get("id"))
+        if doc is None or doc[0] != titulo or doc[1] != descricao:
+            doc = (titulo, descricao, _WORD.findall(fold(titulo)), _WORD.findall(fold(descricao)))
+            with self._lock:
+                self._docs[row.get("id")] = doc
+        return doc[2], doc[3]
+
+
+_documentos = _Documentos()
+
+
+def _ocorrencias(termo: str, palavras: List[str]) -> int:
+    return sum(1 for p in palavras if p.startswith(termo))
+
+
+def _rank(grupos, titulo: List[str], descricao: List[str]) -> Optional[float]:
+    """Rank do melhor grupo que casa com o documento (None se nenhum casa)."""
+    melhor = None
+    for obrigatorios, excluidos in grupos:
+        if any(_ocorrencias(t, titulo) or _ocorrencias(t, descricao) for t in excluidos):
+            continue
+        rank = 0.0
+        for termo in obrigatorios:
+            no_titulo, na_descricao = _ocorrencias(termo, titulo), _ocorrencias(termo, descricao)
+            if not (no_titulo or na_descricao):
+                break
+            rank += no_titulo * _PESO_TITULO + na_descricao * _PESO_DESCRICAO
+        else:
+            melhor = rank if melhor is None else max(melhor, rank)
+    return melhor
+
+
+def buscar_anuncios(client, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`buscar_anuncios` de `db/migration_busca_anuncios.sql`."""
+    grupos = _consulta(params.get("p_busca") or "")
+    filtros = {
+        "tipo": params.get("p_tipo"),
+        "categoria_id": params.get("p_categoria_id"),
+        "urgencia": params.get("p_urgencia"),
+        "status": params.get("p_status"),
+    }
+    encontrados = []
+    for row in client.db.rows("anuncios") if grupos else []:
+        if row.get("profissional_direcionado_id"):
+            continue
+        if any(valor is not None and str(row.get(col)) != str(valor) for col, valor in filtros.items()):
+            continue
+        rank = _rank(grupos, *_documentos.get(row))
+        if rank is not None:
+            encontrados.append((row, rank))
+
+    order = params.get("p_order") or "relevancia"
+    # Mesma ordem da função SQL: critério principal, depois mais recentes e maior id
+    encontrados.sort(key=lambda e: (e[0].get("publicado_em") or "", e[0].get("id") or 0), reverse=True)
+    if order == "relevancia":
+        encontrados.sort(key=lambda e: e[1], reverse=True)
+    elif order == "antigos":
+        encontrados.sort(key=lambda e: e[0].get("publicado_em") or "")
+
+    return _pagina([(row["id"], rank) for row, rank in encontrados], params, "rank")
+
+
+def _pagina(ordenados: List[Tuple[Any, float]], params: Dict[str, Any], coluna: str) -> List[Dict[str, Any]]:
+    """Linhas (id, coluna, total) da página; página vazia vira uma linha com id None."""
+    offset = max(int(params.get("p_offset") or 0), 0)
+    limit = max(int(params.get("p_limit") if params.get("p_limit") is not None else 20), 0)
+    pagina = ordenados[offset:offset + limit]
+    total = len(ordenados)
+    if not pagina:
+        return [{"id": None, coluna: None, "total": total}]
+    return [{"id": id_, coluna: valor, "total": total} for id_, valor in pagina]
+
+
+# -------------------- buscar_profissionais (pg_trgm) --------------------
+# Limiar de pg_trgm.word_similarity_threshold definido na função SQL
+_LIMIAR_SIMILARIDADE = 0.5
+
+
+@functools.lru_cache(maxsize=65536)
+def _normalizado(texto: str) -> str:
+    return fold(texto)
+
+
+@functools.lru_cache(maxsize=65536)
+def _trigramas(texto: str) -> Tuple[FrozenSet[str], ...]:
+    """Trigramas de cada palavra, como no pg_trgm ("  palavra ", sem acentos e minúsculo)."""
+    return tuple(
+        frozenset(f"  {p} "[i:i + 3] for i in range(len(p) + 1))
+        for p in _WORD.findall(_normalizado(texto))
+    )
+
+
+def _word_similarity(consulta: str, texto: str) -> float:
+    """`word_similarity` aproximada: melhor janela de palavras inteiras de `texto`."""
+    palavras_consulta = _trigramas(consulta)
+    palavras = _trigramas(texto)
+    if not palavras_consulta or not palavras:
+        return 0.0
+    q = frozenset().union(*palavras_consulta)
+    melhor = 0.0
+    for i in range(len(palavras)):
+        extensao = frozenset()
+        for palavra in palavras[i:i + len(palavras_consulta)]:
+            extensao = extensao | palavra
+            melhor = max(melhor, len(q & extensao) / len(q | extensao))
+    return melhor
+
+
+def _similaridade(consulta: str, texto: Optional[str]) -> Optional[float]:
+    """Similaridade se `texto` casa com a consulta (limiar ou trecho contido), senão None."""
+    if not texto:
+        return None
+    sim = _word_similarity(consulta, texto)
+    if sim >= _LIMIAR_SIMILARIDADE or _normalizado(consulta) in _normalizado(texto):
+        return sim
+    return None
+
+
+def buscar_profissionais(client, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`buscar_profissionais` de `db/migration_busca_profissionais.sql`."""
+    db = client.db
+    busca = (params.get("p_busca") or "").strip()
+    local = (params.get("p_localizacao") or "").strip()
+    cat_ids = params.get("p_categoria_ids")
+    workers = [u for u in db.rows("usuarios") if u.get("is_worker")]
+
+    sims: Dict[Any, float] = {}
+
+    def candidato(user_id, sim: Optional[float], peso: float) -> None:
+        if user_id is not None and sim is not None:
+            sims[user_id] = max(sims.get(user_id, 0.0), sim * peso)
+
+    if busca:
+        for u in workers:
+            candidato(u.get("id"), _similaridade(busca, u.get("nome")), 1.0)
+        for p in db.rows("perfil_worker"):
+            candidato(p.get("user_id"), _similaridade(busca, p.get("descricao")), 0.8)
+        por_categoria = {c.get("id"): _similaridade(busca, c.get("nome")) for c in db.rows("categorias")}
+        for wc in db.rows("worker_categorias"):
+            candidato(wc.get("user_id"), por_categoria.get(wc.get("categoria_id")), 0.9)
+
+    com_categoria = None
+    if cat_ids is not None:
+        alvo = {str(c) for c in cat_ids}
+        com_categoria = {wc.get("user_id") for wc in db.rows("worker_categorias") if str(wc.get("categoria_id")) in alvo}
+
+    encontrados = []
+    for u in workers:
+        uid = u.get("id")
+        if busca and uid not in sims:
+            continue
+        if local and _similaridade(local, u.get("endereco_cidade")) is None:
+            continue
+        if com_categoria is not None and uid not in com_categoria:
+            continue
+        encontrados.append((uid, sims.get(uid, 0.0), u.get("nome") or ""))
+
+    encontrados.sort(key=lambda e: (-e[1], e[2], str(e[0])))
+    return _pagina([(uid, sim) for uid, sim, _ in encontrados], params, "similaridade")
+
+
+# -------------------- facetas_anuncios --------------------
+_FACETAS = {"tipo": "p_tipo", "categoria_id": "p_categoria_id", "urgencia": "p_urgencia", "status": "p_status"}
+
+
+def facetas_anuncios(client, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`facetas_anuncios` de `db/migration_facetas_anuncios.sql`."""
+    busca = (params.get("p_busca") or "").strip()
+    grupos = _consulta(busca) if busca else None
+    filtros = {col: str(params[p]) for col, p in _FACETAS.items() if params.get(p) is not None}
+    contagens: Dict[str, Dict[Optional[str], int]] = {col: {} for col in _FACETAS}
+    total = 0
+    for row in client.db.rows("anuncios"):
+        if row.get("profissional_direcionado_id"):
+            continue
+        if grupos is not None and _rank(grupos, *_documentos.get(row)) is None:
+            continue
+        falhas = [col for col, valor in filtros.items() if str(row.get(col)) != valor]
+        if not falhas:
+            total += 1
+        # Cada faceta conta com os filtros das outras: só entra se a única falha for a dela
+        for col in (falhas if len(falhas) == 1 else [] if falhas else _FACETAS):
+            valor = row.get(col)
+            if col == "urgencia" and valor is None:
+                continue
+            chave = None if valor is None else str(valor)
+            contagens[col][chave] = contagens[col].get(chave, 0) + 1
+    linhas = [
+        {"faceta": col, "valor": valor, "total": n}
+        for col, por_valor in contagens.items()
+        for valor, n in por_valor.items()
+    ]
+    linhas.append({"faceta": "total", "valor": None, "total": total})
+    return linhas
+
+
+# -------------------- *_no_raio (cube/earthdistance) --------------------
+def _no_raio(rows, params: Dict[str, Any]) -> List[Tuple[Dict[str, Any], float]]:
+    """(linha, distância em km) das linhas com coordenadas a até p_raio_km do ponto."""
+    from .geo import caixa, distancia_km
+
+    lat, lon = float(params["p_latitude"]), float(params["p_longitude"])
+    raio = float(params["p_raio_km"])
+    # Mesmo corte do earth_box: só as linhas dentro do retângulo têm a distância calculada
+    box = caixa(lat, lon, raio)
+    encontrados = []
+    for row in rows:
+        rlat, rlon = row.get("latitude"), row.get("longitude")
+        if rlat is None or rlon is None:
+            continue
+        if not (box["lat_min"] <= rlat <= box["lat_max"] and box["lon_min"] <= rlon <= box["lon_max"]):
+            continue
+        distancia = distancia_km(lat, lon, rlat, rlon)
+        if distancia <= raio:
+            encontrados.append((row, distancia))
+    return encontrados
+
+
+def profissionais_no_raio(client, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`profissionais_no_raio` de `db/migration_geo_cep.sql`."""
+    db = client.db
+    cat_ids = params.get("p_categoria_ids")
+    com_categoria = None
+    if cat_ids is not None:
+        alvo = {str(c) for c in cat_ids}
+        com_categoria = {wc.get("user_id") for wc in db.rows("worker_categorias") if str(wc.get("categoria_id")) in alvo}
+
+    encontrados = [
+        (row["id"], distancia)
+        for row, distancia in _no_raio((u for u in db.rows("usuarios") if u.get("is_worker")), params)
+        if com_categoria is None or row.get("id") in com_categoria
+    ]
+    encontrados.sort(key=lambda e: (e[1], str(e[0])))
+    return _pagina(encontrados, params, "distancia_km")
+
+
+def anuncios_no_raio(client, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`anuncios_no_raio` de `db/migration_geo_cep.sql`."""
+    filtros = {
+        "tipo": params.get("p_tipo"),
+        "categoria_id": params.get("p_categoria_id"),
+        "urgencia": params.get("p_urgencia"),
+        "status": params.get("p_status"),
+    }
+    filtros = {col: str(valor) for col, valor in filtros.items() if valor is not None}
+    encontrados = [
+        (row, distancia)
+        for row, distancia in _no_raio(client.db.rows("anuncios"), params)
+        if not row.get("profissional_direcionado_id")
+        and all(str(row.get(col)) == valor for col, valor in filtros.items())
+    ]
+    # Mesma ordem da função SQL: distância, depois mais recentes e maior id
+    encontrados.sort(key=lambda e: (e[0].get("publicado_em") or "", e[0].get("id") or 0), reverse=True)
+    encontrados.sort(key=lambda e: e[1])
+    return _pagina([(row["id"], distancia) for row, distancia in encontrados], params, "distancia_km")
+
+
+MEMORY_RPCS: Dict[str, Callable[[Any, Dict[str, Any]], List[Dict[str, Any]]]] = {
+    "buscar_anuncios": buscar_anuncios,
+    "buscar_profissionais": buscar_profissionais,
+    "profissionais_no_raio": profissionais_no_raio,
+    "anuncios_no_raio": anuncios_no_raio,
+    "facetas_anuncios": facetas_anuncios,
+}
@@ -0,0 +1,143 @@
+"""Métricas no formato Prometheus (`GET /metrics`).
+
+- HTTP: requisições, latência, requisições em andamento e tamanho da resposta
+  por blueprint/endpoint.
+- Supabase: latência por serviço/alvo/operação, erros e retries (alimentado
+  por `tracing.record`, o mesmo gancho do Server-Timing).
+- Caches: acertos e faltas por cache (`record_cache`), para a taxa de acerto.
+- Single-flight: chamadas executadas e coalescidas por função (`record_singleflight`).
+
+Com vários processos (gunicorn), defina `PROMETHEUS_MULTIPROC_DIR` com um
+diretório vazio e gravável: cada processo escreve as métricas em arquivos
+mapeados em memória e o `/metrics` de qualquer worker agrega todos. Veja
+`backend/gunicorn_conf.py` para limpar os arquivos de workers encerrados.
+
+`prometheus_client` é opcional: sem ele tudo vira no-op e `/metrics` responde 503.
+"""
+from typing import Optional, Tuple
+import os
+
+from .config import settings
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:  # pragma: no cover - dependência opcional
+    prometheus_client = None
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+if prometheus_client is not None:
+    HTTP_REQUESTS = Counter(
+        "lancefacil_http_requests_total", "Requisições HTTP atendidas",
+        ["blueprint", "endpoint", "method", "status"],
+    )
+    HTTP_LATENCY = Histogram(
+        "lancefacil_http_request_duration_seconds", "Latência das requisições HTTP",
+        ["blueprint", "endpoint", "method"], buckets=_LATENCY_BUCKETS,
+    )
+    HTTP_IN_FLIGHT = Gauge(
+        "lancefacil_http_requests_in_flight", "Requisições HTTP em andamento",
+        ["blueprint", "endpoint"], multiprocess_mode="livesum",
+    )
+    HTTP_RESPONSE_SIZE = Histogram(
+        "lancefacil_http_response_size_bytes", "Tamanho do corpo das respostas HTTP",
+        ["blueprint", "endpoint"], buckets=_SIZE_BUCKETS,
+    )
+    SUPABASE_LATENCY = Histogram(
+        "lancefacil_supabase_call_duration_seconds", "Latência das chamadas ao Supabase",
+        ["service", "target", "op"], buckets=_QUERY_BUCKETS,
+    )
+    SUPABASE_ERRORS = Counter(
+        "lancefacil_supabase_call_errors_total", "Chamadas ao Supabase com erro",
+        ["service", "target", "op"],
+    )
+    SUPABASE_RETRIES = Counter(
+        "lancefacil_supabase_retries_total", "Chamadas ao Supabase que foram retentativas",
+        ["service", "target", "op"],
+    )
+    CACHE_REQUESTS = Counter(
+        "lancefacil_cache_requests_total", "Consultas aos caches da aplicação",
+        ["cache", "result"],
+    )
+    SINGLEFLIGHT_CALLS = Counter(
+        "lancefacil_singleflight_calls_total", "Leituras idênticas simultâneas (executadas ou coalescidas)",
+        ["name", "result"],
+    )
+
+
+def enabled() -> bool:
+    return prometheus_client is not None and settings.metrics_enabled
+
+
+def endpoint_labels(endpoint: Optional[str]) -> Tuple[str, str]:
+    """(blueprint, endpoint) a partir do nome do endpoint do Flask ('anuncios.list_anuncios')."""
+    if not endpoint:
+        return "", "unmatched"
+    blueprint, _, _ = endpoint.rpartition(".")
+    return blueprint, endpoint
+
+
+def request_started(blueprint: str, endpoint: str) -> None:
+    if enabled():
+        HTTP_IN_FLIGHT.labels(blueprint, endpoint).inc()
+
+
+def request_finished(blueprint: str, endpoint: str, method: str, status: int,
+                     duration: float, size: Optional[int]) -> None:
+    if not enabled():
+        return
+    HTTP_REQUESTS.labels(blueprint, endpoint, method, str(status)).inc()
+    HTTP_LATENCY.labels(blueprint, endpoint, method).observe(duration)
+    if size is not None:
+        HTTP_RESPONSE_SIZE.labels(blueprint, endpoint).observe(size)
+
+
+def request_done(blueprint: str, endpoint: str) -> None:
+    if enabled():
+        HTTP_IN_FLIGHT.labels(blueprint, endpoint).dec()
+
+
+def record_supabase_call(service: str, target: str, op: str, duration: float, attempt: int, error: Optional[str]) -> None:
+    if not enabled():
+        return
+    SUPABASE_LATENCY.labels(service, target, op).observe(duration)
+    if error:
+        SUPABASE_ERRORS.labels(service, target, op).inc()
+    if attempt:
+        SUPABASE_RETRIES.labels(service, target, op).inc()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Registra uma consulta a um cache da aplicação (taxa de acerto = hit / total)."""
+    if enabled():
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_singleflight(name: str, coalesced: bool) -> None:
+    """Registra uma chamada single-flight: 'leader' foi ao banco, 'coalesced' esperou por ela."""
+    if enabled():
+        SINGLEFLIGHT_CALLS.labels(name, "coalesced" if coalesced else "leader").inc()
+
+
+def exposition() -> Tuple[bytes, str]:
+    """Corpo e content-type do `/metrics` (agregando os processos no modo multiprocess)."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Remove os arquivos de gauge 'live' de um worker encerrado (hook child_exit do gunicorn)."""
+    if prometheus_client is not None and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,228 @@
+"""Política de retry das chamadas ao Supabase (PostgREST, Storage e Auth).
+
+O erro é classificado pelo tipo da exceção e pelo status HTTP/código do
+PostgREST, não pelo texto da mensagem:
+
+- SAFE: a requisição não chegou a ser processada (falha ao conectar, pool
+  esgotado, 429/503, conflito de transação no Postgres). Pode repetir
+  qualquer operação, inclusive escritas não idempotentes.
+- TRANSIENT: falha transitória que pode ter acontecido depois de o servidor
+  processar a requisição (timeout de leitura, conexão caída, 502/504). Só
+  repete operações idempotentes.
+- FATAL: erro da aplicação (4xx, violação de constraint, sem linhas...).
+
+A espera entre tentativas é exponencial com teto e jitter completo, e cada
+requisição HTTP tem um orçamento de retries (`RETRY_BUDGET_PER_REQUEST`)
+compartilhado por todas as queries dela: durante um incidente a requisição
+desiste cedo em vez de empilhar esperas e multiplicar a carga no banco.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, TypeVar
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+
+from .config import settings
+
+T = TypeVar('T')
+
+SAFE = "safe"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+# Status HTTP em que o servidor recusou a requisição sem processá-la
+NOT_PROCESSED_STATUS = {429, 503}
+# Status HTTP transitórios em que a requisição pode ter sido processada
+TRANSIENT_STATUS = {408, 500, 502, 504}
+# Códigos do PostgREST/Postgres de falhas transitórias em que nada foi gravado:
+# PGRST000-003 (sem conexão com o banco / pool do PostgREST), 40001
+# (serialization_failure), 40P01 (deadlock), 55P03 (lock_not_available),
+# 57P01 (admin_shutdown), 53300 (too_many_connections)
+NOT_PROCESSED_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003", "40001", "40P01", "55P03", "57P01", "53300"}
+# Resultado vazio de .single(): não é falha de infraestrutura
+NO_ROWS_CODE = "PGRST116"
+# Função chamada via rpc() não existe (migration ainda não aplicada)
+MISSING_FUNCTION_CODE = "PGRST202"
+# Tabela consultada não existe: PGRST205 (cache de schema do PostgREST) ou 42P01 (Postgres)
+MISSING_TABLE_CODES = {"PGRST205", "42P01"}
+
+
+def _status_of(error: Exception) -> Optional[int]:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    # supabase_auth (AuthApiError/AuthRetryableError) e storage3 (StorageApiError)
+    # expõem `status`; o postgrest usa o status como `code` quando a resposta não é JSON
+    for attr in ("status", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit() and len(value) == 3):
+            return int(value)
+    return None
+
+
+def _classify_status(status: int) -> str:
+    if status in NOT_PROCESSED_STATUS:
+        return SAFE
+    if status in TRANSIENT_STATUS:
+        return TRANSIENT
+    return FATAL
+
+
+def classify(error: BaseException) -> str:
+    """Classifica a exceção em SAFE, TRANSIENT ou FATAL."""
+    if not isinstance(error, Exception):
+        return FATAL
+    # Transporte (httpx encapsula as exceções do httpcore e do socket)
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return SAFE
+    if isinstance(error, (httpx.UnsupportedProtocol, httpx.ProxyError)):
+        return FATAL
+    if isinstance(error, httpx.TransportError):
+        return TRANSIENT
+    if isinstance(error, ConnectionRefusedError):
+        return SAFE
+    # WinError 10035 (WSAEWOULDBLOCK) chega como BlockingIOError/OSError
+    if isinstance(error, (ConnectionError, TimeoutError, BlockingIOError)) or getattr(error, "winerror", None) == 10035:
+        return TRANSIENT
+
+    # Erros das bibliotecas do Supabase
+    code = getattr(error, "code", None)
+    if isinstance(code, str) and code in NOT_PROCESSED_CODES:
+        return SAFE
+    if type(error).__name__ == "AuthRetryableError":
+        return TRANSIENT
+    status = _status_of(error)
+    if status is not None:
+        return _classify_status(status)
+    return FATAL
+
+
+def is_transient(error: BaseException) -> bool:
+    """True para falhas de infraestrutura (SAFE ou TRANSIENT)."""
+    return classify(error) != FATAL
+
+
+def is_no_rows(error: BaseException) -> bool:
+    """True quando `.single()` não encontrou linha (PGRST116)."""
+    return getattr(error, "code", None) == NO_ROWS_CODE
+
+
+def is_missing_function(error: BaseException) -> bool:
+    """True quando o `rpc()` chamou uma função que o banco não tem (PGRST202)."""
+    return getattr(error, "code", None) == MISSING_FUNCTION_CODE
+
+
+def is_missing_table(error: BaseException) -> bool:
+    """True quando a consulta usou uma tabela que o banco não tem (migration não aplicada)."""
+    return getattr(error, "code", None) in MISSING_TABLE_CODES
+
+
+# -------------------- Orçamento por requisição --------------------
+class RetryBudget:
+    """Número de retries restantes da requisição atual (thread-safe: o fan-out compartilha)."""
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+_budget: ContextVar[Optional[RetryBudget]] = ContextVar("retry_budget", default=None)
+
+
+def start_request_budget() -> RetryBudget:
+    """Abre o orçamento da requisição (before_request do Flask e handlers ASGI).
+
+    Fora de uma requisição (scripts) não há orçamento: vale só `max_attempts`.
+    """
+    budget = RetryBudget(settings.retry_budget_per_request)
+    _budget.set(budget)
+    return budget
+
+
+def current_budget() -> Optional[RetryBudget]:
+    return _budget.get()
+
+
+# Tentativa em andamento (0 = primeira), lida pela instrumentação (tracing.py)
+_attempt: ContextVar[int] = ContextVar("retry_attempt", default=0)
+
+
+def current_attempt() -> int:
+    return _attempt.get()
+
+
+# -------------------- Política --------------------
+@dataclass
+class RetryPolicy:
+    """Decide se e quanto esperar antes de repetir uma chamada.
+
+    Args:
+        max_attempts: Número máximo de tentativas (incluindo a primeira)
+        base_delay: Espera base; a tentativa n espera até base_delay * 2^n
+        max_delay: Teto da espera entre tentativas (`RETRY_MAX_DELAY`)
+        idempotent: False para escritas que não podem ser repetidas às cegas
+            (ex.: insert): só repete falhas SAFE
+        retry_unknown: Trata erros FATAL como transitórios (comportamento
+            antigo de `execute_with_retry(retry_on_network_error=False)`)
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.3
+    max_delay: float = field(default_factory=lambda: settings.retry_max_delay)
+    idempotent: bool = True
+    retry_unknown: bool = False
+
+    def backoff(self, attempt: int) -> float:
+        # Jitter completo: uniforme entre 0 e o teto exponencial
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        if attempt >= self.max_attempts - 1:
+            return False
+        kind = classify(error)
+        if kind == FATAL:
+            if not (self.retry_unknown and isinstance(error, Exception)):
+                return False
+            kind = TRANSIENT
+        if kind == TRANSIENT and not self.idempotent:
+            return False
+        budget = _budget.get()
+        return budget is None or budget.take()
+
+    def call(self, func: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            token = _attempt.set(attempt)
+            try:
+                return func()
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+            finally:
+                _attempt.reset(token)
+
+    async def acall(self, func: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            token = _attempt.set(attempt)
+            try:
+                return await func()
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+            finally:
+                _attempt.reset(token)
@@ -1,29 +1,88 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 import os
 import time
 
 from flask import Blueprint, request
 
 from .auth import require_auth
+from .cache import SWRCache
+from .categories import category_names
+from .conditional import conditional
+from .config import settings
+from .geo import campos_cep
+from .listagens import (
+    DONO_CAMPOS,
+    MIGRATION_BUSCA_ANUNCIOS,
+    aplicar_filtros_anuncios,
+    chave_feed_anuncios,
+    feed_anuncios,
+    filtros_listagem_anuncios,
+    mesclar_busca_anuncios,
+    ordenar_query_anuncios,
+    pagina_busca_anuncios,
+    params_busca_anuncios,
+    params_filtros_anuncios,
+    select_anuncio_query,
+    sem_direcionados,
+)
+from .loaders import get_usuario_loader
+from .retry import is_missing_function
+from .singleflight import single_flight
+from .stale import has_credentials, stale_if_error
+from .storage import ANUNCIO_IMAGES, ensure_bucket
 from .supabase_client import get_admin_client
-from .utils import ok, fail, paginate_params, upload_anuncio_image, delete_anuncio_image
-from .utils import _ensure_bucket
+from .utils import (
+    ok,
+    fail,
+    ids_da_pagina,
+    ordenar_por_ids,
+    paginate_params,
+    rpc_indisponivel,
+    upload_anuncio_image,
+    delete_anuncio_image,
+)
 
 
 anuncios_bp = Blueprint("anuncios", __name__, url_prefix="/api/anuncios")
 
+# Contagens por faceta (GET /api/anuncios/facetas) por filtros normalizados. Não
+# dependem do usuário: valem também para requisições com login.
+_facetas_cache = SWRCache(
+    "anuncios_facetas",
+    settings.anuncios_facetas_cache_size,
+    settings.anuncios_facetas_cache_ttl,
+    settings.anuncios_facetas_cache_swr,
+)
 
-def _select_anuncio_query():
-    # No Supabase, para relacionamentos via foreign key, a sintaxe padrão é: tabela_relacionada(campos)
-    # Como agora temos duas foreign keys para usuarios (usuario_id e profissional_direcionado_id),
-    # precisamos especificar explicitamente qual usar com a sintaxe: tabela!foreign_key_name(campos)
-    # Usamos anuncios_usuario_id_fkey para buscar o dono do anúncio
-    # IMPORTANTE: Incluir profissional_direcionado_id explicitamente para poder filtrar anúncios direcionados
-    return (
-        get_admin_client()
-        .table("anuncios")
-        .select("*, categorias(nome, icone), usuarios!anuncios_usuario_id_fkey(nome, foto_url, email_verificado), profissional_direcionado_id")
-    )
+
+def _invalidar_listagens() -> None:
+    """Escrita em anuncios: limpa o feed e as facetas em cache deste processo."""
+    feed_anuncios.clear()
+    _facetas_cache.clear()
+
+
+def _buscar_anuncios(filtros: Dict[str, Any], args):
+    """Página da busca textual (ranking, filtros e paginação no banco) ou None sem a migration."""
+    from .utils import execute_with_retry
+    page = paginate_params(args)
+    admin = get_admin_client()
+    try:
+        linhas = execute_with_retry(
+            lambda: admin.rpc("buscar_anuncios", params_busca_anuncios(filtros, page)).execute().data or [],
+            max_attempts=3,
+            delay=0.3
+        )
+    except Exception as e:
+        if rpc_indisponivel(e, "buscar_anuncios", MIGRATION_BUSCA_ANUNCIOS):
+            return None
+        raise
+    ids, total = ids_da_pagina(linhas)
+    items = []
+    if ids:
+        q = select_anuncio_query(admin).in_("id", ids)
+        items = ordenar_por_ids(execute_with_retry(lambda: q.execute().data or [], max_attempts=3, delay=0.3), ids)
+        get_usuario_loader().fill(items, "usuario_id", "usuarios", DONO_CAMPOS)
+    return {"items": items, "total": total, **page}
 
 
 @anuncios_bp.get("/meus")
@@ -51,7 +110,7 @@ def meus_anuncios(user_id: str):
     """
     try:
         from .utils import execute_with_retry
-        q = _select_anuncio_query().eq("usuario_id", user_id).order("publicado_em", desc=True)
+        q = select_anuncio_query().eq("usuario_id", user_id).order("publicado_em", desc=True)
         res = execute_with_retry(
             lambda: q.execute().data or [],
             max_attempts=3,
@@ -63,6 +122,8 @@ def meus_anuncios(user_id: str):
 
 
 @anuncios_bp.get("")
+@conditional()
+@stale_if_error("anuncios", public_only=True)
 def list_anuncios():
     """Listar anúncios
     Lista anúncios com filtros opcionais e paginação
@@ -82,7 +143,7 @@ def list_anuncios():
       - name: busca
         in: query
         type: string
-        description: Busca por título ou descrição
+        description: Busca textual em português no título e na descrição (sem acentos, com ranking)
       - name: urgencia
         in: query
         type: string
@@ -96,9 +157,9 @@ def list_anuncios():
       - name: order
         in: query
         type: string
-        enum: [recentes, antigos]
+        enum: [recentes, antigos, relevancia]
         default: recentes
-        description: Ordenação dos resultados
+        description: Ordenação dos resultados (com busca, o padrão é relevancia)
       - name: page
         in: query
         type: integer
@@ -137,162 +198,184 @@ def list_anuncios():
               type: string
     """
     args = request.args
-    tipo = args.get("tipo")
-    categoria_id = args.get("categoria_id")
-    busca = args.get("busca")
-    urgencia = args.get("urgencia")
-    status = args.get("status")
-    order = args.get("order", "recentes")
+    filtros = filtros_listagem_anuncios(args)
 
     try:
-        # Obter user_id do token se autenticado (para filtrar anúncios direcionados)
-        from .auth import get_bearer_token, decode_supabase_jwt
-        current_user_id = None
-        try:
-            token = get_bearer_token()
-            if token:
-                payload = decode_supabase_jwt(token)
-                current_user_id = payload.get("sub")
-        except:
-            pass  # Não autenticado, não filtra por direcionamento
-        
-        q = _select_anuncio_query()
-        # Filtrar anúncios direcionados: NÃO mostrar anúncios direcionados na lista global
-        # Anúncios direcionados aparecem apenas na aba "Propostas Recebidas" do profissional direcionado
-        # Mostrar apenas anúncios gerais (profissional_direcionado_id é NULL)
-        # Tentar filtrar na query; se não funcionar, filtrar em Python depois
-        try:
-            q = q.is_("profissional_direcionado_id", "null")
-        except:
-            pass  # Se o método não existir, filtrar em Python depois
-        
-        if tipo in ("oferta", "oportunidade"):
-            q = q.eq("tipo", tipo)
-        if categoria_id and categoria_id.isdigit():
-            q = q.eq("categoria_id", int(categoria_id))
-        if urgencia in ("normal", "alta"):
-            q = q.eq("urgencia", urgencia)
-        if status in ("disponivel", "fechado", "cancelado"):
-            q = q.eq("status", status)
-        
-        # Filtrar anúncios direcionados: mostrar apenas se for direcionado ao usuário atual ou se for anúncio geral (NULL)
-        # Como o Supabase não tem OR direto, vamos buscar todos e filtrar depois no Python
-        # Por enquanto, vamos buscar todos e filtrar depois
-        if busca:
-            # ilike em titulo ou descricao
-            like = f"%{busca}%"
-            # supabase-py não tem OR simples; usamos RPC utilizando or via querystring? Alternativamente, aplicar filtro via text search não trivial.
-            # Estratégia simples: duas queries e mescla única por id (custo extra aceitável no MVP)
-            q1 = _select_anuncio_query()
-            # Filtrar anúncios direcionados: NÃO mostrar anúncios direcionados na lista global
-            try:
-                q1 = q1.is_("profissional_direcionado_id", "null")
-            except:
-                pass  # Se o método não existir, filtrar em Python depois
-            
-            if tipo in ("oferta", "oportunidade"):
-                q1 = q1.eq("tipo", tipo)
-            if categoria_id and categoria_id.isdigit():
-                q1 = q1.eq("categoria_id", int(categoria_id))
-            if urgencia in ("normal", "alta"):
-                q1 = q1.eq("urgencia", urgencia)
-            if status in ("disponivel", "fechado", "cancelado"):
-                q1 = q1.eq("status", status)
-            from .utils import execute_with_retry
-            by_title = execute_with_retry(
-                lambda: q1.ilike("titulo", like).execute().data or [],
-                max_attempts=3,
-                delay=0.3
-            )
-
-            q2 = _select_anuncio_query()
-            # Filtrar anúncios direcionados: NÃO mostrar anúncios direcionados na lista global
-            try:
-                q2 = q2.is_("profissional_direcionado_id", "null")
-            except:
-                pass  # Se o método não existir, filtrar em Python depois
-            
-            if tipo in ("oferta", "oportunidade"):
-                q2 = q2.eq("tipo", tipo)
-            if categoria_id and categoria_id.isdigit():
-                q2 = q2.eq("categoria_id", int(categoria_id))
-            if urgencia in ("normal", "alta"):
-                q2 = q2.eq("urgencia", urgencia)
-            if status in ("disponivel", "fechado", "cancelado"):
-                q2 = q2.eq("status", status)
-            by_desc = execute_with_retry(
-                lambda: q2.ilike("descricao", like).execute().data or [],
-                max_attempts=3,
-                delay=0.3
-            )
-
-            seen = set()
-            merged = []
-            for it in by_title + by_desc:
-                if it["id"] not in seen:
-                    seen.add(it["id"])
-                    merged.append(it)
-
-            # Se os dados de usuários não vieram no relacionamento, buscar separadamente
-            admin = get_admin_client()
-            for anuncio in merged:
-                if not anuncio.get("usuarios") and anuncio.get("usuario_id"):
-                    try:
-                        user_data = admin.table("usuarios").select("nome, foto_url, email_verificado").eq("id", anuncio["usuario_id"]).single().execute().data
-                        if user_data:
-                            anuncio["usuarios"] = user_data
-                    except Exception:
-                        pass  # Se falhar, deixa sem dados de usuário
-
-            # Filtrar anúncios direcionados: NÃO mostrar anúncios direcionados na lista global
-            # (fallback caso o filtro na query não tenha funcionado)
-            merged = [a for a in merged if not a.get("profissional_direcionado_id")]
-            
-            # ordenar
-            if order == "recentes":
-                merged.sort(key=lambda x: x.get("publicado_em"), reverse=True)
-            elif order == "antigos":
-                merged.sort(key=lambda x: x.get("publicado_em"))
-
-            # Paginação simples via query params
-            page = paginate_params(args)
-            start = page["offset"]
-            end = start + page["limit"]
-            return ok({"items": merged[start:end], "total": len(merged), **page})
-
-        # Sem busca: usar order do banco
-        if order == "recentes":
-            q = q.order("publicado_em", desc=True)
-        elif order == "antigos":
-            q = q.order("publicado_em", desc=False)
-        page = paginate_params(args)
-        q = q.range(page["offset"], page["offset"] + page["limit"] - 1)
-        from .utils import execute_with_retry
-        res = execute_with_retry(
-            lambda: q.execute().data or [],
+        if has_credentials():
+            return ok(_listar_anuncios(filtros, args))
+        # Feed público: mesma página para todos, servida do cache (ver cache.SWRCache)
+        return ok(feed_anuncios.get_or_load(chave_feed_anuncios(filtros, args), lambda: _listar_anuncios(filtros, args)))
+    except Exception as e:
+        return fail(f"Falha ao listar anúncios: {e}", 500)
+
+
+def _listar_anuncios(filtros: Dict[str, Any], args) -> Dict[str, Any]:
+    from .utils import execute_with_retry
+    busca = filtros["busca"]
+    if busca:
+        pagina = _buscar_anuncios(filtros, args)
+        if pagina is not None:
+            return pagina
+        # Sem a migration da busca: ilike em titulo ou descricao
+        like = f"%{busca}%"
+        # supabase-py não tem OR simples; usamos RPC utilizando or via querystring? Alternativamente, aplicar filtro via text search não trivial.
+        # Estratégia simples: duas queries e mescla única por id (custo extra aceitável no MVP)
+        q1 = aplicar_filtros_anuncios(select_anuncio_query(), filtros)
+        by_title = execute_with_retry(
+            lambda: q1.ilike("titulo", like).execute().data or [],
             max_attempts=3,
             delay=0.3
         )
-        
-        # Filtrar anúncios direcionados: NÃO mostrar anúncios direcionados na lista global
-        # (fallback caso o filtro na query não tenha funcionado)
-        res = [a for a in res if not a.get("profissional_direcionado_id")]
-        
-        # Se os dados de usuários não vieram no relacionamento, buscar separadamente
-        admin = get_admin_client()
-        for anuncio in res:
-            if not anuncio.get("usuarios") and anuncio.get("usuario_id"):
-                try:
-                    user_data = admin.table("usuarios").select("nome, foto_url, email_verificado").eq("id", anuncio["usuario_id"]).single().execute().data
-                    if user_data:
-                        anuncio["usuarios"] = user_data
-                except Exception:
-                    pass  # Se falhar, deixa sem dados de usuário
-        
-        # Não temos total facilmente; retornamos somente página
-        return ok({"items": res, **page})
+
+        q2 = aplicar_filtros_anuncios(select_anuncio_query(), filtros)
+        by_desc = execute_with_retry(
+            lambda: q2.ilike("descricao", like).execute().data or [],
+            max_attempts=3,
+            delay=0.3
+        )
+
+        merged = mesclar_busca_anuncios(by_title, by_desc, filtros["order"])
+
+        # Se os dados de usuários não vieram no relacionamento, buscar em lote
+        get_usuario_loader().fill(merged, "usuario_id", "usuarios", DONO_CAMPOS)
+
+        return pagina_busca_anuncios(merged, args)
+
+    # Sem busca: usar order do banco
+    q = ordenar_query_anuncios(aplicar_filtros_anuncios(select_anuncio_query(), filtros), filtros["order"])
+    page = paginate_params(args)
+    q = q.range(page["offset"], page["offset"] + page["limit"] - 1)
+    res = execute_with_retry(
+        lambda: q.execute().data or [],
+        max_attempts=3,
+        delay=0.3
+    )
+    res = sem_direcionados(res)
+    
+    # Se os dados de usuários não vieram no relacionamento, buscar em lote
+    get_usuario_loader().fill(res, "usuario_id", "usuarios", DONO_CAMPOS)
+    
+    # Não temos total facilmente; retornamos somente página
+    return {"items": res, **page}
+
+
+# Contagens por faceta no banco: db/migration_facetas_anuncios.sql (função facetas_anuncios)
+_MIGRATION_FACETAS = "migration_facetas_anuncios.sql"
+_FACETAS = ("categoria_id", "tipo", "urgencia", "status")
+
+
+def _chave_facetas(params: Dict[str, Any]) -> tuple:
+    """Chave das facetas: filtros já normalizados; a busca ignora maiúsculas e espaços nas pontas."""
+    busca = (params["p_busca"] or "").strip().lower() or None
+    return (busca, params["p_tipo"], params["p_categoria_id"], params["p_urgencia"], params["p_status"])
+
+
+def _carregar_facetas(params: Dict[str, Any]) -> Dict[str, Any]:
+    """{total, facetas: {faceta: [{valor, total}]}} a partir de uma chamada a `facetas_anuncios`."""
+    from .utils import execute_with_retry
+    admin = get_admin_client()
+    linhas = execute_with_retry(
+        lambda: admin.rpc("facetas_anuncios", params).execute().data or [],
+        max_attempts=3,
+        delay=0.3
+    )
+    total = 0
+    facetas: Dict[str, List[Dict[str, Any]]] = {f: [] for f in _FACETAS}
+    for linha in linhas:
+        if linha.get("faceta") == "total":
+            total = linha.get("total") or 0
+        elif linha.get("faceta") in facetas:
+            valor = linha.get("valor")
+            if linha["faceta"] == "categoria_id" and valor is not None:
+                valor = int(valor)
+            facetas[linha["faceta"]].append({"valor": valor, "total": linha.get("total") or 0})
+    for itens in facetas.values():
+        itens.sort(key=lambda i: (-i["total"], str(i["valor"])))
+    nomes = category_names(i["valor"] for i in facetas["categoria_id"])
+    for item in facetas["categoria_id"]:
+        item["nome"] = nomes.get(item["valor"])
+    return {"total": total, "facetas": facetas}
+
+
+@anuncios_bp.get("/facetas")
+@conditional()
+def facetas_anuncios():
+    """Contagens por faceta
+    Quantos anúncios há por categoria, tipo, urgência e status com os filtros de GET /api/anuncios
+    ---
+    tags:
+      - Anúncios
+    parameters:
+      - name: tipo
+        in: query
+        type: string
+        enum: [oferta, oportunidade]
+      - name: categoria_id
+        in: query
+        type: integer
+      - name: busca
+        in: query
+        type: string
+        description: Mesma busca textual de GET /api/anuncios
+      - name: urgencia
+        in: query
+        type: string
+        enum: [normal, alta]
+      - name: status
+        in: query
+        type: string
+        enum: [disponivel, fechado, cancelado]
+    responses:
+      200:
+        description: >
+          Contagens por valor de cada faceta. Cada faceta é contada com todos os
+          filtros, menos o dela (com categoria_id=3, as outras categorias continuam
+          com as suas contagens); total considera todos os filtros.
+        schema:
+          type: object
+          properties:
+            total:
+              type: integer
+            facetas:
+              type: object
+              properties:
+                categoria_id:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      valor:
+                        type: integer
+                      nome:
+                        type: string
+                      total:
+                        type: integer
+                tipo:
+                  type: array
+                  items:
+                    type: object
+                urgencia:
+                  type: array
+                  items:
+                    type: object
+                status:
+                  type: array
+                  items:
+                    type: object
+      503:
+        description: Migration das facetas não aplicada
+      500:
+        description: Erro ao contar anúncios
+    """
+    filtros = filtros_listagem_anuncios(request.args)
+    params = {"p_busca": filtros["busca"], **params_filtros_anuncios(filtros)}
+    try:
+        # As contagens não dependem do usuário: mesmo cache com ou sem login
+        return ok(_facetas_cache.get_or_load(_chave_facetas(params), lambda: _carregar_facetas(params)))
     except Exception as e:
-        return fail(f"Falha ao listar anúncios: {e}", 500)
+        if is_missing_function(e):
+            return fail(f"Contagens indisponíveis: aplique db/{_MIGRATION_FACETAS}", 503)
+        return fail(f"Falha ao contar anúncios: {e}", 500)
 
 
 @anuncios_bp.post("")
@@ -338,6 +421,10 @@ def create_anuncio(user_id: str):
               type: string
               description: Localização onde o serviço será prestado
               example: "São Paulo, SP"
+            cep:
+              type: string
+              description: CEP do local do serviço; grava as coordenadas usadas na busca por raio (/api/geo/anuncios)
+              example: "01310-100"
             preco_min:
               type: number
               format: float
@@ -413,11 +500,17 @@ def create_anuncio(user_id: str):
         if not body.get(r):
             return fail(f"Campo obrigatório: {r}", 400)
 
+    dados_cep: Dict[str, Any] = {}
+    if body.get("cep"):
+        dados_cep = campos_cep(body.get("cep"))
+        if dados_cep is None:
+            return fail("CEP inválido", 400)
+
     # Processa imagens: se vierem como data URLs, faz upload
     imagens = body.get("imagens") or []
     imagens_processadas = []
     admin = get_admin_client()
-    bucket = 'img-anuncios'
+    bucket = ANUNCIO_IMAGES
     
     if imagens:
         for img in imagens:
@@ -452,6 +545,7 @@ def create_anuncio(user_id: str):
         "imagens": imagens_processadas,
         "requisitos": body.get("requisitos") or [],
     }
+    payload.update(dados_cep)
     
     # Adicionar profissional_direcionado_id se fornecido (para anúncios direcionados)
     # Nota: Se a coluna não existir no banco (migration não aplicada), o insert falhará
@@ -469,21 +563,24 @@ def create_anuncio(user_id: str):
         if "profissional_direcionado_id" in error_str and ("does not exist" in error_str or "42703" in error_str):
             # Remover o campo e tentar novamente
             payload.pop("profissional_direcionado_id", None)
-            res = get_admin_client().table("anuncios").insert(payload).execute()
-            anuncio_criado = (res.data or [None])[0]
+            try:
+                res = get_admin_client().table("anuncios").insert(payload).execute()
+                anuncio_criado = (res.data or [None])[0]
+            except Exception as e:
+                return fail(f"Falha ao criar anúncio: {e}", 400)
         else:
-            raise  # Re-lançar se for outro erro
-        
-        # Se o anúncio foi criado e tem imagens, reorganiza no storage
-        if anuncio_criado and anuncio_criado.get("id") and imagens_processadas:
-            # Nota: reorganização de imagens pode ser feita em background se necessário
-            pass
-        
-        return ok(anuncio_criado, 201)
-    except Exception as e:
-        return fail(f"Falha ao criar anúncio: {e}", 400)
+            return fail(f"Falha ao criar anúncio: {e}", 400)
 
+    # Se o anúncio foi criado e tem imagens, reorganiza no storage
+    if anuncio_criado and anuncio_criado.get("id") and imagens_processadas:
+        # Nota: reorganização de imagens pode ser feita em background se necessário
+        pass
 
+    _invalidar_listagens()
+    return ok(anuncio_criado, 201)
+
+
+@single_flight("anuncio")
 def _anuncio_by_id(anuncio_id: int):
     return (
         get_admin_client()
@@ -497,6 +594,7 @@ def _anuncio_by_id(anuncio_id: int):
 
 
 @anuncios_bp.get("/<int:anuncio_id>")
+@conditional()
 def get_anuncio(anuncio_id: int):
     """Obter anúncio por ID
     Retorna os detalhes de um anúncio específico
@@ -534,6 +632,7 @@ def get_anuncio(anuncio_id: int):
         data = _anuncio_by_id(anuncio_id)
         if not data:
             return fail("Anúncio não encontrado", 404)
+        get_usuario_loader().fill([data], "usuario_id", "usuarios", DONO_CAMPOS)
         return ok(data)
     except Exception as e:
         return fail(f"Falha ao obter anúncio: {e}", 500)
@@ -570,6 +669,9 @@ def update_anuncio(user_id: str, anuncio_id: int):
               type: string
             localizacao:
               type: string
+            cep:
+              type: string
+              description: CEP do local do serviço (vazio remove o CEP e as coordenadas)
             preco_min:
               type: number
             preco_max:
@@ -654,7 +756,7 @@ def update_anuncio(user_id: str, anuncio_id: int):
                     # Processa imagens: se vierem como data URLs, faz upload
                     imagens_processadas = []
                     admin = get_admin_client()
-                    bucket = 'img-anuncios'
+                    bucket = ANUNCIO_IMAGES
                     
                     for img in v:
                         if isinstance(img, str):
@@ -674,6 +776,17 @@ def update_anuncio(user_id: str, anuncio_id: int):
                 else:
                     update_payload[k] = v
         
+        if "cep" in body:
+            if body.get("cep") in (None, ""):
+                # Só limpa se as colunas existem (migration_geo_cep.sql aplicada)
+                if "cep" in current:
+                    update_payload.update(cep=None, latitude=None, longitude=None, geo_precisao=None)
+            else:
+                dados_cep = campos_cep(body.get("cep"))
+                if dados_cep is None:
+                    return fail("CEP inválido", 400)
+                update_payload.update(dados_cep)
+
         if not update_payload:
             return fail("Nenhum campo válido para atualizar", 400)
         
@@ -684,6 +797,7 @@ def update_anuncio(user_id: str, anuncio_id: int):
             .eq("id", anuncio_id)
             .execute()
         )
+        _invalidar_listagens()
         return ok((res.data or [None])[0])
     except Exception as e:
         return fail(f"Falha ao atualizar anúncio: {e}", 400)
@@ -765,8 +879,8 @@ def upload_imagem_anuncio(user_id: str):
             anuncio_id_int = None
     
     admin = get_admin_client()
-    bucket = 'img-anuncios'
-    _ensure_bucket(admin, bucket)
+    bucket = ANUNCIO_IMAGES
+    ensure_bucket(admin, bucket)
     
     try:
         file_data = file.read()
@@ -854,12 +968,13 @@ def delete_anuncio(user_id: str, anuncio_id: int):
         imagens = current.get("imagens") or []
         if imagens:
             admin = get_admin_client()
-            bucket = 'img-anuncios'
+            bucket = ANUNCIO_IMAGES
             for img_url in imagens:
                 if isinstance(img_url, str):
                     delete_anuncio_image(admin, bucket, img_url)
         
         get_admin_client().table("anuncios").delete().eq("id", anuncio_id).execute()
+        _invalidar_listagens()
         return ok({"deleted": True})
     except Exception as e:
         return fail(f"Falha ao excluir anúncio: {e}", 400)
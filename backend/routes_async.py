@@ -0,0 +1,272 @@
+"""Handlers assíncronos dos endpoints de leitura mais acessados (modo ASGI).
+
+Servidos por `asgi.py` com o `supabase.AsyncClient`: enquanto uma query está
+em voo o event loop atende outras requisições, sem uma thread por requisição.
+Os filtros, a montagem e a paginação são os mesmos helpers das rotas Flask,
+de modo que o contrato JSON é idêntico; só a execução das queries muda.
+"""
+from typing import Any, Dict, List
+
+from .auth import AuthError, bearer_token_from, user_id_from_token
+from .categories import acategory_names, amatching_ids
+from .concurrency import gather_parallel
+from .loaders import UsuarioLoader
+from .listagens import (
+    DONO_CAMPOS,
+    MIGRATION_BUSCA_ANUNCIOS,
+    MIGRATION_BUSCA_PROFISSIONAIS,
+    agrupar_contratacoes,
+    aplicar_filtros_anuncios,
+    chave_feed_anuncios,
+    feed_anuncios,
+    filtros_listagem_anuncios,
+    filtros_profissionais,
+    lotes_conversas,
+    medias_avaliacoes,
+    mesclar_busca_anuncios,
+    montar_listagem_profissionais,
+    ordenar_conversas,
+    ordenar_query_anuncios,
+    pagina_busca_anuncios,
+    params_busca_anuncios,
+    params_busca_profissionais,
+    query_conversas,
+    query_mensagens_lote,
+    query_profissionais,
+    select_anuncio_query,
+    sem_direcionados,
+)
+from .stale import has_credentials
+from .supabase_client import get_async_admin_client
+from .utils import (
+    aexecute_with_retry,
+    guardar_perfis_worker,
+    ids_da_pagina,
+    montar_perfis_worker,
+    ordenar_por_ids,
+    paginate_params,
+    perfis_worker_em_cache,
+    rpc_indisponivel,
+)
+
+
+async def _dados(q) -> List[Dict[str, Any]]:
+    return (await q.execute()).data or []
+
+
+async def _consultar(q, max_attempts: int = 3, delay: float = 0.3) -> List[Dict[str, Any]]:
+    return await aexecute_with_retry(lambda: _dados(q), max_attempts=max_attempts, delay=delay)
+
+
+def _usuario_autenticado(req) -> str:
+    token = bearer_token_from(req.headers, req.cookies)
+    if not token:
+        raise AuthError("Authorization header missing", 401)
+    return user_id_from_token(token)
+
+
+# -------------------- GET /api/anuncios --------------------
+async def _buscar_anuncios(admin, loader: UsuarioLoader, filtros: Dict[str, Any], args):
+    """Equivalente assíncrono de `routes_anuncios._buscar_anuncios`."""
+    page = paginate_params(args)
+    try:
+        linhas = await _consultar(admin.rpc("buscar_anuncios", params_busca_anuncios(filtros, page)))
+    except Exception as e:
+        if rpc_indisponivel(e, "buscar_anuncios", MIGRATION_BUSCA_ANUNCIOS):
+            return None
+        raise
+    ids, total = ids_da_pagina(linhas)
+    items = []
+    if ids:
+        items = ordenar_por_ids(await _consultar(select_anuncio_query(admin).in_("id", ids)), ids)
+        await loader.afill(items, "usuario_id", "usuarios", DONO_CAMPOS)
+    return {"items": items, "total": total, **page}
+
+
+async def _listar_anuncios(filtros: Dict[str, Any], args) -> Dict[str, Any]:
+    admin = await get_async_admin_client()
+    loader = UsuarioLoader(admin)
+    busca = filtros["busca"]
+    if busca:
+        pagina = await _buscar_anuncios(admin, loader, filtros, args)
+        if pagina is not None:
+            return pagina
+        like = f"%{busca}%"
+        res = await gather_parallel({
+            "titulo": lambda: _dados(aplicar_filtros_anuncios(select_anuncio_query(admin), filtros).ilike("titulo", like)),
+            "descricao": lambda: _dados(aplicar_filtros_anuncios(select_anuncio_query(admin), filtros).ilike("descricao", like)),
+        }, max_attempts=3, delay=0.3)
+        merged = mesclar_busca_anuncios(res["titulo"], res["descricao"], filtros["order"])
+        await loader.afill(merged, "usuario_id", "usuarios", DONO_CAMPOS)
+        return pagina_busca_anuncios(merged, args)
+
+    q = ordenar_query_anuncios(aplicar_filtros_anuncios(select_anuncio_query(admin), filtros), filtros["order"])
+    page = paginate_params(args)
+    q = q.range(page["offset"], page["offset"] + page["limit"] - 1)
+    res = sem_direcionados(await _consultar(q))
+    await loader.afill(res, "usuario_id", "usuarios", DONO_CAMPOS)
+    return {"items": res, **page}
+
+
+async def list_anuncios(req):
+    args = req.args
+    filtros = filtros_listagem_anuncios(args)
+    try:
+        if has_credentials():
+            return await _listar_anuncios(filtros, args), 200
+        # Feed público: mesmo cache do modo WSGI (listagens.feed_anuncios)
+        return await feed_anuncios.aget_or_load(chave_feed_anuncios(filtros, args), lambda: _listar_anuncios(filtros, args)), 200
+    except Exception as e:
+        return {"error": f"Falha ao listar anúncios: {e}"}, 500
+
+
+# -------------------- GET /api/profissionais --------------------
+async def _perfis_worker(admin, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Equivalente assíncrono de `utils.build_worker_profile_batch`."""
+    result_map, user_ids, geracao = perfis_worker_em_cache(user_ids)
+    if not user_ids:
+        return result_map
+    try:
+        res = await gather_parallel({
+            "perfis": lambda: _dados(admin.table("perfil_worker").select("*").in_("user_id", user_ids)),
+            "categorias": lambda: _dados(admin.table("worker_categorias").select("user_id, categoria_id").in_("user_id", user_ids)),
+            "portfolios": lambda: _dados(admin.table("worker_portfolio").select("user_id, id, url").in_("user_id", user_ids).order("id")),
+        }, max_attempts=2, delay=0.2)
+        categoria_ids = list({wc.get("categoria_id") for wc in res["categorias"] if wc.get("categoria_id")})
+        completo = True
+        try:
+            categorias_map = await acategory_names(categoria_ids)
+        except Exception:
+            categorias_map = {}
+            completo = False
+        perfis = montar_perfis_worker(res["perfis"], res["categorias"], res["portfolios"], categorias_map)
+        if completo:
+            guardar_perfis_worker(user_ids, perfis, geracao)
+        result_map.update(perfis)
+    except Exception as e:
+        print(f"[AVISO] Erro ao buscar perfis em lote: {e}")
+    return result_map
+
+
+async def _avaliacoes_e_estatisticas(admin, user_ids: List[str]):
+    """Equivalente assíncrono de `listagens.avaliacoes_e_estatisticas`."""
+    avaliacoes_map: Dict[str, Dict[str, Any]] = {}
+    estatisticas_map: Dict[str, Dict[str, Any]] = {}
+    try:
+        contratacoes = await _consultar(
+            admin.table("contratacoes").select("id, usuario_id_contratado, status").in_("usuario_id_contratado", user_ids),
+            2, 0.2,
+        )
+        estatisticas_map, prof_por_contratacao = agrupar_contratacoes(contratacoes)
+        if contratacoes:
+            avaliacoes = await _consultar(
+                admin.table("avaliacoes").select("contratacao_id, nota").in_("contratacao_id", list(prof_por_contratacao.keys())),
+                2, 0.2,
+            )
+            avaliacoes_map = medias_avaliacoes(avaliacoes, prof_por_contratacao)
+    except Exception as e:
+        print(f"[AVISO] Erro ao buscar avaliações/estatísticas em lote: {e}")
+    return avaliacoes_map, estatisticas_map
+
+
+async def _pagina_profissionais(admin, filtros: Dict[str, str], cat_ids: List[int], page_params: Dict[str, int]):
+    """Equivalente assíncrono de `routes_profissionais._pagina_profissionais`."""
+    if filtros["busca"] or filtros["localizacao"]:
+        try:
+            linhas = await _consultar(admin.rpc(
+                "buscar_profissionais", params_busca_profissionais(filtros, cat_ids, page_params),
+            ))
+        except Exception as e:
+            if not rpc_indisponivel(e, "buscar_profissionais", MIGRATION_BUSCA_PROFISSIONAIS):
+                raise
+        else:
+            ids, total = ids_da_pagina(linhas)
+            if not ids:
+                return [], total
+            rows = await _consultar(admin.table("usuarios").select("*").in_("id", ids))
+            return ordenar_por_ids(rows, ids), total
+
+    q = query_profissionais(admin, filtros, cat_ids, page_params)
+    pagina = await aexecute_with_retry(lambda: q.execute(), max_attempts=3, delay=0.3)
+    return pagina.data or [], pagina.count or 0
+
+
+async def listar_profissionais(req):
+    filtros = filtros_profissionais(req.args)
+    categoria = filtros["categoria"]
+    try:
+        admin = await get_async_admin_client()
+        page_params = paginate_params(req.args)
+
+        cat_ids: List[int] = []
+        if categoria:
+            try:
+                cat_ids = await amatching_ids(categoria)
+            except Exception:
+                cat_ids = []
+
+        rows, total = await _pagina_profissionais(admin, filtros, cat_ids, page_params)
+
+        user_ids = [p.get("id") for p in rows if p.get("id")]
+        worker_profiles_map: Dict[str, Dict[str, Any]] = {}
+        avaliacoes_map: Dict[str, Dict[str, Any]] = {}
+        estatisticas_map: Dict[str, Dict[str, Any]] = {}
+        if user_ids:
+            res = await gather_parallel({
+                "perfis": lambda: _perfis_worker(admin, user_ids),
+                "stats": lambda: _avaliacoes_e_estatisticas(admin, user_ids),
+            }, max_attempts=1, defaults={"perfis": {}, "stats": ({}, {})})
+            worker_profiles_map = res["perfis"]
+            avaliacoes_map, estatisticas_map = res["stats"]
+
+        return montar_listagem_profissionais(rows, total, worker_profiles_map, avaliacoes_map, estatisticas_map, page_params), 200
+    except Exception as e:
+        print(f"[ERRO] Falha ao listar profissionais: {e}")
+        return {"error": f"Falha ao listar profissionais: {str(e)}"}, 500
+
+
+# -------------------- GET /api/conversas --------------------
+async def listar_conversas(req):
+    user_id = _usuario_autenticado(req)
+    try:
+        admin = await get_async_admin_client()
+        res = await gather_parallel({
+            "a": lambda: _dados(query_conversas(admin, "usuario_a_id", user_id)),
+            "b": lambda: _dados(query_conversas(admin, "usuario_b_id", user_id)),
+        }, max_attempts=3, delay=0.3)
+        merged = {c["id"]: c for c in (res["a"] + res["b"])}
+        conversas_list = list(merged.values())
+
+        mensagens_por_lote = []
+        lotes = lotes_conversas([c["id"] for c in conversas_list])
+        if lotes:
+            por_lote = await gather_parallel(
+                {k: (lambda ids=ids: _dados(query_mensagens_lote(admin, ids))) for k, ids in lotes.items()},
+                max_attempts=2,
+                delay=0.2,
+                defaults={k: [] for k in lotes},
+            )
+            mensagens_por_lote = list(por_lote.values())
+
+        return {"items": ordenar_conversas(conversas_list, mensagens_por_lote)}, 200
+    except Exception as e:
+        return {"error": f"Falha ao listar conversas: {e}"}, 500
+
+
+# (método, caminho) -> handler. Demais rotas seguem pelo app Flask.
+ASYNC_ROUTES = {
+    ("GET", "/api/anuncios"): list_anuncios,
+    ("GET", "/api/profissionais"): listar_profissionais,
+    ("GET", "/api/conversas"): listar_conversas,
+}
+
+# handler -> argumentos de stale.remember_or_fallback (mesmos do @stale_if_error da rota Flask)
+STALE_IF_ERROR = {
+    list_anuncios: {"name": "anuncios", "public_only": True},
+}
+
+# handler -> argumentos de conditional.conditional_response (mesmos do @conditional da rota Flask)
+CONDITIONAL = {
+    list_anuncios: {},
+    listar_profissionais: {},
+}
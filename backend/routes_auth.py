@@ -344,6 +344,12 @@ def refresh():
     tags:
       - Auth
     parameters:
+      - name: include
+        in: query
+        type: string
+        required: false
+        description: "Use `profile` para receber também o perfil do usuário"
+        example: profile
       - name: body
         in: body
         required: true
@@ -373,6 +379,7 @@ def refresh():
                   type: string
             profile:
               $ref: '#/definitions/Usuario'
+              description: Só com include=profile
             access_token:
               type: string
               description: Novo token JWT
@@ -418,15 +425,18 @@ def refresh():
         return jsonify({"error": "Refresh inválido"}), 401
 
     user_id = user.id if hasattr(user, "id") else user.get("id")
-    try:
-        profile = get_current_user_profile(user_id)
-    except Exception:
-        profile = None
+    body = {"user": {"id": user_id, "email": getattr(user, "email", None)}}
+    # Renovar token não precisa do perfil: só com ?include=profile
+    if "profile" in (request.args.get("include") or "").split(","):
+        try:
+            body["profile"] = get_current_user_profile(user_id)
+        except Exception:
+            body["profile"] = None
 
     resp = attach_session_cookies(
         getattr(session, "access_token", None),
         getattr(session, "refresh_token", None),
-        {"user": {"id": user_id, "email": getattr(user, "email", None)}, "profile": profile},
+        body,
     )
     return resp
 
@@ -1,10 +1,13 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from flask import Blueprint, request
 
 from .auth import require_auth
+from .conditional import conditional
+from .retry import is_transient
+from .singleflight import single_flight
 from .supabase_client import get_admin_client
-from .utils import ok, fail
+from .utils import ok, fail, execute_with_retry
 
 
 avaliacoes_bp = Blueprint("avaliacoes", __name__, url_prefix="/api/avaliacoes")
@@ -58,79 +61,53 @@ def listar_avaliacoes():
         return fail(f"Falha ao listar avaliações: {e}", 500)
 
 
+@single_flight("avaliacoes_por_contratado")
+def _avaliacoes_recebidas(usuario_id: str) -> List[Dict[str, Any]]:
+    """Avaliações das contratações em que o usuário foi contratado ([] se a busca falhar)."""
+    admin = get_admin_client()
+    # contratações onde este usuário foi contratado
+    try:
+        cs = execute_with_retry(
+            lambda: admin.table("contratacoes").select("id").eq("usuario_id_contratado", usuario_id).execute().data or [],
+            max_attempts=2,
+            delay=0.3
+        )
+    except Exception:
+        # Falha ao buscar: retornar valores padrão
+        cs = []
+    
+    cids = [c["id"] for c in cs]
+    if not cids:
+        return []
+    
+    try:
+        return execute_with_retry(
+            lambda: admin.table("avaliacoes").select("*").in_("contratacao_id", cids).execute().data or [],
+            max_attempts=2,
+            delay=0.3
+        )
+    except Exception:
+        return []
+
+
 @avaliacoes_bp.get("/por-contratado/<usuario_id>")
+@conditional()
 def avaliacoes_por_contratado(usuario_id: str):
     try:
         admin = get_admin_client()
         if not admin:
             return ok({"items": [], "media": 0, "total": 0})
         
-        # contratações onde este usuário foi contratado
         try:
-            # Tentar buscar com retry para lidar com WinError 10035
-            cs = None
-            max_tentativas = 2
-            for tentativa in range(max_tentativas):
-                try:
-                    cs = admin.table("contratacoes").select("id").eq("usuario_id_contratado", usuario_id).execute().data or []
-                    break  # Sucesso, sair do loop
-                except Exception as e:
-                    error_str = str(e)
-                    is_network_error = (
-                        "WinError 10035" in error_str or
-                        "10035" in error_str or
-                        "socket" in error_str.lower() or
-                        "network" in error_str.lower()
-                    )
-                    if is_network_error and tentativa < max_tentativas - 1:
-                        import time
-                        time.sleep(0.3)
-                        continue
-                    # Se não for erro de rede ou última tentativa, retornar valores padrão
-                    cs = []
-                    break
-            
-            cids = [c["id"] for c in (cs or [])]
-            if not cids:
-                return ok({"items": [], "media": 0, "total": 0})
-            
-            # Tentar buscar avaliações com retry
-            avs = None
-            for tentativa in range(max_tentativas):
-                try:
-                    avs = admin.table("avaliacoes").select("*").in_("contratacao_id", cids).execute().data or []
-                    break  # Sucesso, sair do loop
-                except Exception as e:
-                    error_str = str(e)
-                    is_network_error = (
-                        "WinError 10035" in error_str or
-                        "10035" in error_str or
-                        "socket" in error_str.lower() or
-                        "network" in error_str.lower()
-                    )
-                    if is_network_error and tentativa < max_tentativas - 1:
-                        import time
-                        time.sleep(0.3)
-                        continue
-                    # Se não for erro de rede ou última tentativa, retornar valores padrão
-                    avs = []
-                    break
+            avs = _avaliacoes_recebidas(usuario_id)
             
-            notas = [a.get("nota") for a in (avs or []) if a.get("nota") is not None]
+            notas = [a.get("nota") for a in avs if a.get("nota") is not None]
             media = round(sum(notas) / len(notas), 2) if notas else 0
-            return ok({"items": avs or [], "media": media, "total": len(notas)})
+            return ok({"items": avs, "media": media, "total": len(notas)})
         except Exception as e:
             # Se houver erro geral, retorna valores padrão silenciosamente
-            error_str = str(e)
-            is_network_error = (
-                "WinError 10035" in error_str or
-                "10035" in error_str or
-                "socket" in error_str.lower() or
-                "network" in error_str.lower()
-            )
-            # Só logar se não for erro de rede
-            if not is_network_error:
-                import traceback
+            # Só logar se não for falha transitória de rede
+            if not is_transient(e):
                 print(f"[AVISO] Erro ao buscar avaliações para {usuario_id}: {e}")
             return ok({"items": [], "media": 0, "total": 0})
     except Exception as e:
@@ -1,5 +1,7 @@
-from flask import Blueprint, request
+from flask import Blueprint, Response, make_response, request
 
+from .categories import catalog
+from .stale import stale_if_error
 from .supabase_client import get_admin_client
 from .utils import ok, fail
 
@@ -8,18 +10,20 @@ categorias_bp = Blueprint("categorias", __name__, url_prefix="/api/categorias")
 
 
 @categorias_bp.get("")
+@stale_if_error("categorias")
 def list_categorias():
     try:
-        from .utils import execute_with_retry
-        admin = get_admin_client()
-        data = execute_with_retry(
-            lambda: admin.table("categorias").select("*").order("id").execute().data or [],
-            max_attempts=3,
-            delay=0.3
-        )
-        return ok({"items": data})
+        snapshot = catalog.get()
     except Exception as e:
         return fail(f"Falha ao listar categorias: {e}", 500)
+    # Catálogo muda pouco: o cliente revalida com If-None-Match e recebe 304
+    if request.if_none_match.contains(snapshot.etag):
+        response = Response(status=304)
+    else:
+        response = make_response(ok({"items": snapshot.items}))
+    response.set_etag(snapshot.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @categorias_bp.post("")
@@ -34,6 +38,11 @@ def create_categoria():
     }
     try:
         res = get_admin_client().table("categorias").insert(payload).execute()
-        return ok((res.data or [None])[0], 201)
     except Exception as e:
         return fail(f"Falha ao criar categoria: {e}", 400)
+    try:
+        catalog.refresh()
+    except Exception as e:
+        print(f"[AVISO] Falha ao recarregar catálogo de categorias: {e}")
+        catalog.invalidate()
+    return ok((res.data or [None])[0], 201)
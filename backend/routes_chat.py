@@ -3,6 +3,7 @@ from typing import Any, Dict
 from flask import Blueprint, request
 
 from .auth import require_auth
+from .listagens import lotes_conversas, ordenar_conversas, query_conversas, query_mensagens_lote
 from .supabase_client import get_admin_client
 from .utils import ok, fail
 
@@ -18,78 +19,35 @@ def _conversa_participa(conversa: Dict[str, Any], user_id: str) -> bool:
 @require_auth
 def listar_conversas(user_id: str):
     try:
-        from .utils import execute_with_retry
+        from .concurrency import run_parallel
         admin = get_admin_client()
-        # busca conversas onde usuário é A ou B com retry
-        a = execute_with_retry(
-            lambda: admin.table("conversas")
-                .select("*")
-                .eq("usuario_a_id", user_id)
-                .execute()
-                .data or [],
-            max_attempts=3,
-            delay=0.3
-        )
-        b = execute_with_retry(
-            lambda: admin.table("conversas")
-                .select("*")
-                .eq("usuario_b_id", user_id)
-                .execute()
-                .data or [],
-            max_attempts=3,
-            delay=0.3
-        )
+        # busca conversas onde usuário é A ou B (em paralelo, com retry)
+        res = run_parallel({
+            "a": lambda: query_conversas(admin, "usuario_a_id", user_id).execute().data or [],
+            "b": lambda: query_conversas(admin, "usuario_b_id", user_id).execute().data or [],
+        }, max_attempts=3, delay=0.3)
         # Mesclar conversas
-        merged = {c["id"]: c for c in (a + b)}
+        merged = {c["id"]: c for c in (res["a"] + res["b"])}
         conversas_list = list(merged.values())
         
         # Buscar última mensagem de cada conversa para ordenação (otimizado)
-        conversa_ids = [c["id"] for c in conversas_list]
-        ultimas_mensagens = {}
-        
-        if conversa_ids:
+        mensagens_por_lote = []
+        lotes = lotes_conversas([c["id"] for c in conversas_list])
+        if lotes:
             try:
-                # Buscar todas as mensagens das conversas de uma vez
-                # Processar em lotes para evitar queries muito grandes
-                batch_size = 30
-                for i in range(0, len(conversa_ids), batch_size):
-                    batch_ids = conversa_ids[i:i + batch_size]
-                    try:
-                        # Buscar todas as mensagens do lote ordenadas por data
-                        todas_mensagens = execute_with_retry(
-                            lambda: admin.table("mensagens")
-                                .select("conversa_id, enviada_em")
-                                .in_("conversa_id", batch_ids)
-                                .order("enviada_em", desc=True)
-                                .execute()
-                                .data or [],
-                            max_attempts=2,
-                            delay=0.2
-                        )
-                        
-                        # Agrupar por conversa_id e pegar a primeira (mais recente) de cada uma
-                        for msg in todas_mensagens:
-                            conv_id = msg.get("conversa_id")
-                            if conv_id and conv_id not in ultimas_mensagens:
-                                ultimas_mensagens[conv_id] = msg.get("enviada_em")
-                    except Exception as e:
-                        # Se falhar, continuar sem última mensagem para esse lote
-                        print(f"[AVISO] Erro ao buscar últimas mensagens do lote: {e}")
+                # Se um lote falhar, continuar sem última mensagem para esse lote
+                por_lote = run_parallel(
+                    {k: (lambda ids=ids: query_mensagens_lote(admin, ids).execute().data or []) for k, ids in lotes.items()},
+                    max_attempts=2,
+                    delay=0.2,
+                    defaults={k: [] for k in lotes},
+                )
+                mensagens_por_lote = list(por_lote.values())
             except Exception as e:
                 # Se falhar completamente, continuar sem última mensagem
                 print(f"[AVISO] Erro ao buscar últimas mensagens: {e}")
         
-        # Ordenar por última mensagem (se houver) ou data de criação
-        def get_sort_key(conv):
-            conv_id = conv.get("id")
-            # Priorizar última mensagem, senão usar data de criação
-            ultima_msg_time = ultimas_mensagens.get(conv_id)
-            if ultima_msg_time:
-                return ultima_msg_time
-            return conv.get("criado_em", "")
-        
-        conversas_list.sort(key=get_sort_key, reverse=True)
-        return ok({"items": conversas_list})
+        return ok({"items": ordenar_conversas(conversas_list, mensagens_por_lote)})
     except Exception as e:
         return fail(f"Falha ao listar conversas: {e}", 500)
 
@@ -168,7 +126,8 @@ def criar_conversa(user_id: str):
         res = execute_with_retry(
             lambda: admin.table("conversas").insert(payload).execute(),
             max_attempts=2,
-            delay=0.2
+            delay=0.2,
+            idempotent=False
         )
         return ok((res.data or [None])[0], 201)
     except Exception as e:
@@ -0,0 +1,373 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Blueprint, request
+
+from .categories import matching_ids
+from .concurrency import run_parallel
+from .conditional import conditional
+from .config import settings
+from .geo import normalizar_cep, resolver_cep
+from .listagens import (
+    DONO_CAMPOS,
+    avaliacoes_e_estatisticas,
+    filtros_listagem_anuncios,
+    montar_listagem_profissionais,
+    params_filtros_anuncios,
+    select_anuncio_query,
+)
+from .loaders import get_usuario_loader
+from .retry import is_missing_function, is_missing_table
+from .supabase_client import get_admin_client
+from .utils import (
+    ok,
+    fail,
+    build_worker_profile_batch,
+    execute_with_retry,
+    ids_da_pagina,
+    ordenar_por_ids,
+    paginate_params,
+)
+
+
+geo_bp = Blueprint("geo", __name__, url_prefix="/api/geo")
+
+_MIGRATION_GEO = "migration_geo_cep.sql"
+RAIO_PADRAO_KM = 15.0
+
+
+def _indisponivel():
+    return fail(f"Busca por raio indisponível: aplique db/{_MIGRATION_GEO}", 503)
+
+
+def _centro(args) -> Tuple[Optional[Dict[str, Any]], Any]:
+    """(ponto de referência, resposta de erro): pelo `cep` ou por `lat`/`lon`."""
+    if args.get("cep"):
+        if not normalizar_cep(args.get("cep")):
+            return None, fail("CEP inválido", 400)
+        try:
+            faixa = resolver_cep(args.get("cep"))
+        except Exception as e:
+            if is_missing_table(e):
+                return None, _indisponivel()
+            raise
+        if not faixa:
+            return None, fail("CEP fora da base de CEPs", 404)
+        return faixa, None
+    try:
+        lat, lon = float(args.get("lat")), float(args.get("lon"))
+    except (TypeError, ValueError):
+        return None, fail("Informe cep ou lat e lon", 400)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, fail("lat/lon fora do intervalo", 400)
+    return {"latitude": lat, "longitude": lon}, None
+
+
+def _raio(args) -> Tuple[Optional[float], Any]:
+    try:
+        raio = float(args.get("raio_km") or RAIO_PADRAO_KM)
+    except ValueError:
+        return None, fail("raio_km inválido", 400)
+    if not 0 < raio <= settings.geo_raio_max_km:
+        return None, fail(f"raio_km deve estar entre 0 e {settings.geo_raio_max_km:g}", 400)
+    return raio, None
+
+
+def _linhas_no_raio(admin, funcao: str, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Linhas (id, distancia_km, total) da RPC, ou None se a migration não foi aplicada."""
+    try:
+        return execute_with_retry(
+            lambda: admin.rpc(funcao, params).execute().data or [],
+            max_attempts=3,
+            delay=0.3
+        )
+    except Exception as e:
+        if is_missing_function(e):
+            return None
+        raise
+
+
+def _distancias(linhas: List[Dict[str, Any]]) -> Dict[Any, float]:
+    return {l["id"]: round(l["distancia_km"], 2) for l in linhas if l.get("id") is not None}
+
+
+@geo_bp.get("/cep/<cep>")
+@conditional(max_age=86400)
+def consultar_cep(cep: str):
+    """Consultar CEP
+    Município e coordenadas de um CEP da base offline; `aproximado` indica coordenada do bairro ou do centro do município
+    ---
+    tags:
+      - Geo
+    parameters:
+      - name: cep
+        in: path
+        type: string
+        required: true
+        example: "01310-100"
+    responses:
+      200:
+        description: CEP encontrado
+        schema:
+          type: object
+          properties:
+            cep:
+              type: string
+            municipio:
+              type: string
+            uf:
+              type: string
+            latitude:
+              type: number
+            longitude:
+              type: number
+            precisao:
+              type: string
+              enum: [cep, bairro, municipio]
+            aproximado:
+              type: boolean
+      400:
+        description: CEP inválido
+      404:
+        description: CEP fora da base de CEPs
+      503:
+        description: Base de CEPs não instalada
+    """
+    if not normalizar_cep(cep):
+        return fail("CEP inválido", 400)
+    try:
+        faixa = resolver_cep(cep)
+    except Exception as e:
+        if is_missing_table(e):
+            return _indisponivel()
+        return fail(f"Falha ao consultar CEP: {e}", 500)
+    if not faixa:
+        return fail("CEP fora da base de CEPs", 404)
+    return ok(faixa)
+
+
+@geo_bp.get("/profissionais")
+@conditional()
+def profissionais_proximos():
+    """Profissionais por raio
+    Profissionais a até `raio_km` do CEP (ou de lat/lon), do mais próximo ao mais distante
+    ---
+    tags:
+      - Geo
+    parameters:
+      - name: cep
+        in: query
+        type: string
+        description: CEP de referência (alternativa a lat/lon)
+        example: "01310-100"
+      - name: lat
+        in: query
+        type: number
+      - name: lon
+        in: query
+        type: number
+      - name: raio_km
+        in: query
+        type: number
+        description: Raio em km (padrão 15; máximo GEO_RAIO_MAX_KM, 200 por padrão)
+      - name: categoria
+        in: query
+        type: string
+        description: Filtrar por categoria
+        example: "eletrica"
+      - name: page
+        in: query
+        type: integer
+      - name: page_size
+        in: query
+        type: integer
+    responses:
+      200:
+        description: Página de profissionais (mesmo formato de /api/profissionais) com distancia_km em cada item
+        schema:
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                $ref: '#/definitions/Usuario'
+            total:
+              type: integer
+            page:
+              type: integer
+            page_size:
+              type: integer
+            centro:
+              type: object
+            raio_km:
+              type: number
+      400:
+        description: Parâmetros inválidos
+      404:
+        description: CEP fora da base de CEPs
+      503:
+        description: Migration de geolocalização não aplicada
+    """
+    try:
+        centro, erro = _centro(request.args)
+        if erro:
+            return erro
+        raio, erro = _raio(request.args)
+        if erro:
+            return erro
+        page = paginate_params(request.args)
+
+        cat_ids = None
+        categoria = (request.args.get("categoria") or "").strip()
+        if categoria:
+            try:
+                cat_ids = matching_ids(categoria)
+            except Exception:
+                cat_ids = None
+
+        admin = get_admin_client()
+        linhas = _linhas_no_raio(admin, "profissionais_no_raio", {
+            "p_latitude": centro["latitude"],
+            "p_longitude": centro["longitude"],
+            "p_raio_km": raio,
+            "p_categoria_ids": cat_ids,
+            "p_limit": page["limit"],
+            "p_offset": page["offset"],
+        })
+        if linhas is None:
+            return _indisponivel()
+        ids, total = ids_da_pagina(linhas)
+
+        rows: List[Dict[str, Any]] = []
+        worker_profiles_map, avaliacoes_map, estatisticas_map = {}, {}, {}
+        if ids:
+            q = admin.table("usuarios").select("*").in_("id", ids)
+            rows = ordenar_por_ids(execute_with_retry(lambda: q.execute().data or [], max_attempts=3, delay=0.3), ids)
+            res = run_parallel({
+                "perfis": lambda: build_worker_profile_batch(admin, ids),
+                "stats": lambda: avaliacoes_e_estatisticas(admin, ids),
+            }, max_attempts=1, defaults={"perfis": {}, "stats": ({}, {})})
+            worker_profiles_map = res["perfis"]
+            avaliacoes_map, estatisticas_map = res["stats"]
+
+        listagem = montar_listagem_profissionais(rows, total, worker_profiles_map, avaliacoes_map, estatisticas_map, page)
+        distancias = _distancias(linhas)
+        for item in listagem["items"]:
+            item["distancia_km"] = distancias.get(item.get("id"))
+        listagem.update(centro=centro, raio_km=raio)
+        return ok(listagem)
+    except Exception as e:
+        print(f"[ERRO] Falha na busca de profissionais por raio: {e}")
+        return fail(f"Falha na busca por raio: {e}", 500)
+
+
+@geo_bp.get("/anuncios")
+@conditional()
+def anuncios_proximos():
+    """Anúncios por raio
+    Anúncios (fora os direcionados) a até `raio_km` do CEP (ou de lat/lon), do mais próximo ao mais distante
+    ---
+    tags:
+      - Geo
+    parameters:
+      - name: cep
+        in: query
+        type: string
+        description: CEP de referência (alternativa a lat/lon)
+        example: "01310-100"
+      - name: lat
+        in: query
+        type: number
+      - name: lon
+        in: query
+        type: number
+      - name: raio_km
+        in: query
+        type: number
+        description: Raio em km (padrão 15; máximo GEO_RAIO_MAX_KM, 200 por padrão)
+      - name: tipo
+        in: query
+        type: string
+        enum: [oferta, oportunidade]
+      - name: categoria_id
+        in: query
+        type: integer
+      - name: urgencia
+        in: query
+        type: string
+        enum: [normal, alta]
+      - name: status
+        in: query
+        type: string
+        enum: [disponivel, fechado, cancelado]
+      - name: page
+        in: query
+        type: integer
+      - name: page_size
+        in: query
+        type: integer
+    responses:
+      200:
+        description: Página de anúncios com distancia_km em cada item
+        schema:
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                $ref: '#/definitions/Anuncio'
+            total:
+              type: integer
+            page:
+              type: integer
+            page_size:
+              type: integer
+            centro:
+              type: object
+            raio_km:
+              type: number
+      400:
+        description: Parâmetros inválidos
+      404:
+        description: CEP fora da base de CEPs
+      503:
+        description: Migration de geolocalização não aplicada
+    """
+    try:
+        centro, erro = _centro(request.args)
+        if erro:
+            return erro
+        raio, erro = _raio(request.args)
+        if erro:
+            return erro
+        page = paginate_params(request.args)
+        # Mesma validação de filtros de GET /api/anuncios
+        filtros = params_filtros_anuncios(filtros_listagem_anuncios(request.args))
+
+        admin = get_admin_client()
+        linhas = _linhas_no_raio(admin, "anuncios_no_raio", {
+            "p_latitude": centro["latitude"],
+            "p_longitude": centro["longitude"],
+            "p_raio_km": raio,
+            "p_tipo": filtros["p_tipo"],
+            "p_categoria_id": filtros["p_categoria_id"],
+            "p_urgencia": filtros["p_urgencia"],
+            "p_status": filtros["p_status"],
+            "p_limit": page["limit"],
+            "p_offset": page["offset"],
+        })
+        if linhas is None:
+            return _indisponivel()
+        ids, total = ids_da_pagina(linhas)
+
+        items: List[Dict[str, Any]] = []
+        if ids:
+            q = select_anuncio_query(admin).in_("id", ids)
+            items = ordenar_por_ids(execute_with_retry(lambda: q.execute().data or [], max_attempts=3, delay=0.3), ids)
+            get_usuario_loader().fill(items, "usuario_id", "usuarios", DONO_CAMPOS)
+        distancias = _distancias(linhas)
+        for item in items:
+            item["distancia_km"] = distancias.get(item.get("id"))
+        return ok({"items": items, "total": total, **page, "centro": centro, "raio_km": raio})
+    except Exception as e:
+        print(f"[ERRO] Falha na busca de anúncios por raio: {e}")
+        return fail(f"Falha na busca por raio: {e}", 500)
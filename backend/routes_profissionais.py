@@ -2,14 +2,51 @@ from typing import Any, Dict, List
 
 from flask import Blueprint, request
 
+from .categories import matching_ids
+from .conditional import conditional
+from .listagens import (
+    MIGRATION_BUSCA_PROFISSIONAIS,
+    avaliacoes_e_estatisticas,
+    filtros_profissionais,
+    montar_listagem_profissionais,
+    params_busca_profissionais,
+    query_profissionais,
+)
+from .retry import is_transient
+from .singleflight import single_flight
+from .stale import mark_degraded, stale_if_error
 from .supabase_client import get_admin_client
-from .utils import ok, fail, build_worker_profile
+from .utils import (
+    ok,
+    fail,
+    build_worker_profile,
+    execute_with_retry,
+    ids_da_pagina,
+    ordenar_por_ids,
+    rpc_indisponivel,
+)
 
 
 profissionais_bp = Blueprint("profissionais", __name__, url_prefix="/api/profissionais")
 
 
+@single_flight("estatisticas_profissional")
+def _contratacoes_recebidas(usuario_id: str) -> List[Dict[str, Any]]:
+    """(id, status) das contratações em que o usuário foi contratado."""
+    admin = get_admin_client()
+    return execute_with_retry(
+        lambda: admin.table("contratacoes")
+            .select("id, status")
+            .eq("usuario_id_contratado", usuario_id)
+            .execute()
+            .data or [],
+        max_attempts=2,
+        delay=0.3
+    )
+
+
 @profissionais_bp.get("/estatisticas/<usuario_id>")
+@stale_if_error("estatisticas")
 def estatisticas_profissional(usuario_id: str):
     """Retorna estatísticas de um profissional (projetos concluídos, etc.)
     ---
@@ -43,42 +80,15 @@ def estatisticas_profissional(usuario_id: str):
         projetos_concluidos = 0
         total_contratacoes = 0
         try:
-            # Tentar buscar com retry para lidar com WinError 10035
-            max_tentativas = 2
-            for tentativa in range(max_tentativas):
-                try:
-                    contratacoes = (
-                        admin.table("contratacoes")
-                        .select("id, status")
-                        .eq("usuario_id_contratado", usuario_id)
-                        .execute()
-                        .data
-                        or []
-                    )
-                    projetos_concluidos = len([c for c in contratacoes if c.get("status") == "concluido"])
-                    total_contratacoes = len(contratacoes)
-                    break  # Sucesso, sair do loop
-                except Exception as e:
-                    error_str = str(e)
-                    is_network_error = (
-                        "WinError 10035" in error_str or
-                        "10035" in error_str or
-                        "socket" in error_str.lower() or
-                        "network" in error_str.lower()
-                    )
-                    if is_network_error and tentativa < max_tentativas - 1:
-                        # Aguardar um pouco antes de tentar novamente
-                        import time
-                        time.sleep(0.3)
-                        continue
-                    # Se não for erro de rede ou última tentativa, logar e retornar zeros
-                    if not is_network_error:
-                        import traceback
-                        print(f"[AVISO] Erro ao buscar contratações para {usuario_id}: {e}")
-                    break
-        except Exception:
-            # Se houver erro geral, retorna zeros silenciosamente
-            pass
+            contratacoes = _contratacoes_recebidas(usuario_id)
+            projetos_concluidos = len([c for c in contratacoes if c.get("status") == "concluido"])
+            total_contratacoes = len(contratacoes)
+        except Exception as e:
+            # Retorna zeros (ou a última resposta boa, via stale_if_error);
+            # só loga se não for falha transitória de rede
+            mark_degraded()
+            if not is_transient(e):
+                print(f"[AVISO] Erro ao buscar contratações para {usuario_id}: {e}")
         
         return ok({
             "projetos_concluidos": projetos_concluidos,
@@ -91,7 +101,44 @@ def estatisticas_profissional(usuario_id: str):
         return fail(f"Falha ao buscar estatísticas: {str(e)}", 500)
 
 
+def _pagina_profissionais(admin, filtros: Dict[str, str], cat_ids: List[int], page_params: Dict[str, int]):
+    """(linhas de `usuarios` da página, total).
+
+    Com `busca`/`localizacao`, a RPC ordena por similaridade e devolve os ids
+    da página; sem elas (ou sem a migration), vale a query de `query_profissionais`.
+    """
+    if filtros["busca"] or filtros["localizacao"]:
+        try:
+            linhas = execute_with_retry(
+                lambda: admin.rpc("buscar_profissionais", params_busca_profissionais(filtros, cat_ids, page_params)).execute().data or [],
+                max_attempts=3,
+                delay=0.3
+            )
+        except Exception as e:
+            if not rpc_indisponivel(e, "buscar_profissionais", MIGRATION_BUSCA_PROFISSIONAIS):
+                raise
+        else:
+            ids, total = ids_da_pagina(linhas)
+            if not ids:
+                return [], total
+            rows = execute_with_retry(
+                lambda: admin.table("usuarios").select("*").in_("id", ids).execute().data or [],
+                max_attempts=3,
+                delay=0.3
+            )
+            return ordenar_por_ids(rows, ids), total
+
+    q = query_profissionais(admin, filtros, cat_ids, page_params)
+    pagina = execute_with_retry(
+        lambda: q.execute(),
+        max_attempts=3,
+        delay=0.3
+    )
+    return pagina.data or [], pagina.count or 0
+
+
 @profissionais_bp.get("")
+@conditional()
 def listar_profissionais():
     """Listar profissionais
     Lista profissionais cadastrados na plataforma com filtros opcionais
@@ -102,7 +149,7 @@ def listar_profissionais():
       - name: busca
         in: query
         type: string
-        description: Busca por nome, descrição ou categorias
+        description: Busca por nome, descrição ou categorias (sem acentos, tolera erros de digitação)
         example: "eletricista"
       - name: categoria
         in: query
@@ -112,8 +159,8 @@ def listar_profissionais():
       - name: localizacao
         in: query
         type: string
-        description: Filtrar por cidade/localização
-        example: "São Paulo"
+        description: Filtrar por cidade/localização (sem acentos, tolera erros de digitação)
+        example: "sao paulo"
       - name: page
         in: query
         type: integer
@@ -132,6 +179,13 @@ def listar_profissionais():
               type: array
               items:
                 $ref: '#/definitions/Usuario'
+            total:
+              type: integer
+              description: Total de profissionais com os filtros (ordenados por similaridade com a busca, depois por nome)
+            page:
+              type: integer
+            page_size:
+              type: integer
       500:
         description: Erro ao listar profissionais
         schema:
@@ -140,11 +194,10 @@ def listar_profissionais():
             error:
               type: string
     """
-    from .utils import execute_with_retry, paginate_params, build_worker_profile_batch
+    from .utils import paginate_params, build_worker_profile_batch
     
-    busca = (request.args.get("busca") or "").strip().lower()
-    categoria = (request.args.get("categoria") or "").strip()
-    localizacao = (request.args.get("localizacao") or "").strip().lower()
+    filtros = filtros_profissionais(request.args)
+    categoria = filtros["categoria"]
     
     try:
         admin = get_admin_client()
@@ -154,175 +207,32 @@ def listar_profissionais():
         # Paginação
         page_params = paginate_params(request.args)
         
-        # Se houver filtro por categoria, obter user_ids de worker_categorias
-        user_ids_filter: List[str] = []
+        # Categoria: ids do catálogo em memória; o join com worker_categorias fica no banco
+        cat_ids: List[int] = []
         if categoria:
-            cat_ids: List[int] = []
             try:
-                res = execute_with_retry(
-                    lambda: admin.table("categorias")
-                        .select("id, slug, nome")
-                        .or_(f"slug.eq.{categoria},nome.eq.{categoria}")
-                        .execute()
-                        .data or [],
-                    max_attempts=2,
-                    delay=0.2
-                )
-                cat_ids = [c.get("id") for c in res if c.get("id") is not None]
+                cat_ids = matching_ids(categoria)
             except Exception:
                 cat_ids = []
-            if cat_ids:
-                try:
-                    rel = execute_with_retry(
-                        lambda: admin.table("worker_categorias")
-                            .select("user_id")
-                            .in_("categoria_id", cat_ids)
-                            .execute()
-                            .data or [],
-                        max_attempts=2,
-                        delay=0.2
-                    )
-                    user_ids_filter = list({r.get("user_id") for r in rel if r.get("user_id")})
-                except Exception:
-                    user_ids_filter = []
 
-        q = admin.table("usuarios").select("*").eq("is_worker", True)
-        if user_ids_filter:
-            q = q.in_("id", user_ids_filter)
+        # Só a página pedida e o total
+        rows, total = _pagina_profissionais(admin, filtros, cat_ids, page_params)
         
-        # Executa query com retry
-        rows: List[Dict[str, Any]] = execute_with_retry(
-            lambda: q.execute().data or [],
-            max_attempts=3,
-            delay=0.3
-        )
-
-        # Filtros locais (busca e localização)
-        def match(p: Dict[str, Any]) -> bool:
-            if busca:
-                nome = (p.get("nome") or "").lower()
-                if busca not in nome:
-                    return False
-            if localizacao:
-                cidade = ((p.get("endereco_cidade") or "").lower())
-                if localizacao not in cidade:
-                    return False
-            return True
-
-        filtered = [p for p in rows if match(p)] if (busca or localizacao) else rows
-        
-        # Buscar todos os perfis de uma vez (otimização)
-        user_ids = [p.get("id") for p in filtered if p.get("id")]
+        # Perfis e avaliações/estatísticas só da página; são independentes: buscar em paralelo
+        user_ids = [p.get("id") for p in rows if p.get("id")]
         worker_profiles_map = {}
-        if user_ids:
-            try:
-                worker_profiles_map = build_worker_profile_batch(admin, user_ids)
-            except Exception as e:
-                import traceback
-                print(f"[AVISO] Erro ao buscar perfis em lote: {e}")
-                traceback.print_exc()
-        
-        # Buscar avaliações e estatísticas em lote
         avaliacoes_map = {}
         estatisticas_map = {}
         if user_ids:
-            try:
-                # Buscar todas as contratações de uma vez
-                contratacoes = execute_with_retry(
-                    lambda: admin.table("contratacoes")
-                        .select("id, usuario_id_contratado, status")
-                        .in_("usuario_id_contratado", user_ids)
-                        .execute()
-                        .data or [],
-                    max_attempts=2,
-                    delay=0.2
-                )
-                
-                # Agrupar por profissional
-                contratacoes_por_prof = {}
-                for c in contratacoes:
-                    prof_id = c.get("usuario_id_contratado")
-                    if prof_id:
-                        if prof_id not in contratacoes_por_prof:
-                            contratacoes_por_prof[prof_id] = []
-                        contratacoes_por_prof[prof_id].append(c)
-                
-                # Calcular estatísticas
-                for prof_id, conts in contratacoes_por_prof.items():
-                    estatisticas_map[prof_id] = {
-                        "total_contratacoes": len(conts),
-                        "projetos_concluidos": len([c for c in conts if c.get("status") == "concluido"])
-                    }
-                
-                # Buscar avaliações
-                if contratacoes:
-                    cids = [c.get("id") for c in contratacoes if c.get("id")]
-                    avaliacoes = execute_with_retry(
-                        lambda: admin.table("avaliacoes")
-                            .select("contratacao_id, nota")
-                            .in_("contratacao_id", cids)
-                            .execute()
-                            .data or [],
-                        max_attempts=2,
-                        delay=0.2
-                    )
-                    
-                    # Agrupar avaliações por profissional
-                    notas_por_prof = {}
-                    for av in avaliacoes:
-                        cid = av.get("contratacao_id")
-                        nota = av.get("nota")
-                        if cid and nota:
-                            # Encontrar qual profissional pertence a esta contratação
-                            for c in contratacoes:
-                                if c.get("id") == cid:
-                                    prof_id = c.get("usuario_id_contratado")
-                                    if prof_id:
-                                        if prof_id not in notas_por_prof:
-                                            notas_por_prof[prof_id] = []
-                                        notas_por_prof[prof_id].append(nota)
-                    
-                    # Calcular médias
-                    for prof_id, notas in notas_por_prof.items():
-                        if notas:
-                            avaliacoes_map[prof_id] = {
-                                "media": round(sum(notas) / len(notas), 2),
-                                "total": len(notas)
-                            }
-            except Exception as e:
-                import traceback
-                print(f"[AVISO] Erro ao buscar avaliações/estatísticas em lote: {e}")
-                traceback.print_exc()
-        
-        # Montar resposta
-        out: List[Dict[str, Any]] = []
-        for p in filtered:
-            prof_id = p.get("id")
-            # Adicionar perfil worker
-            p["perfil_worker"] = worker_profiles_map.get(prof_id, {})
-            # Adicionar avaliações
-            if prof_id in avaliacoes_map:
-                p["avaliacoes"] = avaliacoes_map[prof_id]
-            else:
-                p["avaliacoes"] = {"media": 0, "total": 0}
-            # Adicionar estatísticas
-            if prof_id in estatisticas_map:
-                p["estatisticas"] = estatisticas_map[prof_id]
-            else:
-                p["estatisticas"] = {"total_contratacoes": 0, "projetos_concluidos": 0}
-            out.append(p)
-        
-        # Aplicar paginação
-        start = page_params["offset"]
-        end = start + page_params["limit"]
-        paginated_items = out[start:end]
+            from .concurrency import run_parallel
+            res = run_parallel({
+                "perfis": lambda: build_worker_profile_batch(admin, user_ids),
+                "stats": lambda: avaliacoes_e_estatisticas(admin, user_ids),
+            }, max_attempts=1, defaults={"perfis": {}, "stats": ({}, {})})
+            worker_profiles_map = res["perfis"]
+            avaliacoes_map, estatisticas_map = res["stats"]
         
-        return ok({
-            "items": paginated_items,
-            "total": len(out),
-            "page": page_params["page"],
-            "page_size": page_params["page_size"]
-        })
+        return ok(montar_listagem_profissionais(rows, total, worker_profiles_map, avaliacoes_map, estatisticas_map, page_params))
     except Exception as e:
         import traceback
         print(f"[ERRO] Falha ao listar profissionais: {e}")
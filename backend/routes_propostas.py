@@ -3,12 +3,16 @@ from typing import Any, Dict
 from flask import Blueprint, request
 
 from .auth import require_auth
+from .loaders import get_usuario_loader
 from .supabase_client import get_admin_client
 from .utils import ok, fail
 
 
 propostas_bp = Blueprint("propostas", __name__, url_prefix="/api/propostas")
 
+# Campos de usuário embutidos nas propostas (worker e dono do anúncio)
+_USUARIO_CAMPOS = ("nome", "email", "foto_url")
+
 
 def _get_anuncio(anuncio_id: int):
     return (
@@ -103,6 +107,16 @@ def listar_propostas(user_id: str):
         # Executar query (para todos os casos, exceto recebidas que já retornou)
         res = q.order("criada_em", desc=True).execute()
         todas_propostas = res.data or []
+
+        # Completar worker e cliente quando os relacionamentos vierem vazios (uma query para todos)
+        anuncios_embutidos = [p.get("anuncios") for p in todas_propostas if p.get("anuncios")]
+        loader = get_usuario_loader()
+        loader.load_many(
+            [p.get("usuario_id_worker") for p in todas_propostas if not p.get("usuarios")]
+            + [a.get("usuario_id") for a in anuncios_embutidos if not a.get("usuarios")]
+        )
+        loader.fill(todas_propostas, "usuario_id_worker", "usuarios", _USUARIO_CAMPOS)
+        loader.fill(anuncios_embutidos, "usuario_id", "usuarios", _USUARIO_CAMPOS)
         
         # Se estamos no caso de propostas enviadas e há anúncios direcionados, filtrar
         if not recebidas and not (anuncio_id and anuncio_id.isdigit()) and anuncio_ids_direcionados:
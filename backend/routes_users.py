@@ -3,7 +3,10 @@ import re
 
 from flask import Blueprint, jsonify, request
 
-from .auth import require_auth, get_current_user_profile
+from .auth import require_auth, get_current_user_profile, invalidate_user_profile
+from .conditional import conditional
+from .geo import coordenadas_do_cep
+from .storage import PROFILE_PHOTOS, ensure_bucket, public_url
 from .supabase_client import get_admin_client
 from .utils import build_worker_profile, upsert_worker_profile
 import time, os
@@ -13,6 +16,7 @@ users_bp = Blueprint("users", __name__, url_prefix="/api/users")
 
 
 @users_bp.route("/<user_id>")
+@conditional()
 def get_user(user_id: str):
     """Obter dados básicos de um usuário (público, apenas dados básicos)
     ---
@@ -94,6 +98,11 @@ def update_me(user_id: str):
     }
 
     update_payload = {k: v for k, v in data.items() if k in allowed_fields}
+    if "endereco_cep" in update_payload:
+        # Coordenadas do CEP para a busca por raio (geo.py)
+        coordenadas = coordenadas_do_cep(update_payload["endereco_cep"])
+        if coordenadas is not None:
+            update_payload.update(coordenadas)
 
     client = get_admin_client()
     
@@ -161,7 +170,7 @@ def update_me(user_id: str):
                     print(f"[DEBUG] update_me (list): Comparando fotos - antiga: {old_photo_url}, nova: {new_photo_url}")
                     if old_photo_url != new_photo_url:
                         print(f"[DEBUG] update_me (list): Fotos são diferentes, deletando foto antiga")
-                        bucket = 'profile-photos'
+                        bucket = PROFILE_PHOTOS
                         _delete_old_photo(client, bucket, old_photo_url)
                     else:
                         print(f"[DEBUG] update_me (list): Fotos são iguais, não precisa deletar")
@@ -181,7 +190,7 @@ def update_me(user_id: str):
                     print(f"[DEBUG] update_me (dict): Comparando fotos - antiga: {old_photo_url}, nova: {new_photo_url}")
                     if old_photo_url != new_photo_url:
                         print(f"[DEBUG] update_me (dict): Fotos são diferentes, deletando foto antiga")
-                        bucket = 'profile-photos'
+                        bucket = PROFILE_PHOTOS
                         _delete_old_photo(client, bucket, old_photo_url)
                     else:
                         print(f"[DEBUG] update_me (dict): Fotos são iguais, não precisa deletar")
@@ -209,13 +218,15 @@ def update_me(user_id: str):
             print(f"[DEBUG] update_me (fallback): Comparando fotos - antiga: {old_photo_url}, nova: {new_photo_url}")
             if old_photo_url != new_photo_url:
                 print(f"[DEBUG] update_me (fallback): Fotos são diferentes, deletando foto antiga")
-                bucket = 'profile-photos'
+                bucket = PROFILE_PHOTOS
                 _delete_old_photo(client, bucket, old_photo_url)
             else:
                 print(f"[DEBUG] update_me (fallback): Fotos são iguais, não precisa deletar")
         return jsonify(out), 200
     except Exception as e:
         return jsonify({"error": f"Falha ao atualizar perfil: {e}"}), 400
+    finally:
+        invalidate_user_profile(user_id)
 
 
 def _digits_only(value: Any) -> str:
@@ -294,6 +305,9 @@ def complete_onboarding(user_id: str):
     cep_digits = _digits_only(payload.get("zipCode") or payload.get("cep"))
     if len(cep_digits) == 8:
         update_payload["endereco_cep"] = cep_digits
+        coordenadas = coordenadas_do_cep(cep_digits)
+        if coordenadas is not None:
+            update_payload.update(coordenadas)
 
     address = (payload.get("address") or "").strip()
     if address:
@@ -324,41 +338,16 @@ def complete_onboarding(user_id: str):
 
     client = get_admin_client()
     try:
-        client.table("usuarios").update(update_payload).eq("id", user_id).execute()
+        try:
+            client.table("usuarios").update(update_payload).eq("id", user_id).execute()
+        finally:
+            invalidate_user_profile(user_id)
         profile = get_current_user_profile(user_id)
         return jsonify({"profile": profile}), 200
     except Exception as e:
         return jsonify({"error": f"Falha ao salvar onboarding: {e}"}), 400
 
 
-def _ensure_bucket(admin, bucket: str):
-    try:
-        buckets = admin.storage.list_buckets()  # returns list[dict]
-        names = set()
-        for b in buckets or []:
-            if isinstance(b, dict):
-                names.add(b.get("name") or b.get("id"))
-            else:
-                try:
-                    names.add(getattr(b, "name", None) or getattr(b, "id", None))
-                except Exception:
-                    pass
-        if bucket not in names:
-            admin.storage.create_bucket(bucket, public=True)
-        else:
-            # garante que é público (se já existir)
-            try:
-                admin.storage.update_bucket(bucket, public=True)
-            except Exception:
-                pass
-    except Exception:
-        # fallback: tenta criar diretamente (idempotente)
-        try:
-            admin.storage.create_bucket(bucket, public=True)
-        except Exception:
-            pass
-
-
 @users_bp.route("/me/foto", methods=["POST"])  # multipart/form-data
 @require_auth
 def upload_foto(user_id: str):
@@ -377,9 +366,9 @@ def upload_foto(user_id: str):
         return jsonify({"error": "Arquivo muito grande (máx 5MB)"}), 400
 
     admin = get_admin_client()
-    bucket = 'profile-photos'
-    # Tentar criar bucket e garantir que exista e seja público
-    _ensure_bucket(admin, bucket)
+    bucket = PROFILE_PHOTOS
+    # Bucket verificado uma vez por processo (storage.ensure_bucket)
+    ensure_bucket(admin, bucket)
 
     name, ext = os.path.splitext(file.filename)
     ext = ext or '.jpg'
@@ -394,26 +383,15 @@ def upload_foto(user_id: str):
         try:
             _do_upload()
         except Exception:
-            _ensure_bucket(admin, bucket)
+            # Bucket pode ter sido removido desde a verificação: verifica de novo
+            ensure_bucket(admin, bucket, force=True)
             file.seek(0)
             _do_upload()
-        # URL pública (compatível com diferentes retornos da lib)
-        url_data = admin.storage.from_(bucket).get_public_url(path)
-        public_url = None
-        if isinstance(url_data, str):
-            public_url = url_data
-        elif isinstance(url_data, dict):
-            public_url = url_data.get("public_url") or url_data.get("publicURL") or url_data.get("signedURL")
-        else:
-            try:
-                public_url = getattr(url_data, "public_url", None) or getattr(url_data, "publicURL", None)
-            except Exception:
-                public_url = None
-        public_url = public_url or f"{get_admin_client().storage.url}/object/public/{bucket}/{path}"
+        url = public_url(bucket, path)
 
         # NÃO atualiza o banco aqui - apenas retorna a URL
         # O banco será atualizado quando o usuário clicar em "Salvar Alterações"
         # Isso permite que a foto antiga seja deletada corretamente
-        return jsonify({"foto_url": public_url}), 200
+        return jsonify({"foto_url": url}), 200
     except Exception as e:
         return jsonify({"error": f"Falha ao enviar foto: {e}"}), 400
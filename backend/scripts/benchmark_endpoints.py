@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos endpoints da API contra o backend em memória (memory_client).
+
+Este script:
+1. Sobe o app com SUPABASE_BACKEND=memory e popula uma massa de dados sintética
+   com N anúncios e N profissionais (além de clientes, propostas, contratações,
+   avaliações e conversas)
+2. Executa cada rota de cada blueprint pelo Flask test client
+3. Mede latência (p50/p95/p99), round trips ao "Supabase" por requisição e pico
+   de memória alocada (tracemalloc)
+4. Grava o resultado em JSON, para comparar duas execuções com --compare
+
+Exemplos:
+    python backend/scripts/benchmark_endpoints.py --sizes 1000,10000 --out bench.json
+    python backend/scripts/benchmark_endpoints.py --sizes 1000 --latency-ms 15 --out com_latencia.json
+    python backend/scripts/benchmark_endpoints.py --compare antes.json depois.json
+
+Cada tamanho de massa roda em um subprocesso próprio, para que caches e o
+cliente em memória de uma execução não contaminem a seguinte.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+# Adicionar o diretório raiz do projeto ao path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(script_dir)
+project_root = os.path.dirname(backend_dir)
+sys.path.insert(0, project_root)
+
+
+CATEGORIAS = [
+    ("eletrica", "Elétrica"), ("hidraulica", "Hidráulica"), ("pintura", "Pintura"),
+    ("limpeza", "Limpeza"), ("montagem", "Montagem de Móveis"), ("mudancas", "Mudanças"),
+    ("pedreiro", "Pedreiro"), ("jardinagem", "Jardinagem"), ("marcenaria", "Marcenaria"),
+    ("informatica", "Informática"), ("aulas", "Aulas Particulares"), ("beleza", "Beleza"),
+]
+CIDADES = ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Curitiba", "Porto Alegre",
+           "Salvador", "Recife", "Fortaleza", "Campinas", "Goiânia"]
+# Centro de cada cidade; os pontos do benchmark ficam espalhados até ~20 km dele
+COORDENADAS = {
+    "São Paulo": (-23.5505, -46.6333), "Rio de Janeiro": (-22.9068, -43.1729),
+    "Belo Horizonte": (-19.9167, -43.9345), "Curitiba": (-25.4284, -49.2733),
+    "Porto Alegre": (-30.0346, -51.2177), "Salvador": (-12.9777, -38.5016),
+    "Recife": (-8.0476, -34.8770), "Fortaleza": (-3.7319, -38.5267),
+    "Campinas": (-22.9099, -47.0626), "Goiânia": (-16.6869, -49.2648),
+}
+PALAVRAS = ["instalação", "reparo", "chuveiro", "tomada", "parede", "armário", "vazamento",
+            "pintura", "faxina", "jardim", "portão", "telhado", "piso", "janela", "computador"]
+SENHA = "benchmark123"
+
+
+def _ts(base: datetime, minutes: int) -> str:
+    return (base - timedelta(minutes=minutes)).isoformat()
+
+
+def seed_dataset(client, size: int, seed: int = 42) -> dict:
+    """Popula o cliente em memória e devolve ids úteis para montar as requisições."""
+    rnd = random.Random(seed)
+
+    def local(cidade):
+        lat, lon = COORDENADAS[cidade]
+        return {"latitude": lat + rnd.uniform(-0.18, 0.18), "longitude": lon + rnd.uniform(-0.18, 0.18)}
+
+    base = datetime.now(timezone.utc)
+
+    client.seed("categorias", [
+        {"id": i + 1, "slug": slug, "nome": nome, "icone": None}
+        for i, (slug, nome) in enumerate(CATEGORIAS)
+    ])
+    cat_ids = list(range(1, len(CATEGORIAS) + 1))
+
+    # Usuário do benchmark (profissional) e um cliente que recebe propostas
+    worker_id = client.seed_user("worker@bench.local", SENHA, {
+        "nome": "Profissional Benchmark", "is_worker": True, "endereco_cidade": "São Paulo",
+    })
+    cliente_id = client.seed_user("cliente@bench.local", SENHA, {
+        "nome": "Cliente Benchmark", "is_worker": False, "endereco_cidade": "Campinas",
+    })
+
+    workers = [f"00000000-0000-4000-8000-{i:012d}" for i in range(size)]
+    n_clientes = max(size // 10, 10)
+    clientes = [f"00000000-0000-4000-9000-{i:012d}" for i in range(n_clientes)]
+
+    usuarios = []
+    for i, uid in enumerate(workers):
+        cidade = rnd.choice(CIDADES)
+        usuarios.append({
+            "id": uid, "nome": f"Profissional {i} {rnd.choice(PALAVRAS).title()}",
+            "email": f"w{i}@bench.local", "is_worker": True, "email_verificado": True,
+            "endereco_cidade": cidade, "foto_url": None, **local(cidade),
+        })
+    for i, uid in enumerate(clientes):
+        usuarios.append({
+            "id": uid, "nome": f"Cliente {i}", "email": f"c{i}@bench.local",
+            "is_worker": False, "endereco_cidade": rnd.choice(CIDADES),
+        })
+    client.seed("usuarios", usuarios)
+
+    todos_workers = workers + [worker_id]
+    client.seed("perfil_worker", [
+        {"user_id": uid, "descricao": f"Atendo com {rnd.choice(PALAVRAS)}", "experiencia": "5 anos",
+         "disp_segunda": True, "disp_sabado": rnd.random() < 0.5}
+        for uid in todos_workers
+    ])
+    client.seed("worker_categorias", [
+        {"user_id": uid, "categoria_id": cid}
+        for uid in todos_workers
+        for cid in rnd.sample(cat_ids, rnd.randint(1, 2))
+    ])
+
+    anuncios = []
+    donos = clientes + workers
+    for i in range(size):
+        tipo = "oportunidade" if rnd.random() < 0.6 else "oferta"
+        cidade = rnd.choice(CIDADES)
+        anuncios.append({
+            "id": i + 1,
+            "usuario_id": rnd.choice(donos),
+            "tipo": tipo,
+            "categoria_id": rnd.choice(cat_ids),
+            "titulo": f"{rnd.choice(PALAVRAS).title()} {rnd.choice(PALAVRAS)} #{i}",
+            "descricao": " ".join(rnd.choice(PALAVRAS) for _ in range(12)),
+            "localizacao": cidade, **local(cidade),
+            "preco_min": 50, "preco_max": 500,
+            "urgencia": rnd.choice(["normal", "alta"]) if tipo == "oportunidade" else None,
+            "status": rnd.choices(["disponivel", "fechado", "cancelado"], [8, 1, 1])[0],
+            "publicado_em": _ts(base, i),
+        })
+    # anúncios do cliente do benchmark, com propostas (uma delas do profissional do benchmark)
+    meus = []
+    for j in range(20):
+        meus.append({
+            "id": size + j + 1, "usuario_id": cliente_id, "tipo": "oportunidade",
+            "categoria_id": rnd.choice(cat_ids), "titulo": f"Preciso de {rnd.choice(PALAVRAS)}",
+            "descricao": "Serviço do cliente benchmark", "urgencia": "normal",
+            "status": "disponivel", "publicado_em": _ts(base, j),
+        })
+    client.seed("anuncios", anuncios + meus)
+    anuncio_cliente_id = meus[0]["id"]
+
+    propostas = []
+    for j, a in enumerate(meus):
+        for w in rnd.sample(workers, min(5, len(workers))):
+            propostas.append({"anuncio_id": a["id"], "usuario_id_worker": w,
+                              "valor_proposto": rnd.randint(80, 400), "criada_em": _ts(base, j)})
+        propostas.append({"anuncio_id": a["id"], "usuario_id_worker": worker_id,
+                          "valor_proposto": 150, "criada_em": _ts(base, j)})
+    client.seed("propostas", propostas)
+
+    contratacoes = []
+    for i in range(max(size // 5, 10)):
+        contratacoes.append({
+            "anuncio_id": rnd.randint(1, size), "usuario_id_contratado": rnd.choice(workers),
+            "valor_acordado": 200, "status": rnd.choice(["solicitado", "em_andamento", "concluido"]),
+        })
+    for a in meus[:5]:
+        contratacoes.append({"anuncio_id": a["id"], "usuario_id_contratado": worker_id,
+                             "valor_acordado": 150, "status": "concluido"})
+    client.seed("contratacoes", contratacoes)
+    contratacoes_rows = client.db.rows("contratacoes")
+    client.seed("avaliacoes", [
+        {"contratacao_id": c["id"], "avaliador_id": cliente_id, "nota": rnd.randint(3, 5)}
+        for c in contratacoes_rows if rnd.random() < 0.5 or c["usuario_id_contratado"] == worker_id
+    ])
+    contratacao_worker_id = next(c["id"] for c in contratacoes_rows if c["usuario_id_contratado"] == worker_id)
+
+    conversas = []
+    for i in range(50):
+        outro = clientes[i % len(clientes)]
+        conversas.append({"usuario_a_id": worker_id, "usuario_b_id": outro, "criado_em": _ts(base, i)}
+                         if i % 2 else {"usuario_a_id": outro, "usuario_b_id": worker_id, "criado_em": _ts(base, i)})
+    client.seed("conversas", conversas)
+    mensagens = []
+    for c in client.db.rows("conversas"):
+        for k in range(20):
+            mensagens.append({"conversa_id": c["id"], "remetente_id": rnd.choice([c["usuario_a_id"], c["usuario_b_id"]]),
+                              "conteudo": f"mensagem {k}", "enviada_em": _ts(base, k * 3 + c["id"])})
+    client.seed("mensagens", mensagens)
+
+    return {
+        "worker_id": worker_id,
+        "cliente_id": cliente_id,
+        "outro_worker_id": workers[0],
+        "anuncio_id": 1,
+        "anuncio_cliente_id": anuncio_cliente_id,
+        "conversa_id": client.db.rows("conversas")[0]["id"],
+        "contratacao_id": contratacao_worker_id,
+    }
+
+
+def _login(http, email: str) -> dict:
+    body = http.post("/api/auth/login", json={"email": email, "password": SENHA}).get_json() or {}
+    return body
+
+
+def build_scenarios(http, ids: dict) -> list:
+    """Lista de (blueprint, nome, função que executa uma requisição)."""
+    sessao = {"worker": _login(http, "worker@bench.local"), "cliente": _login(http, "cliente@bench.local")}
+
+    def auth(quem):
+        return {"Authorization": f"Bearer {sessao[quem]['access_token']}"}
+
+    def refresh():
+        resp = http.post("/api/auth/refresh", json={"refresh_token": sessao["worker"]["refresh_token"]})
+        body = resp.get_json() or {}
+        if body.get("refresh_token"):
+            sessao["worker"].update(body)
+        return resp
+
+    w = ids["worker_id"]
+    return [
+        ("auth", "POST /api/auth/login", lambda: http.post("/api/auth/login", json={"email": "worker@bench.local", "password": SENHA})),
+        ("auth", "POST /api/auth/refresh", refresh),
+        ("auth", "GET /api/auth/me", lambda: http.get("/api/auth/me", headers=auth("worker"))),
+        ("users", "GET /api/users/me", lambda: http.get("/api/users/me", headers=auth("worker"))),
+        ("users", "GET /api/users/<id>", lambda: http.get(f"/api/users/{ids['outro_worker_id']}")),
+        ("users", "PATCH /api/users/me", lambda: http.patch("/api/users/me", headers=auth("worker"), json={
+            "nome": "Profissional Benchmark",
+            "perfil_worker": {"descricao": "Benchmark", "categorias": ["Elétrica", "pintura"]},
+        })),
+        ("categorias", "GET /api/categorias", lambda: http.get("/api/categorias")),
+        ("anuncios", "GET /api/anuncios", lambda: http.get("/api/anuncios?limit=20")),
+        ("anuncios", "GET /api/anuncios?categoria_id&tipo", lambda: http.get("/api/anuncios?categoria_id=3&tipo=oportunidade")),
+        ("anuncios", "GET /api/anuncios?busca", lambda: http.get("/api/anuncios?busca=chuveiro")),
+        ("anuncios", "GET /api/anuncios/facetas?categoria_id&busca", lambda: http.get("/api/anuncios/facetas?categoria_id=3&busca=chuveiro")),
+        ("anuncios", "GET /api/anuncios (autenticado)", lambda: http.get("/api/anuncios", headers=auth("worker"))),
+        ("anuncios", "GET /api/anuncios/<id>", lambda: http.get(f"/api/anuncios/{ids['anuncio_id']}")),
+        ("anuncios", "GET /api/anuncios/meus", lambda: http.get("/api/anuncios/meus", headers=auth("cliente"))),
+        ("anuncios", "POST /api/anuncios", lambda: http.post("/api/anuncios", headers=auth("cliente"), json={
+            "categoria_id": 1, "titulo": "Benchmark", "descricao": "Criado pelo benchmark", "tipo": "oportunidade",
+        })),
+        ("profissionais", "GET /api/profissionais", lambda: http.get("/api/profissionais")),
+        ("profissionais", "GET /api/profissionais?categoria", lambda: http.get("/api/profissionais?categoria=eletrica")),
+        ("profissionais", "GET /api/profissionais?busca&localizacao", lambda: http.get("/api/profissionais?busca=reparo&localizacao=paulo")),
+        ("profissionais", "GET /api/profissionais/estatisticas/<id>", lambda: http.get(f"/api/profissionais/estatisticas/{w}")),
+        ("geo", "GET /api/geo/cep/<cep>", lambda: http.get("/api/geo/cep/01310100")),
+        ("geo", "GET /api/geo/profissionais?cep&raio_km", lambda: http.get("/api/geo/profissionais?cep=01310100&raio_km=15")),
+        ("geo", "GET /api/geo/anuncios?cep&raio_km&tipo", lambda: http.get("/api/geo/anuncios?cep=13010000&raio_km=15&tipo=oportunidade")),
+        ("chat", "GET /api/conversas", lambda: http.get("/api/conversas", headers=auth("worker"))),
+        ("chat", "GET /api/conversas/<id>/mensagens", lambda: http.get(f"/api/conversas/{ids['conversa_id']}/mensagens", headers=auth("worker"))),
+        ("chat", "POST /api/conversas/<id>/mensagens", lambda: http.post(f"/api/conversas/{ids['conversa_id']}/mensagens", headers=auth("worker"), json={"conteudo": "bench"})),
+        ("propostas", "GET /api/propostas", lambda: http.get("/api/propostas", headers=auth("worker"))),
+        ("propostas", "GET /api/propostas?anuncio_id", lambda: http.get(f"/api/propostas?anuncio_id={ids['anuncio_cliente_id']}", headers=auth("cliente"))),
+        ("contratacoes", "GET /api/contratacoes/minhas", lambda: http.get("/api/contratacoes/minhas", headers=auth("worker"))),
+        ("avaliacoes", "GET /api/avaliacoes?contratacao_id", lambda: http.get(f"/api/avaliacoes?contratacao_id={ids['contratacao_id']}")),
+        ("avaliacoes", "GET /api/avaliacoes/por-contratado/<id>", lambda: http.get(f"/api/avaliacoes/por-contratado/{w}")),
+        ("health", "GET /api/health", lambda: http.get("/api/health")),
+    ]
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_size(size: int, iterations: int, warmup: int, latency_ms: float, seed: int) -> dict:
+    """Executa o benchmark de um tamanho de massa no processo atual."""
+    os.environ["SUPABASE_BACKEND"] = "memory"
+    os.environ["MEMORY_LATENCY_MS"] = "0"
+    from backend.app import create_app
+    from backend.supabase_client import get_admin_client
+
+    app = create_app()
+    http = app.test_client()
+    client = get_admin_client()
+
+    started = time.perf_counter()
+    ids = seed_dataset(client, size, seed)
+    seed_seconds = time.perf_counter() - started
+
+    calls = []
+    client.add_listener(lambda service, target, op, duration, rows, error: calls.append((service, target, op)))
+    client.set_latency(latency_ms / 1000.0)
+
+    results = {}
+    for blueprint, name, fn in build_scenarios(http, ids):
+        for _ in range(warmup):
+            fn()
+        latencies, round_trips, statuses = [], [], set()
+        for _ in range(iterations):
+            calls.clear()
+            t0 = time.perf_counter()
+            resp = fn()
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            round_trips.append(len(calls))
+            statuses.add(resp.status_code)
+
+        # Pico de memória medido à parte: tracemalloc distorce a latência
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        calls.clear()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        por_tabela = {}
+        for service, target, op in calls:
+            key = f"{service}:{target}:{op}"
+            por_tabela[key] = por_tabela.get(key, 0) + 1
+
+        results[name] = {
+            "blueprint": blueprint,
+            "status": sorted(statuses),
+            "iterations": iterations,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "round_trips": max(round_trips),
+            "round_trips_by_target": por_tabela,
+            "peak_memory_kb": round(peak / 1024.0, 1),
+        }
+        print(f"  [{size}] {name:<45} p50={results[name]['p50_ms']:>9.2f}ms "
+              f"p95={results[name]['p95_ms']:>9.2f}ms trips={results[name]['round_trips']:>4} "
+              f"mem={results[name]['peak_memory_kb']:>9.1f}KB", file=sys.stderr)
+
+    return {"size": size, "seed_seconds": round(seed_seconds, 3), "routes": results}
+
+
+def compare(base_path: str, new_path: str) -> None:
+    with open(base_path, encoding="utf-8") as fh:
+        base = json.load(fh)
+    with open(new_path, encoding="utf-8") as fh:
+        new = json.load(fh)
+    for size, dataset in new.get("datasets", {}).items():
+        old = base.get("datasets", {}).get(size)
+        if not old:
+            continue
+        print(f"\n== massa {size} ==")
+        print(f"{'rota':<45} {'p95 antes':>10} {'p95 depois':>10} {'Δ%':>8} {'trips':>11} {'mem KB Δ':>10}")
+        for name, r in dataset["routes"].items():
+            o = old["routes"].get(name)
+            if not o:
+                continue
+            delta = ((r["p95_ms"] - o["p95_ms"]) / o["p95_ms"] * 100.0) if o["p95_ms"] else 0.0
+            trips = f"{o['round_trips']}→{r['round_trips']}"
+            mem = r["peak_memory_kb"] - o["peak_memory_kb"]
+            print(f"{name:<45} {o['p95_ms']:>10.2f} {r['p95_ms']:>10.2f} {delta:>+7.1f}% {trips:>11} {mem:>+10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos endpoints contra o backend em memória")
+    parser.add_argument("--sizes", default="1000", help="tamanhos de massa separados por vírgula (ex.: 1000,10000,100000)")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--iterations", type=int, default=30, help="requisições medidas por rota")
+    parser.add_argument("--warmup", type=int, default=2, help="requisições de aquecimento por rota")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latência simulada por round trip")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="benchmark_results.json", help="arquivo JSON de saída")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara dois resultados")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.size is not None:
+        # modo filho: um tamanho, resultado cru em --out
+        result = run_size(args.size, args.iterations, args.warmup, args.latency_ms, args.seed)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(result, fh)
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    output = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "latency_ms": args.latency_ms,
+            "seed": args.seed,
+        },
+        "datasets": {},
+    }
+    for size in sizes:
+        fd, tmp = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            cmd = [sys.executable, os.path.abspath(__file__), "--size", str(size),
+                   "--iterations", str(args.iterations), "--warmup", str(args.warmup),
+                   "--latency-ms", str(args.latency_ms), "--seed", str(args.seed), "--out", tmp]
+            subprocess.run(cmd, check=True)
+            with open(tmp, encoding="utf-8") as fh:
+                output["datasets"][str(size)] = json.load(fh)
+        finally:
+            os.remove(tmp)
+
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(output, fh, indent=2, ensure_ascii=False, sort_keys=True)
+    print(f"Resultado gravado em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Carrega a base de CEPs (db/cep_faixas.csv) na tabela cep_faixas e preenche as
+coordenadas dos usuários que já tinham CEP antes de db/migration_geo_cep.sql.
+
+Uso:
+    python backend/scripts/carregar_ceps.py [--arquivo faixas.csv] [--sem-usuarios] [--nao-resolvidos ceps.txt]
+
+O CSV tem o cabeçalho cep_inicio,cep_fim,municipio,uf,ibge_codigo,latitude,longitude[,precisao]
+(CEPs com 8 dígitos; precisao = cep | bairro | municipio, padrão municipio).
+Rodar de novo atualiza as faixas existentes (upsert).
+
+db/cep_faixas.csv é só uma amostra com o centro de 43 municípios: em produção,
+gere o CSV a partir de uma base de CEPs completa (por logradouro) e carregue-o
+com --arquivo. Os CEPs de usuários que ficarem fora da base são listados ao
+final (e gravados em --nao-resolvidos, se informado).
+"""
+
+import argparse
+import bisect
+import sys
+import os
+
+# Adicionar o diretório raiz do projeto ao path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(script_dir)
+project_root = os.path.dirname(backend_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, backend_dir)
+
+from backend.supabase_client import get_admin_client
+from backend.config import settings
+from backend.geo import CEP_CSV, carregar_faixas, normalizar_cep
+
+LOTE = 1000
+
+
+def carregar(admin, faixas):
+    """Upsert das faixas em lotes."""
+    for i in range(0, len(faixas), LOTE):
+        admin.table("cep_faixas").upsert(faixas[i:i + LOTE], on_conflict="cep_inicio").execute()
+    print(f"{len(faixas)} faixas de CEP carregadas")
+
+
+def preencher_usuarios(admin, faixas, nao_resolvidos_em=None):
+    """Grava latitude/longitude dos usuários com CEP e sem coordenadas (um update por CEP).
+
+    Devolve os CEPs que não estão em nenhuma faixa.
+    """
+    inicios = [f["cep_inicio"] for f in faixas]
+
+    def faixa_do(cep):
+        i = bisect.bisect_right(inicios, int(cep)) - 1
+        return faixas[i] if i >= 0 and faixas[i]["cep_fim"] >= int(cep) else None
+
+    ceps = set()
+    inicio = 0
+    while True:
+        linhas = (
+            admin.table("usuarios")
+            .select("id, endereco_cep")
+            .not_.is_("endereco_cep", "null")
+            .is_("latitude", "null")
+            .order("id")
+            .range(inicio, inicio + LOTE - 1)
+            .execute()
+            .data or []
+        )
+        ceps.update(l["endereco_cep"] for l in linhas)
+        if len(linhas) < LOTE:
+            break
+        inicio += LOTE
+
+    atualizados = 0
+    nao_resolvidos = []
+    for valor in sorted(ceps):
+        cep = normalizar_cep(valor)
+        faixa = faixa_do(cep) if cep else None
+        if not faixa:
+            nao_resolvidos.append(valor)
+            continue
+        res = (
+            admin.table("usuarios")
+            .update({"latitude": faixa["latitude"], "longitude": faixa["longitude"], "geo_precisao": faixa["precisao"]})
+            .eq("endereco_cep", valor)
+            .is_("latitude", "null")
+            .execute()
+        )
+        atualizados += len(res.data or [])
+    print(f"{atualizados} usuários com coordenadas preenchidas ({len(ceps)} CEPs distintos)")
+    aproximadas = sum(1 for f in faixas if f["precisao"] != "cep")
+    if aproximadas:
+        print(f"[AVISO] {aproximadas} de {len(faixas)} faixas têm coordenada aproximada (bairro ou centro do município)")
+    if nao_resolvidos:
+        exemplos = ", ".join(nao_resolvidos[:20])
+        print(f"[AVISO] {len(nao_resolvidos)} CEPs de usuários fora da base, sem coordenadas: {exemplos}"
+              + (" ..." if len(nao_resolvidos) > 20 else ""))
+        if nao_resolvidos_em:
+            with open(nao_resolvidos_em, "w", encoding="utf-8") as f:
+                f.write("\n".join(nao_resolvidos) + "\n")
+            print(f"Lista completa em {nao_resolvidos_em}")
+    return nao_resolvidos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carrega a base de CEPs em cep_faixas")
+    parser.add_argument("--arquivo", default=CEP_CSV, help="CSV de faixas de CEP (padrão: db/cep_faixas.csv)")
+    parser.add_argument("--sem-usuarios", action="store_true", help="Não preencher as coordenadas dos usuários")
+    parser.add_argument("--nao-resolvidos", help="Arquivo onde gravar os CEPs de usuários fora da base")
+    args = parser.parse_args()
+    try:
+        settings.validate()
+        admin = get_admin_client()
+        faixas = sorted(carregar_faixas(args.arquivo), key=lambda f: f["cep_inicio"])
+        carregar(admin, faixas)
+        if not args.sem_usuarios:
+            preencher_usuarios(admin, faixas, args.nao_resolvidos)
+    except Exception as e:
+        print(f"Erro ao executar script: {e}")
+        sys.exit(1)
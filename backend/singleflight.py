@@ -0,0 +1,160 @@
+"""Coalescência de leituras idênticas simultâneas (single-flight).
+
+Quando um perfil ou anúncio é compartilhado, dezenas de requisições iguais
+chegam ao mesmo tempo. Com `@single_flight("nome")` numa função de dados, só a
+primeira chamada com os mesmos argumentos vai ao Supabase; as que chegam
+enquanto ela está em voo esperam e recebem o mesmo resultado (ou a mesma
+exceção). Nada fica guardado depois: não é um cache, só divide a chamada.
+
+As chamadas coalescidas aparecem em `lancefacil_singleflight_calls_total`.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import copy
+import functools
+import inspect
+import threading
+
+from .metrics import record_singleflight
+
+
+class _Flight:
+    """Chamada em andamento: quem chegar depois espera o resultado."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class _AsyncFlight:
+    """`_Flight` do event loop: o futuro recebe o valor, a exceção ou `_RETAKE`."""
+
+    def __init__(self, future: "asyncio.Future"):
+        self.future = future
+        self.waiters = 0
+
+
+# Publicado quando o líder é cancelado: quem esperava refaz a chamada (um vira o novo líder)
+_RETAKE = object()
+
+
+class SingleFlight:
+    """Grupo de chamadas coalescidas por chave (threads e event loop).
+
+    Args:
+        name: Nome nas métricas
+        copy_result: Entrega uma cópia do resultado a quem esperou, para que
+            ninguém altere o objeto de outra requisição
+    """
+
+    def __init__(self, name: str, copy_result: bool = True):
+        self.name = name
+        self.copy_result = copy_result
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._aflights: Dict[Hashable, _AsyncFlight] = {}
+
+    def _shared(self, value: Any) -> Any:
+        return copy.deepcopy(value) if self.copy_result else value
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Executa `fn()` uma vez por chave entre as threads que chegarem juntas."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+        record_singleflight(self.name, not leader)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self._shared(flight.value)
+        try:
+            value = fn()
+            with self._lock:
+                # Fora do mapa, ninguém mais entra na espera
+                self._flights.pop(key, None)
+                waiters = flight.waiters
+            # Quem esperou copia de um retrato tirado antes de o líder devolver
+            # (e poder alterar) o valor
+            flight.value = self._shared(value) if waiters else value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """`do` para corrotinas (handlers ASGI, um event loop por processo).
+
+        Se o líder for cancelado (ex.: o cliente desconectou), quem esperava não
+        recebe o cancelamento: o primeiro a acordar refaz a chamada.
+        """
+        while True:
+            flight = self._aflights.get(key)
+            record_singleflight(self.name, flight is not None)
+            if flight is None:
+                break
+            flight.waiters += 1
+            value = await asyncio.shield(flight.future)
+            if value is not _RETAKE:
+                return self._shared(value)
+
+        flight = self._aflights[key] = _AsyncFlight(asyncio.get_running_loop().create_future())
+        try:
+            value = await fn()
+        except Exception as e:
+            flight.future.set_exception(e)
+            # evita "Future exception was never retrieved" quando ninguém esperava
+            flight.future.exception()
+            raise
+        except BaseException:
+            flight.future.set_result(_RETAKE)
+            raise
+        finally:
+            if self._aflights.get(key) is flight:
+                del self._aflights[key]
+        flight.future.set_result(self._shared(value) if flight.waiters else value)
+        return value
+
+
+def single_flight(name: str, key: Optional[Callable[..., Hashable]] = None, copy_result: bool = True) -> Callable:
+    """Decorator de função de dados: chamadas simultâneas com a mesma chave viram uma só.
+
+    Args:
+        name: Nome nas métricas
+        key: Chave a partir dos argumentos (padrão: os próprios argumentos, que
+            devem ser hasheáveis; não passe clientes do Supabase como argumento)
+        copy_result: Veja `SingleFlight`
+    """
+    def decorator(fn: Callable) -> Callable:
+        group = SingleFlight(name, copy_result)
+
+        def chave(args, kwargs) -> Hashable:
+            return key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                return await group.ado(chave(args, kwargs), lambda: fn(*args, **kwargs))
+
+            awrapper.group = group
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return group.do(chave(args, kwargs), lambda: fn(*args, **kwargs))
+
+        wrapper.group = group
+        return wrapper
+
+    return decorator
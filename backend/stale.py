@@ -0,0 +1,103 @@
+"""Respostas "stale-if-error" para leituras cacheáveis.
+
+`@stale_if_error("categorias")` guarda a última resposta 200 de cada URL
+(caminho + query string). Se a view falhar (5xx, por exemplo com o circuit
+breaker aberto) ou avisar com `mark_degraded()` que devolveu valores padrão,
+a última resposta boa é servida no lugar, marcada com `Warning: 110` e `Age`.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import functools
+import threading
+import time
+
+from flask import Response, g, make_response, request
+
+from .config import settings
+from .metrics import record_cache
+
+
+class StaleStore:
+    """LRU em memória (por processo) das últimas respostas boas."""
+
+    def __init__(self):
+        self._items: "OrderedDict[Tuple[str, str], Tuple[bytes, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.served = 0
+
+    def put(self, key: Tuple[str, str], response: Response) -> None:
+        entry = (response.get_data(), response.mimetype, time.time())
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > settings.stale_max_entries:
+                self._items.popitem(last=False)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Response]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            body, mimetype, stored_at = entry
+            age = time.time() - stored_at
+            if age > settings.stale_max_age:
+                del self._items[key]
+                return None
+            self.served += 1
+        response = Response(body, status=200, mimetype=mimetype)
+        response.headers["Warning"] = '110 - "Response is Stale"'
+        response.headers["Age"] = str(int(age))
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._items), "served": self.served}
+
+
+stale_store = StaleStore()
+
+
+def mark_degraded() -> None:
+    """A view devolveu um valor padrão porque a dependência falhou."""
+    g.stale_degraded = True
+
+
+def has_credentials() -> bool:
+    """A requisição traz um token (header Authorization ou cookie de sessão)."""
+    return bool(request.headers.get("Authorization") or request.cookies.get("sb_access_token"))
+
+
+def remember_or_fallback(name: str, response: Response, public_only: bool = False) -> Response:
+    """Guarda a resposta boa ou, se ela falhou, troca pela última boa (se houver)."""
+    degraded = g.pop("stale_degraded", False)
+    if public_only and has_credentials():
+        return response
+    key = (name, request.full_path)
+    if response.status_code == 200 and not degraded:
+        stale_store.put(key, response)
+        return response
+    if degraded or response.status_code >= 500:
+        stale = stale_store.get(key)
+        record_cache("stale", stale is not None)
+        if stale is not None:
+            return stale
+    return response
+
+
+def stale_if_error(name: str, public_only: bool = False) -> Callable:
+    """Decorator de view: serve a última resposta boa quando a view falha.
+
+    Args:
+        name: Prefixo da chave no cache (uma por rota)
+        public_only: Só usa o cache em requisições sem credenciais
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            g.stale_degraded = False
+            response = make_response(view(*args, **kwargs))
+            return remember_or_fallback(name, response, public_only)
+
+        return wrapper
+
+    return decorator
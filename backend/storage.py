@@ -0,0 +1,73 @@
+"""Buckets do Supabase Storage e URLs públicas.
+
+Os buckets da aplicação são verificados (e criados/tornados públicos) uma vez
+por processo, no primeiro upload, em vez de `list_buckets` + `create_bucket`/
+`update_bucket` a cada imagem. A URL pública é montada localmente a partir da
+URL do Supabase, sem passar pelo cliente do Storage.
+"""
+from typing import Set
+from urllib.parse import quote
+import threading
+
+from .config import settings
+
+PROFILE_PHOTOS = "profile-photos"
+PORTFOLIO_PHOTOS = "portifolio-fotos"
+ANUNCIO_IMAGES = "img-anuncios"
+
+_ready: Set[str] = set()
+_lock = threading.Lock()
+
+
+def _bucket_names(admin) -> Set[str]:
+    names = set()
+    for b in admin.storage.list_buckets() or []:
+        if isinstance(b, dict):
+            names.add(b.get("name") or b.get("id"))
+        else:
+            names.add(getattr(b, "name", None) or getattr(b, "id", None))
+    return names
+
+
+def ensure_bucket(admin, bucket: str, force: bool = False) -> None:
+    """Garante que o bucket existe e é público (uma vez por processo).
+
+    Args:
+        force: Verifica de novo (ex.: upload falhou com o bucket "pronto")
+    """
+    if bucket in _ready and not force:
+        return
+    with _lock:
+        if bucket in _ready and not force:
+            return
+        try:
+            if bucket not in _bucket_names(admin):
+                admin.storage.create_bucket(bucket, public=True)
+            else:
+                # garante que é público (se já existir)
+                try:
+                    admin.storage.update_bucket(bucket, public=True)
+                except Exception:
+                    pass
+        except Exception:
+            # fallback: tenta criar diretamente; se falhar, verifica de novo no próximo upload
+            try:
+                admin.storage.create_bucket(bucket, public=True)
+            except Exception as e:
+                if "already exists" not in str(e).lower():
+                    print(f"[AVISO] Não foi possível verificar o bucket {bucket}: {e}")
+                    _ready.discard(bucket)
+                    return
+        _ready.add(bucket)
+
+
+def _storage_base_url() -> str:
+    if settings.use_memory_backend:
+        from .supabase_client import get_memory_client
+        return get_memory_client().url.rstrip("/")
+    return settings.supabase_url.rstrip("/")
+
+
+def public_url(bucket: str, path: str) -> str:
+    """URL pública de um objeto de bucket público (mesmo formato do `get_public_url`)."""
+    return f"{_storage_base_url()}/storage/v1/object/public/{bucket}/{quote(path, safe='/')}"
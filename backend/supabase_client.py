@@ -1,19 +1,208 @@
 from functools import lru_cache
+from typing import Dict
+import asyncio
+import threading
+import weakref
+
+import httpx
 from supabase import create_client, Client
 
 from .config import settings
 
 
+# -------------------- Transporte HTTP --------------------
+# Todos os clientes (PostgREST, Storage e Auth) compartilham um httpx.Client com
+# pool de conexões, keep-alive e HTTP/2. No modo 'per_thread' cada thread tem
+# o seu próprio pool.
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_pool_stats: Dict[str, int] = {"requests": 0, "new_connections": 0, "http2_requests": 0}
+
+
+def _count(key: str, n: int = 1) -> None:
+    with _stats_lock:
+        _pool_stats[key] = _pool_stats.get(key, 0) + n
+
+
+def _trace(event_name: str, info: Dict) -> None:
+    # Eventos do httpcore: uma conexão nova passa por connect_tcp; reuso não.
+    if event_name == "connection.connect_tcp.complete":
+        _count("new_connections")
+
+
+def _on_request(request: httpx.Request) -> None:
+    request.extensions["trace"] = _trace
+    _count("requests")
+
+
+def _on_response(response: httpx.Response) -> None:
+    if response.http_version == "HTTP/2":
+        _count("http2_requests")
+
+
+def pool_stats() -> Dict[str, int]:
+    """Contadores do transporte: requisições, conexões abertas e reutilizadas."""
+    with _stats_lock:
+        stats = dict(_pool_stats)
+    stats["reused_connections"] = max(stats["requests"] - stats["new_connections"], 0)
+    return stats
+
+
 @lru_cache(maxsize=1)
-def get_admin_client() -> Client:
-    """Supabase client with Service Role key (admin operations).
-    
-    Nota: Para lidar com erros de rede (WinError 10035), use execute_with_retry
-    das utils ao executar queries.
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        if settings.supabase_http2:
+            print("[AVISO] SUPABASE_HTTP2=true, mas o pacote h2 não está instalado "
+                  "(pip install 'httpx[http2]'): usando HTTP/1.1")
+        return False
+
+
+def _transport_options() -> Dict:
+    return dict(
+        http2=settings.supabase_http2 and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=settings.supabase_pool_max_connections,
+            max_keepalive_connections=settings.supabase_pool_max_keepalive,
+            keepalive_expiry=settings.supabase_keepalive_expiry,
+        ),
+    )
+
+
+def _http_client_options() -> Dict:
+    return dict(
+        timeout=httpx.Timeout(
+            connect=settings.supabase_connect_timeout,
+            read=settings.supabase_read_timeout,
+            write=settings.supabase_read_timeout,
+            pool=settings.supabase_connect_timeout,
+        ),
+        follow_redirects=True,
+    )
+
+
+def build_http_client() -> httpx.Client:
+    """httpx.Client com os limites de pool e timeouts definidos em `Settings`.
+
+    O transporte registra cada chamada no trace da requisição (tracing.py) e
+    passa pelo circuit breaker de cada serviço (breaker.py).
     """
+    from .breaker import BreakerTransport
+    from .tracing import TracingTransport
+
+    return httpx.Client(
+        transport=TracingTransport(BreakerTransport(httpx.HTTPTransport(**_transport_options()))),
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+        **_http_client_options(),
+    )
+
+
+# Versões assíncronas dos hooks: o httpx/httpcore exigem corrotinas no AsyncClient
+async def _atrace(event_name: str, info: Dict) -> None:
+    _trace(event_name, info)
+
+
+async def _aon_request(request: httpx.Request) -> None:
+    request.extensions["trace"] = _atrace
+    _count("requests")
+
+
+async def _aon_response(response: httpx.Response) -> None:
+    _on_response(response)
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    """httpx.AsyncClient com os mesmos limites, timeouts, contadores, trace e breakers."""
+    from .breaker import AsyncBreakerTransport
+    from .tracing import AsyncTracingTransport
+
+    return httpx.AsyncClient(
+        transport=AsyncTracingTransport(AsyncBreakerTransport(httpx.AsyncHTTPTransport(**_transport_options()))),
+        event_hooks={"request": [_aon_request], "response": [_aon_response]},
+        **_http_client_options(),
+    )
+
+
+@lru_cache(maxsize=1)
+def _shared_http_client() -> httpx.Client:
+    return build_http_client()
+
+
+def get_http_client() -> httpx.Client:
+    if settings.supabase_http_mode == "per_thread":
+        client = getattr(_local, "http_client", None)
+        if client is None:
+            client = _local.http_client = build_http_client()
+        return client
+    return _shared_http_client()
+
+
+def _create_client(url: str, key: str) -> Client:
+    try:
+        from supabase.lib.client_options import SyncClientOptions
+        options = SyncClientOptions(httpx_client=get_http_client())
+    except (ImportError, TypeError):
+        # supabase-py antigo: sem suporte a httpx_client compartilhado
+        _avisar_sem_httpx_client()
+        return create_client(url, key)
+    return create_client(url, key, options=options)
+
+
+_aviso_sem_httpx_client = False
+
+
+def _avisar_sem_httpx_client() -> None:
+    global _aviso_sem_httpx_client
+    if not _aviso_sem_httpx_client:
+        _aviso_sem_httpx_client = True
+        print("[AVISO] supabase-py sem ClientOptions(httpx_client=...): usando o cliente HTTP padrão "
+              "(sem pool compartilhado, HTTP/2, circuit breaker e Server-Timing); atualize o pacote supabase")
+
+
+def _per_thread(name: str, factory):
+    client = getattr(_local, name, None)
+    if client is None:
+        client = factory()
+        setattr(_local, name, client)
+    return client
+
+
+# -------------------- Clientes --------------------
+@lru_cache(maxsize=1)
+def get_memory_client():
+    """Cliente em memória (SUPABASE_BACKEND=memory), compartilhado por admin e público."""
+    from .memory_client import MemorySupabaseClient
+
+    client = MemorySupabaseClient(
+        url=settings.supabase_url or "http://memory.local",
+        jwt_secret=settings.supabase_jwt_secret,
+        latency=settings.memory_latency_ms / 1000.0,
+    )
+    if settings.memory_seed_file:
+        client.load_fixtures(settings.memory_seed_file)
+    # Base de CEPs de db/migration_geo_cep.sql (dado de referência, como no banco)
+    from .geo import carregar_faixas
+    client.db.upsert("cep_faixas", carregar_faixas(), "cep_inicio")
+    # Funções SQL das migrations de db/ chamadas via rpc()
+    from .memory_rpcs import MEMORY_RPCS
+    for name, fn in MEMORY_RPCS.items():
+        client.register_rpc(name, fn)
+    # Mesmos circuit breakers do transporte HTTP, por serviço
+    from .breaker import breakers
+    client.set_guard(lambda service: breakers.get(service).track())
+    # Mesmo trace por requisição do transporte HTTP
+    from .tracing import record_memory_call
+    client.add_listener(record_memory_call)
+    return client
+
+
+def _create_admin_client() -> Client:
     try:
         settings.validate()
-        client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+        client = _create_client(settings.supabase_url, settings.supabase_service_role_key)
         if not client:
             raise RuntimeError("Falha ao criar cliente Supabase")
         return client
@@ -24,14 +213,83 @@ def get_admin_client() -> Client:
         raise
 
 
+def _create_public_client() -> Client:
+    url = settings.supabase_url
+    key = settings.supabase_anon_key or settings.supabase_service_role_key
+    if not url or not key:
+        settings.validate()
+    return _create_client(url, key)
+
+
 @lru_cache(maxsize=1)
+def _shared_admin_client() -> Client:
+    return _create_admin_client()
+
+
+@lru_cache(maxsize=1)
+def _shared_public_client() -> Client:
+    return _create_public_client()
+
+
+def get_admin_client() -> Client:
+    """Supabase client with Service Role key (admin operations).
+
+    Nota: Para lidar com erros de rede (WinError 10035), use execute_with_retry
+    das utils ao executar queries.
+    """
+    if settings.use_memory_backend:
+        return get_memory_client()
+    if settings.supabase_http_mode == "per_thread":
+        return _per_thread("admin_client", _create_admin_client)
+    return _shared_admin_client()
+
+
 def get_public_client() -> Client:
     """Supabase client with anon key (end-user auth/sign-in flows).
 
     Falls back to service role if anon key not provided.
     """
-    url = settings.supabase_url
-    key = settings.supabase_anon_key or settings.supabase_service_role_key
-    if not url or not key:
+    if settings.use_memory_backend:
+        return get_memory_client()
+    if settings.supabase_http_mode == "per_thread":
+        return _per_thread("public_client", _create_public_client)
+    return _shared_public_client()
+
+
+# -------------------- Clientes assíncronos (modo ASGI) --------------------
+# O httpx.AsyncClient fica preso ao event loop em que foi criado, então o
+# cliente é criado sob demanda e guardado por loop: {loop: (cliente, pool)}.
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+async def get_async_admin_client():
+    """`supabase.AsyncClient` com Service Role key, para os handlers de `routes_async`."""
+    if settings.use_memory_backend:
+        return get_memory_client().as_async()
+    loop = asyncio.get_running_loop()
+    client, _ = _async_clients.get(loop, (None, None))
+    if client is None:
+        from supabase import acreate_client
+
         settings.validate()
-    return create_client(url, key)
+        http_client = build_async_http_client()
+        try:
+            from supabase.lib.client_options import AsyncClientOptions
+            options = AsyncClientOptions(httpx_client=http_client)
+        except (ImportError, TypeError):
+            _avisar_sem_httpx_client()
+            await http_client.aclose()
+            http_client, options = None, None
+        if options is None:
+            client = await acreate_client(settings.supabase_url, settings.supabase_service_role_key)
+        else:
+            client = await acreate_client(settings.supabase_url, settings.supabase_service_role_key, options=options)
+        _async_clients[loop] = (client, http_client)
+    return client
+
+
+async def close_async_clients() -> None:
+    """Fecha o pool HTTP assíncrono do loop atual (shutdown do servidor ASGI)."""
+    _, http_client = _async_clients.pop(asyncio.get_running_loop(), (None, None))
+    if http_client is not None:
+        await http_client.aclose()
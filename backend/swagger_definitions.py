@@ -85,6 +85,22 @@ SWAGGER_DEFINITIONS = {
                 "description": "Complemento do endereço",
                 "example": "Apto 101"
             },
+            "latitude": {
+                "type": "number",
+                "description": "Latitude do CEP (ver geo_precisao), gravada com o endereco_cep",
+                "example": -23.5505
+            },
+            "longitude": {
+                "type": "number",
+                "description": "Longitude do CEP (ver geo_precisao), gravada com o endereco_cep",
+                "example": -46.6333
+            },
+            "geo_precisao": {
+                "type": "string",
+                "enum": ["cep", "bairro", "municipio"],
+                "description": "Precisão da coordenada: municipio = centro do município (aproximada)",
+                "example": "municipio"
+            },
             "is_worker": {
                 "type": "boolean",
                 "description": "Se o usuário é um profissional",
@@ -181,6 +197,27 @@ SWAGGER_DEFINITIONS = {
                 "description": "Localização onde o serviço será prestado",
                 "example": "São Paulo, SP"
             },
+            "cep": {
+                "type": "string",
+                "description": "CEP do local do serviço (8 dígitos)",
+                "example": "01310100"
+            },
+            "latitude": {
+                "type": "number",
+                "description": "Latitude do CEP (ver geo_precisao)",
+                "example": -23.5505
+            },
+            "longitude": {
+                "type": "number",
+                "description": "Longitude do CEP (ver geo_precisao)",
+                "example": -46.6333
+            },
+            "geo_precisao": {
+                "type": "string",
+                "enum": ["cep", "bairro", "municipio"],
+                "description": "Precisão da coordenada: municipio = centro do município (aproximada)",
+                "example": "municipio"
+            },
             "preco_min": {
                 "type": "number",
                 "format": "float",
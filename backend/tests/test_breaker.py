@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AsyncBreakerTransport,
+    BreakerTransport,
+    CircuitBreaker,
+    CircuitOpenError,
+    breakers,
+)
+from backend.config import settings
+
+
+@pytest.fixture(autouse=True)
+def _config(monkeypatch):
+    monkeypatch.setattr(settings, "breaker_enabled", True)
+    monkeypatch.setattr(settings, "breaker_window", 30.0)
+    monkeypatch.setattr(settings, "breaker_min_calls", 4)
+    monkeypatch.setattr(settings, "breaker_error_rate", 0.5)
+    monkeypatch.setattr(settings, "breaker_slow_call_ms", 3000.0)
+    monkeypatch.setattr(settings, "breaker_slow_rate", 0.8)
+    monkeypatch.setattr(settings, "breaker_open_seconds", 0.0)
+
+
+def _abrir(breaker):
+    for _ in range(settings.breaker_min_calls):
+        breaker.record(breaker.before_call(), False, 0.01)
+    assert breaker.state == OPEN
+
+
+def test_abre_com_taxa_de_erros():
+    breaker = CircuitBreaker("teste")
+    for _ in range(3):
+        breaker.record(breaker.before_call(), False, 0.01)
+    assert breaker.state == CLOSED
+    breaker.record(breaker.before_call(), True, 0.01)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+
+
+def test_aberto_rejeita_sem_chamar(monkeypatch):
+    monkeypatch.setattr(settings, "breaker_open_seconds", 60.0)
+    breaker = CircuitBreaker("teste")
+    _abrir(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_chamada_de_teste_fecha_ou_reabre():
+    breaker = CircuitBreaker("teste")
+    _abrir(breaker)
+    probe = breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    # Só uma chamada de teste por vez
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(probe, False, 0.01)
+    assert breaker.state == OPEN
+
+    breaker.record(breaker.before_call(), True, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_resultado_de_geracao_antiga_e_ignorado():
+    breaker = CircuitBreaker("teste")
+    antiga = breaker.before_call()
+    _abrir(breaker)
+    probe = breaker.before_call()
+    # Chamada que começou com o circuito fechado termina durante o teste
+    breaker.record(antiga, True, 0.01)
+    assert breaker.state == HALF_OPEN
+    breaker.record(probe, True, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_track_cancelado_libera_a_chamada_de_teste():
+    breaker = CircuitBreaker("teste")
+    _abrir(breaker)
+    with pytest.raises(KeyboardInterrupt):
+        with breaker.track():
+            raise KeyboardInterrupt
+    assert breaker.state == HALF_OPEN
+    with breaker.track():
+        pass
+    assert breaker.state == CLOSED
+
+
+def test_transporte_async_cancelado_libera_a_chamada_de_teste(monkeypatch):
+    class Lento(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            await asyncio.sleep(10)
+
+    class Rapido(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            return httpx.Response(200)
+
+    breaker = CircuitBreaker("postgrest")
+    monkeypatch.setattr(breakers, "for_url", lambda url: breaker)
+    _abrir(breaker)
+    request = httpx.Request("GET", "http://supabase.test/rest/v1/anuncios")
+
+    async def cenario():
+        lento = AsyncBreakerTransport(Lento())
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(lento.handle_async_request(request), 0.05)
+        rapido = AsyncBreakerTransport(Rapido())
+        return await rapido.handle_async_request(request)
+
+    assert asyncio.run(cenario()).status_code == 200
+    assert breaker.state == CLOSED
+
+
+def test_transporte_conta_5xx_como_erro(monkeypatch):
+    class Falho(httpx.BaseTransport):
+        def handle_request(self, request):
+            return httpx.Response(503)
+
+    breaker = CircuitBreaker("postgrest")
+    monkeypatch.setattr(breakers, "for_url", lambda url: breaker)
+    transport = BreakerTransport(Falho())
+    request = httpx.Request("GET", "http://supabase.test/rest/v1/anuncios")
+    for _ in range(settings.breaker_min_calls):
+        transport.handle_request(request)
+    assert breaker.state == OPEN
@@ -0,0 +1,35 @@
+from backend.listagens import mesclar_busca_anuncios
+
+
+def _anuncio(id, publicado_em, **extra):
+    return {"id": id, "publicado_em": publicado_em, **extra}
+
+
+TITULO = [_anuncio(1, "2024-01-01"), _anuncio(2, "2024-03-01"), _anuncio(5, "2024-02-01")]
+DESCRICAO = [_anuncio(3, "2024-04-01"), _anuncio(2, "2024-03-01"), _anuncio(4, "2023-12-01")]
+
+
+def test_relevancia_sem_migration_titulo_primeiro_e_recentes_em_cada_grupo():
+    merged = mesclar_busca_anuncios(TITULO, DESCRICAO, "relevancia")
+    assert [a["id"] for a in merged] == [2, 5, 1, 3, 4]
+
+
+def test_recentes_e_antigos():
+    assert [a["id"] for a in mesclar_busca_anuncios(TITULO, DESCRICAO, "recentes")] == [3, 2, 5, 1, 4]
+    assert [a["id"] for a in mesclar_busca_anuncios(TITULO, DESCRICAO, "antigos")] == [4, 1, 5, 2, 3]
+
+
+def test_ordem_estavel_independente_da_ordem_do_banco():
+    invertido = mesclar_busca_anuncios(TITULO[::-1], DESCRICAO[::-1], "relevancia")
+    assert [a["id"] for a in invertido] == [2, 5, 1, 3, 4]
+
+
+def test_empate_de_data_desempata_pelo_id():
+    titulo = [_anuncio(7, "2024-01-01"), _anuncio(9, "2024-01-01")]
+    assert [a["id"] for a in mesclar_busca_anuncios(titulo, [], "recentes")] == [9, 7]
+    assert [a["id"] for a in mesclar_busca_anuncios(titulo[::-1], [], "recentes")] == [9, 7]
+
+
+def test_remove_direcionados():
+    titulo = [_anuncio(1, "2024-01-01"), _anuncio(2, "2024-01-02", profissional_direcionado_id="u1")]
+    assert [a["id"] for a in mesclar_busca_anuncios(titulo, [], "relevancia")] == [1]
@@ -0,0 +1,89 @@
+import os
+import stat
+
+import pytest
+
+from backend import cache_backends
+from backend.cache import Cache, invalidate_tags
+from backend.cache_backends import CacheBackend, FileBackend, MemoryBackend
+
+
+@pytest.fixture(params=["memory", "file"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(100)
+    return FileBackend(str(tmp_path / "cache.sqlite3"), 100)
+
+
+def test_get_set_delete(backend):
+    cache = Cache("t", 60, 100, backend=backend)
+    assert cache.get("a") == (False, None)
+    cache.set("a", {"nome": "Ana"})
+    cache.set("vazio", None)
+    assert cache.get("a") == (True, {"nome": "Ana"})
+    assert cache.get("vazio") == (True, None)
+    cache.delete("a")
+    assert cache.get("a") == (False, None)
+
+
+def test_invalidate_tags_derruba_so_as_entradas_da_tag(backend):
+    perfis = Cache("perfil", 60, 100, backend=backend)
+    workers = Cache("worker", 60, 100, backend=backend)
+    perfis.set("1", {"id": 1}, tags=["usuario:1"])
+    workers.set("1", {"id": 1}, tags=["usuario:1"])
+    perfis.set("2", {"id": 2}, tags=["usuario:2"])
+
+    invalidate_tags("usuario:1")
+
+    assert perfis.get("1") == (False, None)
+    assert workers.get("1") == (False, None)
+    assert perfis.get("2") == (True, {"id": 2})
+    # Gravar de novo com a versão atual volta a valer
+    perfis.set("1", {"id": 1, "nome": "novo"}, tags=["usuario:1"])
+    assert perfis.get("1") == (True, {"id": 1, "nome": "novo"})
+
+
+def test_valor_lido_antes_da_invalidacao_nao_entra(backend):
+    cache = Cache("perfil", 60, 100, backend=backend)
+    versions = cache.versions(["usuario:1"])
+    # Escrita no banco entre a leitura e o set
+    invalidate_tags("usuario:1")
+    cache.set("1", {"id": 1, "nome": "antigo"}, tags=["usuario:1"], versions=versions)
+    assert cache.get("1") == (False, None)
+
+
+def test_ttl_zero_desliga(backend):
+    cache = Cache("t", 0, 100, backend=backend)
+    cache.set("a", 1)
+    assert cache.get("a") == (False, None)
+
+
+def test_backend_e_abstrato():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_arquivo_criado_com_permissao_0600(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    FileBackend(str(path), 10).set_many({"a": 1}, 60)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_caminho_padrao_em_diretorio_privado(monkeypatch, tmp_path):
+    isdir = os.path.isdir
+    monkeypatch.setattr(cache_backends.os.path, "isdir", lambda p: p != "/dev/shm" and isdir(p))
+    monkeypatch.setattr(cache_backends.tempfile, "gettempdir", lambda: str(tmp_path))
+    path = cache_backends._default_file_path()
+    assert os.path.dirname(path) == str(tmp_path / f"lancefacil-cache-{os.getuid()}")
+    assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+
+
+def test_caminho_padrao_recusa_diretorio_aberto(monkeypatch, tmp_path):
+    isdir = os.path.isdir
+    monkeypatch.setattr(cache_backends.os.path, "isdir", lambda p: p != "/dev/shm" and isdir(p))
+    monkeypatch.setattr(cache_backends.tempfile, "gettempdir", lambda: str(tmp_path))
+    aberto = tmp_path / f"lancefacil-cache-{os.getuid()}"
+    aberto.mkdir(mode=0o777)
+    os.chmod(aberto, 0o777)
+    with pytest.raises(PermissionError):
+        cache_backends._default_file_path()
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import time
+
+from backend import categories
+from backend.categories import CatalogSnapshot, CategoryCatalog, CategoryIndex
+
+
+def test_refresh_if_older_recarrega_uma_vez_para_chamadas_simultaneas(monkeypatch):
+    catalog = CategoryCatalog()
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        time.sleep(0.05)
+        items = [{"id": 1, "nome": "Elétrica", "slug": "eletrica"}]
+        catalog._snapshot = CatalogSnapshot(items, "etag", time.monotonic(), CategoryIndex.build(items))
+        return catalog._snapshot
+
+    monkeypatch.setattr(catalog, "_load", carregar)
+    threads = [threading.Thread(target=catalog.refresh_if_older, args=(5.0,)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cargas) == 1
+    assert catalog.refresh_if_older(5.0) is None
+
+
+def test_matching_ids_recarrega_catalogo_quando_categoria_e_desconhecida(monkeypatch):
+    catalog = CategoryCatalog()
+    antigos = [{"id": 1, "nome": "Elétrica", "slug": "eletrica"}]
+    catalog._snapshot = CatalogSnapshot(antigos, "v1", time.monotonic() - 60, CategoryIndex.build(antigos))
+
+    def carregar():
+        items = antigos + [{"id": 2, "nome": "Pintura", "slug": "pintura"}]
+        catalog._snapshot = CatalogSnapshot(items, "v2", time.monotonic(), CategoryIndex.build(items))
+        return catalog._snapshot
+
+    monkeypatch.setattr(catalog, "_load", carregar)
+    monkeypatch.setattr(categories, "catalog", catalog)
+    assert categories.matching_ids("pintura") == [2]
+    assert asyncio.run(categories.amatching_ids("Pintura")) == [2]
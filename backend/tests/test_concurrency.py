@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.concurrency import gather_parallel, run_parallel
+from backend.config import settings
+
+
+@pytest.fixture(autouse=True)
+def _pool(monkeypatch):
+    monkeypatch.setattr(settings, "fanout_max_workers", 4)
+
+
+def _dorme(segundos, valor=None):
+    def tarefa():
+        time.sleep(segundos)
+        return valor
+    return tarefa
+
+
+def _falha(erro, depois=0.0):
+    def tarefa():
+        time.sleep(depois)
+        raise erro
+    return tarefa
+
+
+def test_resultados_por_nome():
+    out = run_parallel({"a": lambda: 1, "b": _dorme(0.05, 2), "c": _dorme(0.01, 3)})
+    assert out == {"a": 1, "b": 2, "c": 3}
+
+
+def test_tempo_proximo_da_tarefa_mais_lenta():
+    inicio = time.monotonic()
+    run_parallel({"a": _dorme(0.2), "b": _dorme(0.2), "c": _dorme(0.2)})
+    assert time.monotonic() - inicio < 0.35
+
+
+def test_propaga_a_falha_real_com_tarefa_anterior_ainda_rodando():
+    liberar = threading.Event()
+    inicio = time.monotonic()
+    with pytest.raises(ValueError, match="quebrou"):
+        run_parallel({
+            "a": lambda: None,
+            "lenta": lambda: liberar.wait(2),
+            "falha": _falha(ValueError("quebrou"), 0.02),
+        }, max_attempts=1)
+    # Não espera a tarefa lenta para reportar a falha
+    assert time.monotonic() - inicio < 1
+    liberar.set()
+
+
+def test_default_cobre_falha_e_timeout():
+    out = run_parallel({
+        "a": lambda: 1,
+        "falha": _falha(ValueError("x")),
+        "lenta": _dorme(1, "tarde"),
+    }, timeout=0.1, max_attempts=1, defaults={"falha": [], "lenta": None})
+    assert out == {"a": 1, "falha": [], "lenta": None}
+
+
+def test_timeout_sem_default():
+    with pytest.raises(TimeoutError, match="lenta"):
+        run_parallel({"a": lambda: 1, "lenta": _dorme(1)}, timeout=0.05, max_attempts=1)
+
+
+def test_gather_parallel_propaga_a_falha_real():
+    async def lenta():
+        await asyncio.sleep(2)
+
+    async def falha():
+        await asyncio.sleep(0.02)
+        raise ValueError("quebrou")
+
+    async def cenario():
+        return await gather_parallel({"lenta": lenta, "falha": falha}, max_attempts=1)
+
+    inicio = time.monotonic()
+    with pytest.raises(ValueError, match="quebrou"):
+        asyncio.run(cenario())
+    assert time.monotonic() - inicio < 1
@@ -0,0 +1,110 @@
+import contextvars
+
+import httpx
+import pytest
+
+from backend.retry import (
+    FATAL,
+    SAFE,
+    TRANSIENT,
+    RetryPolicy,
+    classify,
+    start_request_budget,
+)
+
+
+class ErroSupabase(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def _status(status):
+    request = httpx.Request("GET", "http://supabase.test/rest/v1/anuncios")
+    return httpx.HTTPStatusError("erro", request=request, response=httpx.Response(status, request=request))
+
+
+@pytest.mark.parametrize("erro, esperado", [
+    (httpx.ConnectError("recusada"), SAFE),
+    (httpx.ReadTimeout("lento"), TRANSIENT),
+    (ErroSupabase("40001"), SAFE),
+    (ErroSupabase("23505"), FATAL),
+    (ErroSupabase("PGRST116"), FATAL),
+    (_status(429), SAFE),
+    (_status(502), TRANSIENT),
+    (_status(404), FATAL),
+    (ValueError("bug"), FATAL),
+    (KeyboardInterrupt(), FATAL),
+])
+def test_classify(erro, esperado):
+    assert classify(erro) == esperado
+
+
+def _falha_n_vezes(n, erro):
+    chamadas = []
+
+    def func():
+        chamadas.append(1)
+        if len(chamadas) <= n:
+            raise erro
+        return "ok"
+
+    return func, chamadas
+
+
+def test_repete_falha_transitoria_ate_dar_certo():
+    func, chamadas = _falha_n_vezes(2, httpx.ReadTimeout("lento"))
+    assert RetryPolicy(max_attempts=3, base_delay=0).call(func) == "ok"
+    assert len(chamadas) == 3
+
+
+def test_desiste_apos_max_attempts():
+    func, chamadas = _falha_n_vezes(5, httpx.ReadTimeout("lento"))
+    with pytest.raises(httpx.ReadTimeout):
+        RetryPolicy(max_attempts=3, base_delay=0).call(func)
+    assert len(chamadas) == 3
+
+
+def test_erro_fatal_nao_repete():
+    func, chamadas = _falha_n_vezes(1, ErroSupabase("23505"))
+    with pytest.raises(ErroSupabase):
+        RetryPolicy(max_attempts=3, base_delay=0).call(func)
+    assert len(chamadas) == 1
+
+
+def test_nao_idempotente_so_repete_safe():
+    politica = RetryPolicy(max_attempts=3, base_delay=0, idempotent=False)
+    func, chamadas = _falha_n_vezes(1, httpx.ReadTimeout("lento"))
+    with pytest.raises(httpx.ReadTimeout):
+        politica.call(func)
+    assert len(chamadas) == 1
+
+    func, chamadas = _falha_n_vezes(1, httpx.ConnectError("recusada"))
+    assert politica.call(func) == "ok"
+    assert len(chamadas) == 2
+
+
+def test_backoff_com_teto_e_jitter():
+    politica = RetryPolicy(base_delay=0.3, max_delay=1.0)
+    esperas = [politica.backoff(10) for _ in range(200)]
+    assert all(0 <= e <= 1.0 for e in esperas)
+    assert len(set(esperas)) > 1
+    assert all(0 <= politica.backoff(0) <= 0.3 for _ in range(50))
+
+
+def test_orcamento_da_requisicao_limita_os_retries(monkeypatch):
+    from backend.config import settings
+
+    monkeypatch.setattr(settings, "retry_budget_per_request", 1)
+
+    def requisicao():
+        start_request_budget()
+        politica = RetryPolicy(max_attempts=5, base_delay=0)
+        primeira, chamadas_1 = _falha_n_vezes(1, httpx.ReadTimeout("lento"))
+        assert politica.call(primeira) == "ok"
+        segunda, chamadas_2 = _falha_n_vezes(1, httpx.ReadTimeout("lento"))
+        with pytest.raises(httpx.ReadTimeout):
+            politica.call(segunda)
+        return len(chamadas_1), len(chamadas_2)
+
+    assert contextvars.copy_context().run(requisicao) == (2, 1)
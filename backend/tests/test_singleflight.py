@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def _em_paralelo(n, fn):
+    resultados, erros = [None] * n, [None] * n
+
+    def rodar(i):
+        try:
+            resultados[i] = fn()
+        except Exception as e:
+            erros[i] = e
+
+    threads = [threading.Thread(target=rodar, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+        time.sleep(0.005)
+    for t in threads:
+        t.join()
+    return resultados, erros
+
+
+def test_chamadas_simultaneas_viram_uma():
+    group = SingleFlight("teste")
+    chamadas = []
+
+    def carregar():
+        chamadas.append(1)
+        time.sleep(0.1)
+        return {"id": 1, "itens": [1, 2]}
+
+    resultados, erros = _em_paralelo(5, lambda: group.do("k", carregar))
+    assert len(chamadas) == 1
+    assert erros == [None] * 5
+    assert all(r == {"id": 1, "itens": [1, 2]} for r in resultados)
+    # Cada requisição recebe o seu objeto, inclusive o líder
+    assert len({id(r) for r in resultados}) == 5
+
+
+def test_lider_alterando_o_resultado_nao_afeta_quem_esperou():
+    group = SingleFlight("teste")
+    vistos = []
+
+    def lider():
+        value = group.do("k", lambda: (time.sleep(0.1), {"n": 1})[1])
+        value["n"] = 99
+
+    def esperar():
+        value = group.do("k", dict)
+        time.sleep(0.02)
+        vistos.append(value["n"])
+
+    threads = [threading.Thread(target=lider)] + [threading.Thread(target=esperar) for _ in range(2)]
+    for t in threads:
+        t.start()
+        time.sleep(0.01)
+    for t in threads:
+        t.join()
+    assert vistos == [1, 1]
+
+
+def test_excecao_chega_a_todos():
+    group = SingleFlight("teste")
+
+    def falhar():
+        time.sleep(0.05)
+        raise ValueError("fora do ar")
+
+    _, erros = _em_paralelo(3, lambda: group.do("k", falhar))
+    assert all(isinstance(e, ValueError) for e in erros)
+
+
+def test_sem_chamada_em_voo_nada_fica_guardado():
+    group = SingleFlight("teste")
+    assert group.do("k", lambda: 1) == 1
+    assert group.do("k", lambda: 2) == 2
+
+
+def test_ado_coalesce_e_copia():
+    group = SingleFlight("teste")
+    chamadas = []
+
+    async def carregar():
+        chamadas.append(1)
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    async def cenario():
+        return await asyncio.gather(*(group.ado("k", carregar) for _ in range(4)))
+
+    resultados = asyncio.run(cenario())
+    assert len(chamadas) == 1
+    assert all(r == {"id": 1} for r in resultados)
+    assert len({id(r) for r in resultados}) == 4
+
+
+def test_ado_lider_cancelado_nao_cancela_quem_esperava():
+    group = SingleFlight("teste")
+    chamadas = []
+
+    async def carregar():
+        chamadas.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def cenario():
+        lider = asyncio.ensure_future(group.ado("k", carregar))
+        await asyncio.sleep(0)
+        esperando = [asyncio.ensure_future(group.ado("k", carregar)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        lider.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lider
+        return await asyncio.gather(*esperando)
+
+    assert asyncio.run(cenario()) == ["ok", "ok", "ok"]
+    # Um dos que esperavam refez a chamada; os outros esperaram por ele
+    assert len(chamadas) == 2
@@ -0,0 +1,251 @@
+"""Instrumentação das chamadas ao Supabase por requisição.
+
+Cada chamada (PostgREST, Storage ou Auth) registra serviço, alvo (tabela,
+função RPC ou bucket), operação, duração, linhas e tentativa no trace da
+requisição atual. No fim da requisição o trace vira o header `Server-Timing`
+(visível no DevTools, aba Network > Timing) e, com `TRACE_LOG=true`, uma
+linha JSON no log. Padrões N+1 aparecem como um mesmo alvo repetido N vezes.
+As mesmas chamadas alimentam as métricas do Supabase em `/metrics` (metrics.py).
+
+As chamadas HTTP são medidas por `TracingTransport` (do envio até os headers
+da resposta); no backend em memória, por um listener do `MemorySupabaseClient`.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+import json
+import re
+import threading
+import time
+
+import httpx
+
+from .config import settings
+from .metrics import record_supabase_call
+from .retry import current_attempt
+
+
+@dataclass
+class Call:
+    service: str
+    target: str
+    op: str
+    duration: float  # segundos
+    rows: Optional[int]
+    attempt: int  # 0 = primeira tentativa
+    error: Optional[str] = None
+
+
+class RequestTrace:
+    """Chamadas ao Supabase de uma requisição (thread-safe: o fan-out compartilha)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls: List[Call] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: Call) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def groups(self) -> List[Dict[str, Any]]:
+        """Chamadas agrupadas por (serviço, alvo, operação), as mais lentas primeiro."""
+        with self._lock:
+            calls = list(self.calls)
+        grouped: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for c in calls:
+            g = grouped.setdefault((c.service, c.target, c.op), {
+                "service": c.service, "target": c.target, "op": c.op,
+                "calls": 0, "ms": 0.0, "rows": 0, "retries": 0, "errors": 0,
+            })
+            g["calls"] += 1
+            g["ms"] += c.duration * 1000
+            g["rows"] += c.rows or 0
+            g["retries"] += 1 if c.attempt else 0
+            g["errors"] += 1 if c.error else 0
+        return sorted(grouped.values(), key=lambda g: g["ms"], reverse=True)
+
+
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def start_trace() -> RequestTrace:
+    """Abre o trace da requisição (before_request do Flask e handlers ASGI)."""
+    trace = RequestTrace()
+    _trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _trace.get()
+
+
+def record(service: str, target: str, op: str, duration: float,
+           rows: Optional[int] = None, error: Union[BaseException, str, None] = None) -> None:
+    """Registra uma chamada nas métricas e no trace da requisição atual (se houver)."""
+    if isinstance(error, BaseException):
+        error = type(error).__name__
+    attempt = current_attempt()
+    record_supabase_call(service, target, op, duration, attempt, error)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(Call(service, target, op, duration, rows, attempt, error))
+
+
+def record_memory_call(service: str, target: str, op: str, duration: float, rows: Optional[int], error) -> None:
+    """Listener do `MemorySupabaseClient` (mesma assinatura de `add_listener`)."""
+    record(service, target, op, duration, rows, error)
+
+
+# -------------------- Chamadas HTTP --------------------
+_PG_OPS = {"GET": "select", "HEAD": "count", "POST": "insert", "PATCH": "update", "PUT": "upsert", "DELETE": "delete"}
+_STORAGE_OPS = {"GET": "download", "HEAD": "info", "POST": "upload", "PUT": "update", "DELETE": "remove"}
+
+
+def describe_request(request: httpx.Request) -> Tuple[str, str, str]:
+    """(serviço, alvo, operação) de uma requisição às APIs do Supabase."""
+    path = request.url.path
+    method = request.method
+    if path.startswith("/rest/v1/"):
+        rest = path[len("/rest/v1/"):]
+        if rest.startswith("rpc/"):
+            return "postgrest", rest[len("rpc/"):], "rpc"
+        op = _PG_OPS.get(method, method.lower())
+        if method == "POST" and "resolution=" in request.headers.get("prefer", ""):
+            op = "upsert"
+        return "postgrest", rest.split("/")[0], op
+    if path.startswith("/storage/v1/"):
+        parts = path[len("/storage/v1/"):].split("/")
+        if parts[0] != "object":
+            return "storage", "buckets", method.lower()
+        # object/<bucket>/<caminho> ou object/{public,sign,list,...}/<bucket>/<caminho>
+        if len(parts) > 2 and parts[1] in ("public", "sign", "authenticated", "list", "info"):
+            op = "list" if parts[1] == "list" else _STORAGE_OPS.get(method, method.lower())
+            return "storage", parts[2], op
+        return "storage", parts[1] if len(parts) > 1 else "", _STORAGE_OPS.get(method, method.lower())
+    if path.startswith("/auth/v1/"):
+        parts = path[len("/auth/v1/"):].split("/")
+        return "auth", parts[0], request.url.params.get("grant_type") or method.lower()
+    return "http", request.url.host, method.lower()
+
+
+def _rows_from(response: httpx.Response) -> Optional[int]:
+    # PostgREST devolve `Content-Range: 0-24/*` (ou `*/*` sem linhas) nas leituras
+    content_range = response.headers.get("content-range")
+    if not content_range:
+        return None
+    span = content_range.split("/")[0]
+    if "-" in span:
+        first, _, last = span.partition("-")
+        try:
+            return int(last) - int(first) + 1
+        except ValueError:
+            return None
+    return 0 if response.request.method == "GET" else None
+
+
+def _status_error(response: httpx.Response) -> Optional[str]:
+    return f"HTTP {response.status_code}" if response.status_code >= 400 else None
+
+
+class TracingTransport(httpx.BaseTransport):
+    """Transporte httpx que registra cada requisição nas métricas e no trace da requisição."""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = self._inner.handle_request(request)
+        except Exception as e:
+            record(*describe_request(request), time.perf_counter() - start, error=e)
+            raise
+        record(*describe_request(request), time.perf_counter() - start,
+               _rows_from(response), _status_error(response))
+        return response
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class AsyncTracingTransport(httpx.AsyncBaseTransport):
+    """Versão assíncrona de `TracingTransport` (modo ASGI)."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception as e:
+            record(*describe_request(request), time.perf_counter() - start, error=e)
+            raise
+        record(*describe_request(request), time.perf_counter() - start,
+               _rows_from(response), _status_error(response))
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# -------------------- Saída --------------------
+_TOKEN_INVALIDO = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def server_timing(trace: RequestTrace) -> str:
+    """Valor do header Server-Timing: total, soma do Supabase e os grupos mais lentos."""
+    groups = trace.groups()
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    calls = sum(g["calls"] for g in groups)
+    retries = sum(g["retries"] for g in groups)
+    entries = [
+        f"app;dur={total_ms:.1f}",
+        f'supabase;dur={sum(g["ms"] for g in groups):.1f};desc="{calls} calls, {retries} retries"',
+    ]
+    for g in groups[:settings.server_timing_max_entries]:
+        name = _TOKEN_INVALIDO.sub("_", f'{g["service"]}.{g["target"]}.{g["op"]}')
+        desc = f'x{g["calls"]}, {g["rows"]} rows'
+        if g["retries"]:
+            desc += f', {g["retries"]} retries'
+        if g["errors"]:
+            desc += f', {g["errors"]} errors'
+        entries.append(f'{name};dur={g["ms"]:.1f};desc="{desc}"')
+    return ", ".join(entries)
+
+
+def log_line(trace: RequestTrace, method: str, path: str, status: int) -> Optional[str]:
+    """Linha JSON do trace (`TRACE_LOG`), ou None abaixo de `TRACE_LOG_MIN_MS`."""
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    if total_ms < settings.trace_log_min_ms:
+        return None
+    groups = trace.groups()
+    for g in groups:
+        g["ms"] = round(g["ms"], 1)
+    return json.dumps({
+        "trace": "supabase",
+        "method": method,
+        "path": path,
+        "status": status,
+        "total_ms": round(total_ms, 1),
+        "supabase_ms": round(sum(g["ms"] for g in groups), 1),
+        "calls": sum(g["calls"] for g in groups),
+        "retries": sum(g["retries"] for g in groups),
+        "groups": groups,
+    }, ensure_ascii=False)
+
+
+def finish_trace(response):
+    """after_request: anexa o Server-Timing e, se ligado, escreve o log do trace."""
+    trace = _trace.get()
+    if trace is None:
+        return response
+    if settings.server_timing:
+        response.headers["Server-Timing"] = server_timing(trace)
+    if settings.trace_log:
+        from flask import request
+        line = log_line(trace, request.method, request.path, response.status_code)
+        if line:
+            print(line)
+    return response
@@ -1,10 +1,14 @@
-from typing import Any, Dict, Optional, List, Callable, TypeVar
+from typing import Any, Awaitable, Dict, Optional, List, Callable, Set, Tuple, TypeVar
 import os
 import base64
-import time
 
 from flask import jsonify
 
+from .cache import Cache, invalidate_tags
+from .config import settings
+from .retry import RetryPolicy, is_missing_function, is_no_rows, is_transient
+from .storage import PORTFOLIO_PHOTOS, ensure_bucket, public_url
+
 T = TypeVar('T')
 
 
@@ -20,15 +24,22 @@ def execute_with_retry(
     func: Callable[[], T],
     max_attempts: int = 3,
     delay: float = 0.3,
-    retry_on_network_error: bool = True
+    retry_on_network_error: bool = True,
+    idempotent: bool = True
 ) -> T:
-    """Executa uma função com retry automático para erros de rede.
+    """Executa uma função com retry automático para falhas transitórias.
+    
+    A decisão de repetir e a espera entre tentativas seguem `retry.RetryPolicy`:
+    classificação por tipo de exceção/status HTTP, backoff exponencial com
+    jitter e orçamento de retries por requisição.
     
     Args:
         func: Função a ser executada (deve retornar o resultado da query)
         max_attempts: Número máximo de tentativas
-        delay: Delay entre tentativas em segundos
-        retry_on_network_error: Se True, retenta apenas em erros de rede
+        delay: Delay base entre tentativas em segundos
+        retry_on_network_error: Se True, retenta apenas em falhas transitórias
+        idempotent: False para escritas não idempotentes (ex.: insert), que só
+            são repetidas quando a requisição certamente não foi processada
     
     Returns:
         Resultado da função
@@ -36,39 +47,33 @@ def execute_with_retry(
     Raises:
         Exception: Se todas as tentativas falharem
     """
-    last_exception = None
-    
-    for attempt in range(max_attempts):
-        try:
-            return func()
-        except Exception as e:
-            last_exception = e
-            error_str = str(e)
-            
-            # Verifica se é erro de rede
-            is_network_error = (
-                "WinError 10035" in error_str or
-                "10035" in error_str or
-                "ReadError" in error_str or
-                "socket" in error_str.lower() or
-                "network" in error_str.lower() or
-                "connection" in error_str.lower() or
-                "timeout" in error_str.lower()
-            )
-            
-            # Se não for erro de rede e retry_on_network_error=True, não retenta
-            if retry_on_network_error and not is_network_error:
-                raise
-            
-            # Se for última tentativa, levanta exceção
-            if attempt == max_attempts - 1:
-                raise
-            
-            # Aguarda antes de tentar novamente
-            time.sleep(delay * (attempt + 1))  # Backoff exponencial
-    
-    # Nunca deve chegar aqui, mas por segurança
-    raise last_exception if last_exception else Exception("Erro desconhecido")
+    policy = RetryPolicy(
+        max_attempts=max_attempts,
+        base_delay=delay,
+        idempotent=idempotent,
+        retry_unknown=not retry_on_network_error,
+    )
+    return policy.call(func)
+
+
+async def aexecute_with_retry(
+    func: Callable[[], Awaitable[T]],
+    max_attempts: int = 3,
+    delay: float = 0.3,
+    retry_on_network_error: bool = True,
+    idempotent: bool = True
+) -> T:
+    """Versão assíncrona de `execute_with_retry` (modo ASGI).
+
+    `func` devolve uma corrotina nova a cada chamada (ex.: `lambda: q.execute()`).
+    """
+    policy = RetryPolicy(
+        max_attempts=max_attempts,
+        base_delay=delay,
+        idempotent=idempotent,
+        retry_unknown=not retry_on_network_error,
+    )
+    return await policy.acall(func)
 
 
 def to_int(value: Optional[str], default: int = 0) -> int:
@@ -85,8 +90,75 @@ def paginate_params(args) -> Dict[str, int]:
     return {"page": page, "page_size": page_size, "offset": offset, "limit": page_size}
 
 
+# -------------------- Funções de busca (db/migration_busca_*.sql) --------------------
+# Devolvem os ids da página (na ordem do ranking) e o total em todas as linhas;
+# com a página vazia vem uma única linha com id NULL, só com o total.
+_rpcs_ausentes: Set[str] = set()
+
+
+def rpc_indisponivel(error: BaseException, funcao: str, migration: str) -> bool:
+    """True (e avisa uma vez por função) quando a migration da função não foi aplicada."""
+    if not is_missing_function(error):
+        return False
+    if funcao not in _rpcs_ausentes:
+        _rpcs_ausentes.add(funcao)
+        print(f"[AVISO] Função {funcao} ausente (aplique db/{migration}); usando a consulta antiga")
+    return True
+
+
+def ids_da_pagina(linhas: List[Dict[str, Any]]) -> Tuple[List[Any], int]:
+    """(ids da página na ordem devolvida, total de resultados) a partir das linhas da RPC."""
+    total = (linhas[0].get("total") or 0) if linhas else 0
+    return [linha["id"] for linha in linhas if linha.get("id") is not None], total
+
+
+def ordenar_por_ids(items: List[Dict[str, Any]], ids: List[Any]) -> List[Dict[str, Any]]:
+    por_id = {item["id"]: item for item in items}
+    return [por_id[i] for i in ids if i in por_id]
+
+
 # -------------------- Worker Profile helpers --------------------
 # Monta objeto perfil_worker agregando tabelas: perfil_worker, worker_categorias, worker_portfolio
+
+# Perfis montados (ou None: usuário sem perfil_worker) por user_id, com a tag
+# `usuario:<id>`. `upsert_worker_profile` invalida; com CACHE_BACKEND=memory
+# outros processos convergem dentro do TTL.
+_worker_profiles = Cache("worker_profile", settings.worker_profile_cache_ttl, settings.worker_profile_cache_size)
+
+
+def usuario_tag(user_id: str) -> str:
+    """Tag das entradas de cache derivadas de um usuário (perfil, perfil_worker)."""
+    return f"usuario:{user_id}"
+
+
+def perfis_worker_em_cache(user_ids: List[str]):
+    """Separa `user_ids` em perfis já em cache ({user_id: perfil}) e ids que faltam.
+
+    Devolve também a versão das tags dos ids que faltam, a repassar para
+    `guardar_perfis_worker`.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    em_cache = _worker_profiles.get_many(user_ids)
+    encontrados = {uid: perfil for uid, perfil in em_cache.items() if perfil is not None}
+    faltando = [uid for uid in user_ids if uid not in em_cache]
+    geracao = _worker_profiles.versions(usuario_tag(uid) for uid in faltando)
+    return encontrados, faltando, geracao
+
+
+def guardar_perfis_worker(user_ids: List[str], perfis: Dict[str, Dict[str, Any]], geracao: Dict[str, int]) -> None:
+    """Guarda o resultado de uma busca completa (ids sem perfil ficam como None)."""
+    _worker_profiles.set_many(
+        {uid: perfis.get(uid) for uid in user_ids},
+        tags={uid: [usuario_tag(uid)] for uid in user_ids},
+        versions=geracao,
+    )
+
+
+def invalidate_worker_profile(user_id: str) -> None:
+    """Derruba o perfil_worker e o perfil do usuário em cache (tag `usuario:<id>`)."""
+    invalidate_tags(usuario_tag(user_id))
+
+
 def build_worker_profile_batch(admin_client, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
     """Busca perfis de worker em lote para múltiplos usuários.
     
@@ -100,107 +172,50 @@ def build_worker_profile_batch(admin_client, user_ids: List[str]) -> Dict[str, D
     if not admin_client or not user_ids:
         return {}
     
-    result_map = {}
+    result_map, user_ids, geracao = perfis_worker_em_cache(user_ids)
+    if not user_ids:
+        return result_map
     
     try:
-        # Buscar todos os perfis de uma vez
-        perfis_base = execute_with_retry(
-            lambda: admin_client.table("perfil_worker")
+        from .concurrency import run_parallel
+
+        # Perfis, categorias e portfólios são independentes: buscar em paralelo
+        res = run_parallel({
+            "perfis": lambda: admin_client.table("perfil_worker")
                 .select("*")
                 .in_("user_id", user_ids)
                 .execute()
                 .data or [],
-            max_attempts=2,
-            delay=0.2
-        )
-        
-        # Buscar todas as categorias de uma vez
-        worker_categorias = execute_with_retry(
-            lambda: admin_client.table("worker_categorias")
+            "categorias": lambda: admin_client.table("worker_categorias")
                 .select("user_id, categoria_id")
                 .in_("user_id", user_ids)
                 .execute()
                 .data or [],
-            max_attempts=2,
-            delay=0.2
-        )
-        
-        # Buscar todos os portfolios de uma vez
-        portfolios = execute_with_retry(
-            lambda: admin_client.table("worker_portfolio")
+            "portfolios": lambda: admin_client.table("worker_portfolio")
                 .select("user_id, id, url")
                 .in_("user_id", user_ids)
                 .order("id")
                 .execute()
                 .data or [],
-            max_attempts=2,
-            delay=0.2
-        )
+        }, max_attempts=2, delay=0.2)
+        perfis_base = res["perfis"]
+        worker_categorias = res["categorias"]
+        portfolios = res["portfolios"]
         
         # Obter IDs de categorias únicos
         categoria_ids = list({wc.get("categoria_id") for wc in worker_categorias if wc.get("categoria_id")})
-        categorias_map = {}
-        if categoria_ids:
-            try:
-                cats = execute_with_retry(
-                    lambda: admin_client.table("categorias")
-                        .select("id, nome")
-                        .in_("id", categoria_ids)
-                        .execute()
-                        .data or [],
-                    max_attempts=2,
-                    delay=0.2
-                )
-                categorias_map = {c.get("id"): c.get("nome") for c in cats if c.get("id") and c.get("nome")}
-            except Exception:
-                categorias_map = {}
-        
-        # Agrupar dados por user_id
-        categorias_por_user = {}
-        for wc in worker_categorias:
-            user_id = wc.get("user_id")
-            cat_id = wc.get("categoria_id")
-            if user_id and cat_id:
-                if user_id not in categorias_por_user:
-                    categorias_por_user[user_id] = []
-                cat_nome = categorias_map.get(cat_id)
-                if cat_nome:
-                    categorias_por_user[user_id].append(cat_nome)
-        
-        portfolio_por_user = {}
-        for p in portfolios:
-            user_id = p.get("user_id")
-            if user_id:
-                if user_id not in portfolio_por_user:
-                    portfolio_por_user[user_id] = []
-                portfolio_por_user[user_id].append({
-                    "id": p.get("id"),
-                    "url": p.get("url")
-                })
+        completo = True
+        try:
+            from .categories import category_names
+            categorias_map = category_names(categoria_ids)
+        except Exception:
+            categorias_map = {}
+            completo = False
         
-        # Montar perfis
-        for base in perfis_base:
-            user_id = base.get("user_id")
-            if not user_id:
-                continue
-            
-            disponibilidade = {
-                "segunda": bool(base.get("disp_segunda")),
-                "terca": bool(base.get("disp_terca")),
-                "quarta": bool(base.get("disp_quarta")),
-                "quinta": bool(base.get("disp_quinta")),
-                "sexta": bool(base.get("disp_sexta")),
-                "sabado": bool(base.get("disp_sabado")),
-                "domingo": bool(base.get("disp_domingo")),
-            }
-            
-            result_map[user_id] = {
-                "descricao": base.get("descricao"),
-                "experiencia": base.get("experiencia"),
-                "disponibilidade": disponibilidade,
-                "categorias": categorias_por_user.get(user_id, []),
-                "portfolio": portfolio_por_user.get(user_id, []),
-            }
+        perfis = montar_perfis_worker(perfis_base, worker_categorias, portfolios, categorias_map)
+        if completo:
+            guardar_perfis_worker(user_ids, perfis, geracao)
+        result_map.update(perfis)
     except Exception as e:
         import traceback
         print(f"[AVISO] Erro ao buscar perfis em lote: {e}")
@@ -209,59 +224,106 @@ def build_worker_profile_batch(admin_client, user_ids: List[str]) -> Dict[str, D
     return result_map
 
 
+def montar_perfis_worker(
+    perfis_base: List[Dict[str, Any]],
+    worker_categorias: List[Dict[str, Any]],
+    portfolios: List[Dict[str, Any]],
+    categorias_map: Dict[Any, str],
+) -> Dict[str, Dict[str, Any]]:
+    """Monta {user_id: perfil_worker} a partir das linhas já buscadas.
+
+    Compartilhado por `build_worker_profile_batch` e pela versão assíncrona.
+    """
+    result_map = {}
+    
+    # Agrupar dados por user_id
+    categorias_por_user = {}
+    for wc in worker_categorias:
+        user_id = wc.get("user_id")
+        cat_id = wc.get("categoria_id")
+        if user_id and cat_id:
+            if user_id not in categorias_por_user:
+                categorias_por_user[user_id] = []
+            cat_nome = categorias_map.get(cat_id)
+            if cat_nome:
+                categorias_por_user[user_id].append(cat_nome)
+    
+    portfolio_por_user = {}
+    for p in portfolios:
+        user_id = p.get("user_id")
+        if user_id:
+            if user_id not in portfolio_por_user:
+                portfolio_por_user[user_id] = []
+            portfolio_por_user[user_id].append({
+                "id": p.get("id"),
+                "url": p.get("url")
+            })
+    
+    # Montar perfis
+    for base in perfis_base:
+        user_id = base.get("user_id")
+        if not user_id:
+            continue
+        
+        disponibilidade = {
+            "segunda": bool(base.get("disp_segunda")),
+            "terca": bool(base.get("disp_terca")),
+            "quarta": bool(base.get("disp_quarta")),
+            "quinta": bool(base.get("disp_quinta")),
+            "sexta": bool(base.get("disp_sexta")),
+            "sabado": bool(base.get("disp_sabado")),
+            "domingo": bool(base.get("disp_domingo")),
+        }
+        
+        result_map[user_id] = {
+            "descricao": base.get("descricao"),
+            "experiencia": base.get("experiencia"),
+            "disponibilidade": disponibilidade,
+            "categorias": categorias_por_user.get(user_id, []),
+            "portfolio": portfolio_por_user.get(user_id, []),
+        }
+    return result_map
+
+
 def build_worker_profile(admin_client, user_id: str) -> Optional[Dict[str, Any]]:
     if not admin_client or not user_id:
         return None
-    
-    # Tentar buscar perfil_worker com retry para lidar com WinError 10035
-    base = None
-    max_tentativas = 2
-    for tentativa in range(max_tentativas):
-        try:
-            base = (
-                admin_client.table("perfil_worker")
+    hit, perfil = _worker_profiles.get(user_id)
+    if hit:
+        return perfil
+    tags = [usuario_tag(user_id)]
+    geracao = _worker_profiles.versions(tags)
+    perfil, completo = _buscar_worker_profile(admin_client, user_id)
+    if completo:
+        _worker_profiles.set(user_id, perfil, tags=tags, versions=geracao)
+    return perfil
+
+
+def _buscar_worker_profile(admin_client, user_id: str):
+    """(perfil ou None, completo); incompleto se alguma query falhou (não vai para o cache)."""
+    completo = True
+    # Buscar perfil_worker com retry (falhas transitórias de rede)
+    try:
+        base = execute_with_retry(
+            lambda: admin_client.table("perfil_worker")
                 .select("*")
                 .eq("user_id", user_id)
                 .single()
                 .execute()
-                .data
-            )
-            break  # Sucesso, sair do loop
-        except Exception as e:
-            error_str = str(e)
-            is_expected_error = (
-                "No rows" in error_str or 
-                "not found" in error_str.lower() or
-                "PGRST116" in error_str or  # Cannot coerce to single JSON object (0 rows)
-                "0 rows" in error_str
-            )
-            is_network_error = (
-                "WinError 10035" in error_str or
-                "10035" in error_str or
-                "socket" in error_str.lower() or
-                "network" in error_str.lower()
-            )
-            
-            # Se for erro esperado (sem perfil), não logar e retornar None
-            if is_expected_error:
-                base = None
-                break
-            
-            # Se for erro de rede e ainda há tentativas, tentar novamente
-            if is_network_error and tentativa < max_tentativas - 1:
-                import time
-                time.sleep(0.3)
-                continue
-            
-            # Se não for erro esperado nem de rede, ou última tentativa, logar apenas se não for erro de rede
-            if not is_network_error:
-                import traceback
+                .data,
+            max_attempts=2,
+            delay=0.3
+        )
+    except Exception as e:
+        # Sem perfil (PGRST116) é esperado; falhas de rede não são logadas
+        if not is_no_rows(e):
+            completo = False
+            if not is_transient(e):
                 print(f"[AVISO] Erro ao buscar perfil_worker para {user_id}: {e}")
-            base = None
-            break
+        base = None
 
     if not base:
-        return None
+        return None, completo
 
     # Disponibilidade em objeto
     disponibilidade = {
@@ -287,21 +349,17 @@ def build_worker_profile(admin_client, user_id: str) -> Optional[Dict[str, Any]]
         categoria_ids: List[int] = [c.get("categoria_id") for c in wc if c and c.get("categoria_id") is not None]
     except Exception:
         categoria_ids = []
+        completo = False
 
     categorias: List[str] = []
     if categoria_ids:
         try:
-            cats = (
-                admin_client.table("categorias")
-                .select("id, nome")
-                .in_("id", categoria_ids)
-                .execute()
-                .data
-                or []
-            )
-            categorias = [c.get("nome") for c in cats]
+            from .categories import category_names
+            nomes = category_names(categoria_ids)
+            categorias = [nomes[cid] for cid in categoria_ids if cid in nomes]
         except Exception:
             categorias = []
+            completo = False
 
     # Portfólio
     try:
@@ -320,6 +378,7 @@ def build_worker_profile(admin_client, user_id: str) -> Optional[Dict[str, Any]]
         ]
     except Exception:
         portfolio = []
+        completo = False
 
     return {
         "descricao": base.get("descricao"),
@@ -327,7 +386,7 @@ def build_worker_profile(admin_client, user_id: str) -> Optional[Dict[str, Any]]
         "disponibilidade": disponibilidade,
         "categorias": categorias,
         "portfolio": portfolio,
-    }
+    }, completo
 
 
 def upsert_worker_profile(admin_client, user_id: str, worker: Dict[str, Any]):
@@ -336,6 +395,15 @@ def upsert_worker_profile(admin_client, user_id: str, worker: Dict[str, Any]):
       descricao?, experiencia?, disponibilidade?: {segunda..domingo}, categorias?: [string|int], portfolio?: [{url,name?}]
     }
     """
+    try:
+        _gravar_worker_profile(admin_client, user_id, worker)
+    finally:
+        # Também em falha parcial: parte das tabelas pode já ter sido alterada.
+        # A tag `usuario:<id>` derruba também o perfil do usuário logado (auth)
+        invalidate_worker_profile(user_id)
+
+
+def _gravar_worker_profile(admin_client, user_id: str, worker: Dict[str, Any]):
     # Upsert no perfil_worker
     disponibilidade = worker.get("disponibilidade") or {}
     payload = {
@@ -360,36 +428,12 @@ def upsert_worker_profile(admin_client, user_id: str, worker: Dict[str, Any]):
         admin_client.table("worker_categorias").delete().eq("user_id", user_id).execute()
         if categorias:
             # Mapear qualquer formato (id, string id, slug, nome) -> id
-            ids: List[int] = []
+            from .categories import resolve_ids
             try:
-                cats_all = (
-                    admin_client.table("categorias")
-                    .select("id, nome")
-                    .execute()
-                    .data
-                    or []
-                )
+                ids = resolve_ids(categorias)
             except Exception:
-                cats_all = []
-            by_nome = {str((c.get("nome") or "").strip().lower()): c.get("id") for c in cats_all}
-            for c in categorias:
-                if isinstance(c, int):
-                    ids.append(c)
-                    continue
-                s = str(c).strip()
-                if not s:
-                    continue
-                # string que representa número
-                try:
-                    n = int(s)
-                    ids.append(n)
-                    continue
-                except Exception:
-                    pass
-                key_nome = s.lower()
-                cid = by_nome.get(key_nome)
-                if cid is not None:
-                    ids.append(cid)
+                # Catálogo indisponível: aproveita só os ids numéricos
+                ids = [int(c) for c in categorias if str(c).strip().isdigit()]
 
             rows = [{"user_id": user_id, "categoria_id": cid} for cid in ids]
             if rows:
@@ -408,9 +452,9 @@ def upsert_worker_profile(admin_client, user_id: str, worker: Dict[str, Any]):
             # Se veio data URL (base64), faz upload para o storage e usa URL pública
             if isinstance(url, str) and url.startswith("data:"):
                 try:
-                    public_url = upload_data_url(admin_client, "portifolio-fotos", user_id, url, nome)
-                    if public_url:
-                        url = public_url
+                    uploaded_url = upload_data_url(admin_client, PORTFOLIO_PHOTOS, user_id, url, nome)
+                    if uploaded_url:
+                        url = uploaded_url
                 except Exception:
                     # ignora falha em upload desse item específico
                     url = None
@@ -421,35 +465,9 @@ def upsert_worker_profile(admin_client, user_id: str, worker: Dict[str, Any]):
 
 
 # -------------------- Storage helpers --------------------
-def _ensure_bucket(admin, bucket: str):
-    try:
-        buckets = admin.storage.list_buckets()
-        names = set()
-        for b in buckets or []:
-            if isinstance(b, dict):
-                names.add(b.get("name") or b.get("id"))
-            else:
-                try:
-                    names.add(getattr(b, "name", None) or getattr(b, "id", None))
-                except Exception:
-                    pass
-        if bucket not in names:
-            admin.storage.create_bucket(bucket, public=True)
-        else:
-            try:
-                admin.storage.update_bucket(bucket, public=True)
-            except Exception:
-                pass
-    except Exception:
-        try:
-            admin.storage.create_bucket(bucket, public=True)
-        except Exception:
-            pass
-
-
 def upload_data_url(admin, bucket: str, user_id: str, data_url: str, name: Optional[str] = None) -> Optional[str]:
     """Recebe uma data URL (ex.: data:image/png;base64,AAA...) e publica no storage, retornando a URL pública."""
-    _ensure_bucket(admin, bucket)
+    ensure_bucket(admin, bucket)
     if not data_url.startswith("data:"):
         return None
     try:
@@ -466,15 +484,7 @@ def upload_data_url(admin, bucket: str, user_id: str, data_url: str, name: Optio
         filename = (name or "portfolio")
         path = f"{user_id}/{int(os.getenv('EPOCH', '0')) or 0}_{abs(hash(filename))}{ext}"
         admin.storage.from_(bucket).upload(path, raw, {"content-type": mime})
-        url_data = admin.storage.from_(bucket).get_public_url(path)
-        if isinstance(url_data, str):
-            return url_data
-        if isinstance(url_data, dict):
-            return url_data.get("public_url") or url_data.get("publicURL") or url_data.get("signedURL")
-        try:
-            return getattr(url_data, "public_url", None) or getattr(url_data, "publicURL", None)
-        except Exception:
-            return None
+        return public_url(bucket, path)
     except Exception:
         return None
 
@@ -484,7 +494,7 @@ def upload_anuncio_image(admin, bucket: str, user_id: str, anuncio_id: Optional[
     
     Args:
         admin: Cliente admin do Supabase
-        bucket: Nome do bucket (ex: 'img-anuncios')
+        bucket: Nome do bucket (ex: storage.ANUNCIO_IMAGES)
         user_id: ID do usuário dono do anúncio
         anuncio_id: ID do anúncio (opcional, para organizar por anúncio)
         file_data: Bytes do arquivo
@@ -494,7 +504,7 @@ def upload_anuncio_image(admin, bucket: str, user_id: str, anuncio_id: Optional[
     Returns:
         URL pública da imagem ou None em caso de erro
     """
-    _ensure_bucket(admin, bucket)
+    ensure_bucket(admin, bucket)
     
     try:
         import time
@@ -515,25 +525,8 @@ def upload_anuncio_image(admin, bucket: str, user_id: str, anuncio_id: Optional[
         # Faz upload
         admin.storage.from_(bucket).upload(path, file_data, {"content-type": mimetype})
         
-        # Obtém URL pública
-        url_data = admin.storage.from_(bucket).get_public_url(path)
-        
-        if isinstance(url_data, str):
-            return url_data
-        elif isinstance(url_data, dict):
-            return url_data.get("public_url") or url_data.get("publicURL") or url_data.get("signedURL")
-        else:
-            try:
-                return getattr(url_data, "public_url", None) or getattr(url_data, "publicURL", None)
-            except Exception:
-                pass
-        
-        # Fallback: constrói URL manualmente
-        storage_url = getattr(admin.storage, "url", None) or os.getenv("SUPABASE_URL", "")
-        if storage_url:
-            return f"{storage_url}/storage/v1/object/public/{bucket}/{path}"
-        
-        return None
+        # URL pública montada localmente (bucket público)
+        return public_url(bucket, path)
     except Exception as e:
         print(f"[ERRO] Falha ao fazer upload de imagem de anúncio: {e}")
         import traceback